@@ -1,6 +1,7 @@
 # backend/main.py
 
 import os
+import sys
 import shutil
 import uuid
 import json
@@ -13,7 +14,6 @@ import fitz
 from dotenv import load_dotenv
 from typing import List
 
-from qdrant_client import QdrantClient, models
 from qdrant_client.http.models import PointStruct, ScoredPoint
 from openai import OpenAI
 from semantic_text_splitter import TextSplitter
@@ -21,6 +21,11 @@ from semantic_text_splitter import TextSplitter
 # MODIFIED: Import the new prompt
 from prompts import CODE_IMPROVEMENT_PROMPT, FILTER_CONTEXT_PROMPT
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from shared.code_splitter import split_code, is_code
+from shared.vector_store import get_qdrant_client, ensure_collection
+from shared.code_search import BM25Index, reciprocal_rank_fusion, fusion_weights
+
 load_dotenv()
 
 # --- Configuration (remains the same) ---
@@ -32,28 +37,42 @@ QDRANT_COLLECTION_NAME = "code_assistant_v1"
 EMBEDDING_MODEL = "text-embedding-3-small"
 EMBEDDING_DIMENSION = 1536
 CHAT_MODEL = "gpt-4o-mini"
+# "hybrid" fuses vector search with BM25 over code identifiers, "vector" is embeddings only
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+SEARCH_CANDIDATES = 20  # per ranking, before fusion
+SEARCH_LIMIT = 10 if RETRIEVAL_MODE == "vector" else 6  # chunks handed to the filter agent
 
 if not OPENAI_API_KEY: raise ValueError("❌ OPENAI_API_KEY is not set")
 if not QDRANT_URL: raise ValueError("❌ QDRANT_URL is not set")
 
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
-qdrant_client = QdrantClient(url=QDRANT_URL)
+qdrant_client = get_qdrant_client(QDRANT_URL)
 text_splitter = TextSplitter(1000, 200)
+# Lexical side of hybrid search, kept in step with the collection by process_and_embed_document
+lexical_index = BM25Index()
+
+def lexical_text(payload: dict) -> str:
+    # The path and qualified name make "the parser in utils.py" match too
+    return f"{payload.get('source', '')} {payload.get('name', '')}\n{payload.get('text', '')}"
+
+def load_lexical_index() -> int:
+    """Rebuilds the BM25 index from the chunks already stored in Qdrant."""
+    offset = None
+    while True:
+        points, offset = qdrant_client.scroll(QDRANT_COLLECTION_NAME, limit=1000, offset=offset, with_payload=["text", "source", "name"], with_vectors=False)
+        for point in points: lexical_index.add(point.id, lexical_text(point.payload))
+        if offset is None: return len(lexical_index)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 Starting up...")
     os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
     try:
-        collections_response = qdrant_client.get_collections()
-        if QDRANT_COLLECTION_NAME not in [c.name for c in collections_response.collections]:
-            print(f"Collection '{QDRANT_COLLECTION_NAME}' not found. Creating it...")
-            qdrant_client.recreate_collection(
-                collection_name=QDRANT_COLLECTION_NAME,
-                vectors_config=models.VectorParams(size=EMBEDDING_DIMENSION, distance=models.Distance.COSINE),
-            )
+        if ensure_collection(qdrant_client, QDRANT_COLLECTION_NAME, EMBEDDING_DIMENSION):
+            print(f"Collection '{QDRANT_COLLECTION_NAME}' not found. Created it.")
         else:
             print(f"Collection '{QDRANT_COLLECTION_NAME}' already exists.")
+        if RETRIEVAL_MODE == "hybrid": print(f"Lexical index loaded with {load_lexical_index()} chunks.")
     except Exception as e:
         print(f"🔥 Could not connect to Qdrant or create collection: {e}")
     yield
@@ -101,15 +120,39 @@ def extract_text_from_file(filepath: str) -> str:
 def process_and_embed_document(filepath: str, filename: str) -> int:
     text = extract_text_from_file(filepath)
     if not text or not text.strip(): return 0
-    chunks = text_splitter.chunks(text)
+    # Source code is chunked at function/class boundaries (no overlap); prose and config with the text splitter
+    if is_code(filename):
+        code_chunks = split_code(text, filename)
+        chunks, metadata = [c.text for c in code_chunks], [c.metadata() for c in code_chunks]
+    else:
+        chunks = text_splitter.chunks(text); metadata = [{}] * len(chunks)
     if not chunks: return 0
     try:
         embeddings = [item.embedding for item in openai_client.embeddings.create(input=chunks, model=EMBEDDING_MODEL).data]
-        points = [PointStruct(id=str(uuid.uuid4()), vector=emb, payload={"text": ch, "source": filename}) for emb, ch in zip(embeddings, chunks)]
+        points = [PointStruct(id=str(uuid.uuid4()), vector=emb, payload={"text": ch, "source": filename, **meta}) for emb, ch, meta in zip(embeddings, chunks, metadata)]
         qdrant_client.upsert(collection_name=QDRANT_COLLECTION_NAME, points=points, wait=True)
+        for point in points: lexical_index.add(point.id, lexical_text(point.payload))
         return len(points)
     except Exception as e: print(f"Error embedding chunks for {filename}: {e}"); return 0
 
+def search_chunks(query: str, query_embedding: List[float]) -> list:
+    """
+    Returns the chunks to show the filter agent, best first. In hybrid mode the
+    vector and BM25 rankings are fused with reciprocal rank fusion (BM25 counting
+    more when the query names a symbol), so a chunk that uses the symbol asked
+    about is found even when its embedding is not close.
+    """
+    if RETRIEVAL_MODE == "vector":
+        return qdrant_client.search(collection_name=QDRANT_COLLECTION_NAME, query_vector=query_embedding, limit=SEARCH_LIMIT, with_payload=True)
+    vector_results = qdrant_client.search(collection_name=QDRANT_COLLECTION_NAME, query_vector=query_embedding, limit=SEARCH_CANDIDATES, with_payload=True)
+    lexical_results = lexical_index.search(query, SEARCH_CANDIDATES)
+    rankings = [[r.id for r in vector_results], [doc_id for doc_id, _ in lexical_results]]
+    fused_ids = [doc_id for doc_id, _ in reciprocal_rank_fusion(rankings, limit=SEARCH_LIMIT, weights=fusion_weights(query))]
+    points = {r.id: r for r in vector_results}
+    missing = [doc_id for doc_id in fused_ids if doc_id not in points]
+    if missing: points.update((r.id, r) for r in qdrant_client.retrieve(collection_name=QDRANT_COLLECTION_NAME, ids=missing, with_payload=True))
+    return [points[doc_id] for doc_id in fused_ids if doc_id in points]
+
 @app.post("/index-directory", response_model=IndexResponse)
 async def index_directory(files: List[UploadFile] = File(...)):
     # This endpoint remains the same
@@ -134,7 +177,7 @@ async def handle_chat_request(request: ChatRequest):
         if not query: raise HTTPException(status_code=400, detail="Query cannot be empty.")
 
         query_embedding = openai_client.embeddings.create(input=[query], model=EMBEDDING_MODEL).data[0].embedding
-        search_results = qdrant_client.search(collection_name=QDRANT_COLLECTION_NAME, query_vector=query_embedding, limit=10, with_payload=True)
+        search_results = search_chunks(query, query_embedding)
         if not search_results: return ChatResponse(suggestions=[])
 
         context_for_filter = "\n\n".join(f"Chunk {i}: {result.payload['text']}" for i, result in enumerate(search_results))
@@ -150,7 +193,7 @@ async def handle_chat_request(request: ChatRequest):
         if not essential_chunks and search_results: essential_chunks = search_results
         if not essential_chunks: return ChatResponse(suggestions=[])
 
-        formatted_context = "\n\n---\n\n".join(f"**File: {chunk.payload['source']}**\n\n```\n{chunk.payload['text']}\n```" for chunk in essential_chunks)
+        formatted_context = "\n\n---\n\n".join(f"**File: {chunk.payload['source']}**" + (f" ({chunk.payload['name']})" if chunk.payload.get("name") else "") + f"\n\n```\n{chunk.payload['text']}\n```" for chunk in essential_chunks)
         synthesis_prompt = CODE_IMPROVEMENT_PROMPT.format(context=formatted_context, query=query)
 
         synthesis_response = openai_client.chat.completions.create(model=CHAT_MODEL, messages=[{"role": "system", "content": synthesis_prompt}], response_format={"type": "json_object"}, temperature=0.2)
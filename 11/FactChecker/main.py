@@ -1,6 +1,7 @@
 # main.py
 
 import os
+import sys
 import json
 import traceback
 import pandas as pd
@@ -11,12 +12,10 @@ from joblib import Parallel, delayed
 # Import Agno and other components
 from agno.agent import Agent
 from agno.document import Document
-from agno.embedder.openai import OpenAIEmbedder
 from agno.models.openai import OpenAIChat
 from agno.vectordb.qdrant import Qdrant
 from agno.tools.bravesearch import BraveSearchTools
 from docling.document_converter import DocumentConverter
-from qdrant_client.http import models
 from semantic_text_splitter import TextSplitter
 
 # Import all prompts
@@ -28,12 +27,17 @@ from prompts import (
     JUDGE_PROMPT,
 )
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.prompt_layout import split_prompt, user_message
+from shared.ingestion import IngestionManager, read_source
+from shared.vector_store import get_vector_db
+
 # --- CONFIGURATION ---
 # Set to True to run the evaluation suite. Set to False to run a single query.
 RUN_EVALUATION_SUITE = True
 
-# Set to True ONLY on the first run to ingest documents into the database.
-INSERT_CHUNKS = True
+# Ingested on every start; skipped when unchanged since the last run.
+DOCUMENTS_FILE = "documents.md"
 
 # --- Parameters for Single Query Mode (when RUN_EVALUATION_SUITE is False) ---
 SINGLE_QUERY = "What does the memo say about Apple's Project Titan?"
@@ -43,25 +47,6 @@ QDRANT_COLLECTION = "FactCheckerDB"
 
 # --- HELPER FUNCTIONS ---
 
-def create_qdrant_table(
-    table_name: str, embedder: OpenAIEmbedder, vector_db: Qdrant
-) -> None:
-    """Creates a Qdrant collection if it doesn't already exist."""
-    collections_response = vector_db.client.get_collections()
-    collection_names = [c.name for c in collections_response.collections]
-
-    if table_name not in collection_names:
-        print(f"Creating Qdrant table '{table_name}'...")
-        vector_db.client.create_collection(
-            collection_name=table_name,
-            vectors_config=models.VectorParams(
-                size=embedder.dimensions, distance=models.Distance.COSINE
-            ),
-        )
-    else:
-        print(f"Qdrant table '{table_name}' already exists.")
-
-
 def run_factual_checker_pipeline(query: str, vector_db: Qdrant) -> str:
     """
     Executes the full 4-agent Factual Checker pipeline for a given query.
@@ -70,9 +55,10 @@ def run_factual_checker_pipeline(query: str, vector_db: Qdrant) -> str:
         # 1. Agent 1: Qdrant Consultant
         context_chunks = [frag.content for frag in vector_db.search(query, 2)]
         context = "\n---\n".join(context_chunks)
-        agent1_prompt = PROMPT_QDRANT_CONSULTANT.format(context=context)
-        agent_qdrant = Agent(model=OpenAIChat(id="gpt-4o-mini", system_prompt=agent1_prompt))
-        doc_response = agent_qdrant.run(query)
+        # The static part of each prompt is the system prompt and the variable part
+        # the user message, so the system prompt is a cacheable prefix on every call.
+        agent_qdrant = Agent(model=OpenAIChat(id="gpt-4o-mini", system_prompt=split_prompt(PROMPT_QDRANT_CONSULTANT).system))
+        doc_response = agent_qdrant.run(user_message(PROMPT_QDRANT_CONSULTANT, context=context, query=query))
         document_context = doc_response.content if doc_response.content else "No relevant context found in internal documents."
 
         # 2. Agent 2: URL Collector
@@ -89,21 +75,21 @@ def run_factual_checker_pipeline(query: str, vector_db: Qdrant) -> str:
             agent_url_reader = Agent(
                 model=OpenAIChat(
                     id="gpt-4o-mini",
-                    system_prompt=PROMPT_URL_READER.format(query=query),
+                    system_prompt=split_prompt(PROMPT_URL_READER).system,
                 ),
                 search_knowledge=True,
             )
-            web_response = agent_url_reader.run("\n".join(urls))
+            web_response = agent_url_reader.run(user_message(PROMPT_URL_READER, query=query, urls="\n".join(urls)))
             web_context = web_response.content
 
         # 4. Agent 4: Synthesizer & Judge
-        final_prompt = PROMPT_SYNTHESIZER.format(
-            document_context=document_context, web_context=web_context
+        final_prompt = user_message(
+            PROMPT_SYNTHESIZER, document_context=document_context, web_context=web_context
         )
         agent_synthesizer = Agent(
-            model=OpenAIChat(id="gpt-4o-mini", system_prompt=final_prompt)
+            model=OpenAIChat(id="gpt-4o-mini", system_prompt=split_prompt(PROMPT_SYNTHESIZER).system)
         )
-        final_response = agent_synthesizer.run("Analyze the provided information.")
+        final_response = agent_synthesizer.run(f"{final_prompt}\n\nAnalyze the provided information.")
         
         return final_response.content
 
@@ -165,23 +151,23 @@ def main():
     load_dotenv()
 
     # --- INITIALIZATION ---
-    embedder = OpenAIEmbedder(api_key=os.getenv("OPENAI_API_KEY"))
-    vector_db = Qdrant(
-        collection=QDRANT_COLLECTION, url="http://localhost:6333", embedder=embedder
-    )
-
-    # --- DATA INGESTION (Run once) ---
-    if INSERT_CHUNKS:
-        create_qdrant_table(QDRANT_COLLECTION, embedder, vector_db)
-        print("Converting and chunking documents.md...")
+    # Creates the collection on first use
+    vector_db = get_vector_db(QDRANT_COLLECTION)
+
+    # --- DATA INGESTION (skipped when documents.md is unchanged) ---
+    ingestion = IngestionManager(vector_db)
+
+    def build_documents():
+        print(f"Converting and chunking {DOCUMENTS_FILE}...")
         converter = DocumentConverter()
         splitter = TextSplitter(1000, 200)
-        result = converter.convert("documents.md")
+        result = converter.convert(DOCUMENTS_FILE)
         chunks = splitter.chunks(result.document.export_to_markdown())
-        docs = [Document(content=chunk) for chunk in chunks]
-        print(f"Inserting {len(docs)} chunks into database...")
-        vector_db.insert(docs)
-        print("Ingestion complete.")
+        print(f"Inserting {len(chunks)} chunks into database...")
+        return [Document(content=chunk) for chunk in chunks]
+
+    status = ingestion.ingest(DOCUMENTS_FILE, read_source(DOCUMENTS_FILE), build_documents, salt="TextSplitter(1000, 200)")
+    print(f"Ingestion of {DOCUMENTS_FILE}: {status}.")
 
     # --- CHOOSE EXECUTION MODE ---
     if RUN_EVALUATION_SUITE:
@@ -10,7 +10,7 @@ PROMPT_QDRANT_CONSULTANT = dedent(
     </Persona>
 
     <Guidelines>
-    - You will be given a user query and a block of text labeled <Context>.
+    - You will be given a user query, labeled <Query>, and a block of text labeled <Context>.
     - Your entire response MUST be only the verbatim text chunks from the <Context> that are most relevant to the query.
     - Do NOT answer the user's question. Do NOT synthesize, summarize, or alter the text.
     - If no relevant text is found in the context, return an empty response.
@@ -22,6 +22,10 @@ PROMPT_QDRANT_CONSULTANT = dedent(
     <Context>
     {context}
     </Context>
+
+    <Query>
+    {query}
+    </Query>
     """
 )
 
@@ -52,14 +56,22 @@ PROMPT_URL_READER = dedent(
     </Persona>
 
     <Guidelines>
-    - You will be given a list of URLs and an original query.
-    - For each URL, you must access it and extract the information that is directly relevant to the original query: "{query}".
+    - You will be given a list of URLs and an original query, in the <URLs> and <Query> sections.
+    - For each URL, you must access it and extract the information that is directly relevant to the original query.
     # --- ENHANCED ---
     - If a URL is inaccessible, returns an error, or is a dead link, you MUST note this in your summary (e.g., "The source at [URL] was inaccessible.") and proceed to the next URL.
     - Consolidate your findings from all URLs into a single, concise summary.
     - Your response should be a neutral, factual summary of the information found at the provided sources.
     - Cite the source URL for each piece of information you present.
     </Guidelines>
+
+    <Query>
+    {query}
+    </Query>
+
+    <URLs>
+    {urls}
+    </URLs>
     """
 )
 
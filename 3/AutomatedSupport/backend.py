@@ -0,0 +1,206 @@
+# AutomatedSupport/backend.py
+
+import os
+import asyncio
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List
+
+import spacy
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from main import (
+    train_classifier,
+    train_multihead_classifier,
+    process_tickets_batch,
+    process_tickets_batch_multihead,
+    PRIORITY_LABELS,
+    CATEGORY_LABELS,
+    TRAIN_DATA_PRIORITY,
+    TRAIN_DATA_CATEGORY,
+)
+
+# --- Configuration ---
+# Trained pipelines are saved here on first start and loaded on later starts.
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+# Set to "1" to serve the merged multi-head pipeline instead of two pipelines.
+USE_MULTIHEAD = os.getenv("USE_MULTIHEAD", "0") == "1"
+# A micro-batch is scored as soon as it holds MAX_BATCH_SIZE tickets, or
+# MAX_WAIT_MS after its first ticket arrived, whichever comes first.
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "64"))
+MAX_WAIT_MS = float(os.getenv("MAX_WAIT_MS", "10"))
+
+# --- Pydantic Models for API Data Validation ---
+class TriageRequest(BaseModel):
+    """The request model for a single raw ticket."""
+    ticket: str
+
+class TriageBatchRequest(BaseModel):
+    """The request model for several raw tickets sent at once."""
+    tickets: List[str]
+
+class TriageResponse(BaseModel):
+    """The response model for a processed ticket."""
+    username: str
+    os: str
+    version: str
+    description: str
+    priority: str
+    category: str
+
+class TriageBatchResponse(BaseModel):
+    """The response model for several processed tickets, in request order."""
+    results: List[TriageResponse]
+
+# --- Model Loading ---
+def load_or_train(name: str, train):
+    """
+    Loads a pipeline from MODEL_DIR, or trains and saves it if it is missing.
+
+    Args:
+        name: Sub-directory of MODEL_DIR holding the pipeline.
+        train: A zero-argument function returning a freshly trained pipeline.
+
+    Returns:
+        The loaded spaCy nlp object.
+    """
+    path = os.path.join(MODEL_DIR, name)
+    if os.path.exists(path):
+        print(f"Loading '{name}' pipeline from {path}...")
+        return spacy.load(path)
+    print(f"No saved '{name}' pipeline found. Training it...")
+    nlp = train()
+    nlp.to_disk(path)
+    return nlp
+
+def load_ticket_processor():
+    """
+    Loads the classifiers once and returns a function that processes a list of tickets.
+    """
+    if USE_MULTIHEAD:
+        nlp_multihead = load_or_train("multihead", lambda: train_multihead_classifier(
+            {"priority": list(TRAIN_DATA_PRIORITY), "category": list(TRAIN_DATA_CATEGORY)},
+            {"priority": PRIORITY_LABELS, "category": CATEGORY_LABELS},
+        ))
+        return lambda tickets: list(process_tickets_batch_multihead(tickets, nlp_multihead, batch_size=MAX_BATCH_SIZE))
+
+    nlp_priority = load_or_train("priority", lambda: train_classifier(list(TRAIN_DATA_PRIORITY), PRIORITY_LABELS))
+    nlp_category = load_or_train("category", lambda: train_classifier(list(TRAIN_DATA_CATEGORY), CATEGORY_LABELS))
+    return lambda tickets: list(process_tickets_batch(tickets, nlp_priority, nlp_category, batch_size=MAX_BATCH_SIZE))
+
+# --- Micro-Batching ---
+class MicroBatcher:
+    """
+    Gathers tickets from concurrent requests into micro-batches.
+
+    Each request enqueues its ticket with a future and awaits it. A single
+    background task drains the queue into batches, scores every batch with
+    nlp.pipe on a dedicated worker thread (so the event loop keeps accepting
+    requests) and resolves each future with its own result.
+    """
+
+    def __init__(self, process_batch, max_batch_size: int, max_wait_ms: float):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        # One worker thread: spaCy pipelines should not be called concurrently.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.task = None
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.executor.shutdown(wait=True)
+
+    async def submit(self, ticket: str) -> dict:
+        """Enqueues one ticket and waits for its processed result."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((ticket, future))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        """Waits for a first ticket, then gathers more until the batch is full or the wait expires."""
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            tickets = [ticket for ticket, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, tickets)
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+# --- FastAPI Application Setup ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Loads the models once and runs the micro-batcher for the lifetime of the app."""
+    print("🚀 Ticket Triage Service starting up...")
+    app.state.batcher = MicroBatcher(load_ticket_processor(), MAX_BATCH_SIZE, MAX_WAIT_MS)
+    app.state.batcher.start()
+    yield
+    await app.state.batcher.stop()
+    print("🛑 Ticket Triage Service shutting down.")
+
+app = FastAPI(
+    title="Ticket Triage Service",
+    description="An API to extract entities from support tickets and classify their priority and category.",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+@app.post("/triage", response_model=TriageResponse)
+async def triage_ticket(request: TriageRequest):
+    """
+    API endpoint to process a single raw support ticket.
+    """
+    try:
+        return TriageResponse(**await app.state.batcher.submit(request.ticket))
+    except Exception as e:
+        print(f"🔥🔥🔥 UNEXPECTED ERROR: {e} 🔥🔥🔥")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"An unexpected server error occurred: {str(e)}")
+
+@app.post("/triage/batch", response_model=TriageBatchResponse)
+async def triage_tickets(request: TriageBatchRequest):
+    """
+    API endpoint to process several raw support tickets. They share micro-batches
+    with concurrent requests and are returned in request order.
+    """
+    try:
+        results = await asyncio.gather(*(app.state.batcher.submit(ticket) for ticket in request.tickets))
+        return TriageBatchResponse(results=[TriageResponse(**result) for result in results])
+    except Exception as e:
+        print(f"🔥🔥🔥 UNEXPECTED ERROR: {e} 🔥🔥🔥")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"An unexpected server error occurred: {str(e)}")
+
+if __name__ == "__main__":
+    # This makes the backend runnable as a standalone script
+    uvicorn.run(app, host="0.0.0.0", port=8000)
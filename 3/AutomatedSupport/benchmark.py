@@ -0,0 +1,106 @@
+import json
+import time
+import spacy
+
+from main import (
+    train_classifier,
+    train_multihead_classifier,
+    top_label_per_head,
+    PRIORITY_LABELS,
+    CATEGORY_LABELS,
+    TRAIN_DATA_PRIORITY,
+    TRAIN_DATA_CATEGORY,
+)
+
+
+def load_heldout_set(filepath: str) -> list[dict]:
+    """
+    Loads the held-out fixture set used to compare the classifier setups.
+
+    Args:
+        filepath: Path to a JSONL file with "text", "priority" and "category" keys.
+
+    Returns:
+        A list of labelled examples.
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def predict_separate(texts: list[str], nlp_priority, nlp_category, batch_size: int) -> list[tuple[str, str]]:
+    """
+    Predicts (priority, category) with the two separate pipelines.
+    """
+    priorities = [max(doc.cats, key=doc.cats.get) for doc in nlp_priority.pipe(texts, batch_size=batch_size)]
+    categories = [max(doc.cats, key=doc.cats.get) for doc in nlp_category.pipe(texts, batch_size=batch_size)]
+    return list(zip(priorities, categories))
+
+def predict_multihead(texts: list[str], nlp_multihead, batch_size: int) -> list[tuple[str, str]]:
+    """
+    Predicts (priority, category) with the merged multi-head pipeline.
+    """
+    predictions = []
+    for doc in nlp_multihead.pipe(texts, batch_size=batch_size):
+        labels = top_label_per_head(doc.cats)
+        predictions.append((labels["priority"], labels["category"]))
+    return predictions
+
+def accuracy(predictions: list[tuple[str, str]], heldout: list[dict]) -> tuple[float, float]:
+    """
+    Computes the (priority, category) accuracy of a list of predictions.
+    """
+    priority_hits = sum(pred[0] == ex["priority"] for pred, ex in zip(predictions, heldout))
+    category_hits = sum(pred[1] == ex["category"] for pred, ex in zip(predictions, heldout))
+    return priority_hits / len(heldout), category_hits / len(heldout)
+
+def time_predictions(predict, texts: list[str], repeats: int) -> float:
+    """
+    Runs a prediction function over the texts and returns the throughput in docs/sec.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict(texts)
+    elapsed = time.perf_counter() - start
+    return len(texts) * repeats / elapsed
+
+
+if __name__ == "__main__":
+    HELDOUT_FILE = "data/heldout_tickets.jsonl"
+    # The held-out texts are replicated to get a stable throughput measurement.
+    CORPUS_MULTIPLIER = 200
+    REPEATS = 3
+    BATCH_SIZE = 256
+    SEED = 0
+
+    heldout = load_heldout_set(HELDOUT_FILE)
+    heldout_texts = [ex["text"] for ex in heldout]
+    corpus = heldout_texts * CORPUS_MULTIPLIER
+
+    print("Training separate priority and category pipelines...")
+    spacy.util.fix_random_seed(SEED)
+    nlp_priority = train_classifier(list(TRAIN_DATA_PRIORITY), PRIORITY_LABELS)
+    nlp_category = train_classifier(list(TRAIN_DATA_CATEGORY), CATEGORY_LABELS)
+
+    print("Training merged multi-head pipeline...")
+    spacy.util.fix_random_seed(SEED)
+    nlp_multihead = train_multihead_classifier(
+        {"priority": list(TRAIN_DATA_PRIORITY), "category": list(TRAIN_DATA_CATEGORY)},
+        {"priority": PRIORITY_LABELS, "category": CATEGORY_LABELS},
+    )
+
+    separate = lambda texts: predict_separate(texts, nlp_priority, nlp_category, BATCH_SIZE)
+    merged = lambda texts: predict_multihead(texts, nlp_multihead, BATCH_SIZE)
+
+    results = {}
+    for name, predict in [("Separate pipelines", separate), ("Merged multi-head", merged)]:
+        predict(heldout_texts[:8])  # Warm-up
+        docs_per_sec = time_predictions(predict, corpus, REPEATS)
+        priority_acc, category_acc = accuracy(predict(heldout_texts), heldout)
+        results[name] = (docs_per_sec, priority_acc, category_acc)
+
+    print(f"\n--- Classifier Benchmark ({len(corpus)} docs x {REPEATS} runs, {len(heldout)} held-out examples) ---")
+    print(f"{'Setup':<20} {'Docs/sec':>10} {'Priority acc':>13} {'Category acc':>13}")
+    for name, (docs_per_sec, priority_acc, category_acc) in results.items():
+        print(f"{name:<20} {docs_per_sec:>10.0f} {priority_acc:>13.2%} {category_acc:>13.2%}")
+    speedup = results["Merged multi-head"][0] / results["Separate pipelines"][0]
+    print(f"\nMerged pipeline speed-up: {speedup:.2f}x")
+    print("------------------------------------------------------------")
@@ -0,0 +1,76 @@
+import json
+import time
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def load_sample_tickets(filepath: str) -> list[str]:
+    """
+    Builds raw tickets from the held-out fixture descriptions.
+
+    Args:
+        filepath: Path to a JSONL file with a "text" key per line.
+
+    Returns:
+        A list of full ticket strings.
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        descriptions = [json.loads(line)["text"] for line in f if line.strip()]
+    return [
+        f"Username: user_{i}\nOS: Windows 11\nSoftware Version: 2.5.1\nDescription: {description}"
+        for i, description in enumerate(descriptions)
+    ]
+
+def send_ticket(session: requests.Session, url: str, ticket: str) -> float:
+    """
+    Sends one ticket to the service and returns the request latency in seconds.
+    """
+    start = time.perf_counter()
+    response = session.post(url, json={"ticket": ticket}, timeout=60)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+def run_load(url: str, tickets: list[str], total_requests: int, concurrency: int) -> dict:
+    """
+    Fires total_requests requests from `concurrency` client threads.
+
+    Returns:
+        A dictionary with the throughput (requests/sec) and latency percentiles (ms).
+    """
+    sessions = [requests.Session() for _ in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(
+            lambda i: send_ticket(sessions[i % concurrency], url, tickets[i % len(tickets)]),
+            range(total_requests),
+        ))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "throughput": total_requests / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+    }
+
+
+if __name__ == "__main__":
+    # Start the service first: python backend.py
+    TRIAGE_API_URL = "http://localhost:8000/triage"
+    HELDOUT_FILE = "data/heldout_tickets.jsonl"
+    TOTAL_REQUESTS = 2000
+    CONCURRENCY_LEVELS = [1, 8, 32, 64]
+
+    tickets = load_sample_tickets(HELDOUT_FILE)
+    # Warm-up so model loading and first-batch costs are not measured.
+    run_load(TRIAGE_API_URL, tickets, 20, 4)
+
+    print(f"--- Ticket Triage Service Benchmark ({TOTAL_REQUESTS} requests per level) ---")
+    print(f"{'Concurrency':>11} {'Req/sec':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for concurrency in CONCURRENCY_LEVELS:
+        stats = run_load(TRIAGE_API_URL, tickets, TOTAL_REQUESTS, concurrency)
+        print(f"{concurrency:>11} {stats['throughput']:>9.0f} {stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f}")
+    print("------------------------------------------------------------------")
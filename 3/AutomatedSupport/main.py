@@ -1,7 +1,14 @@
 import re
+import csv
+import json
 import spacy
 import random
+from typing import Iterable, Iterator
 from spacy.training.example import Example
+from spacy.util import minibatch
+from thinc.api import compounding
+
+from training_data import PRIORITY_LABELS, CATEGORY_LABELS, TRAIN_DATA_PRIORITY, TRAIN_DATA_CATEGORY
 
 # We load a spaCy model for its base components, but we will create new
 # models specifically for text classification.
@@ -13,9 +20,19 @@ except OSError:
     download("en_core_web_sm")
 
 
+# Every field label is found in a single pass over the ticket. As with a
+# separate re.search per field, only the first occurrence of a label counts,
+# "\s*" lets a value start on the next line, single-line values run to the end
+# of their line and the description runs to the end of the ticket. Labels after
+# the description are still found.
+TICKET_FIELD_PATTERN = re.compile(r"(?P<key>Username|OS|Software Version|Description):\s*")
+TICKET_LINE_VALUE = re.compile(r".*")
+TICKET_FIELD_NAMES = {"Username": "username", "OS": "os", "Software Version": "version", "Description": "description"}
+
+
 def extract_ticket_entities(ticket_text: str) -> dict:
     """
-    Extracts structured entities from a ticket using regular expressions.
+    Extracts structured entities from a ticket using a single precompiled regex.
     This version correctly handles single-line and multi-line fields.
 
     Args:
@@ -24,39 +41,192 @@ def extract_ticket_entities(ticket_text: str) -> dict:
     Returns:
         A dictionary containing the extracted username, OS, version, and description.
     """
-    entities = {}
-    # For single-line fields, we match until the end of the line.
-    # The `(.*)` pattern does this by default as `.` doesn't match newlines.
-    single_line_patterns = {
-        "username": r"Username:\s*(.*)",
-        "os": r"OS:\s*(.*)",
-        "version": r"Software Version:\s*(.*)",
-    }
-    for key, pattern in single_line_patterns.items():
-        match = re.search(pattern, ticket_text) # No DOTALL flag
-        if match:
-            entities[key] = match.group(1).strip()
+    entities = {"username": "Not Found", "os": "Not Found", "version": "Not Found", "description": "Not Found"}
+    found = set()
+    for match in TICKET_FIELD_PATTERN.finditer(ticket_text):
+        key = TICKET_FIELD_NAMES[match.group("key")]
+        if key in found:
+            continue
+        found.add(key)
+        if key == "description":
+            # We also strip() here to clean up any leading/trailing whitespace.
+            entities[key] = ticket_text[match.end():].strip()
         else:
-            entities[key] = "Not Found"
-
-    # For the multi-line description, we use re.DOTALL to allow `.` to match newlines.
-    desc_pattern = r"Description:\s*(.+)"
-    match = re.search(desc_pattern, ticket_text, re.DOTALL)
-    if match:
-        # We also strip() here to clean up any leading/trailing whitespace.
-        entities["description"] = match.group(1).strip()
-    else:
-        entities["description"] = "Not Found"
+            entities[key] = TICKET_LINE_VALUE.match(ticket_text, match.end()).group().strip()
+        if len(found) == len(TICKET_FIELD_NAMES):
+            break
 
     return entities
 
-def train_classifier(train_data, labels):
+def load_training_data(filepath: str, label_field: str = "label", text_field: str = "text") -> tuple[list, list[str]]:
+    """
+    Loads labelled tickets from a JSONL or CSV file into spaCy's training format.
+
+    Each record needs a text column and a label column. Several label columns may
+    live in the same file (e.g. "priority" and "category"), one per call.
+
+    Args:
+        filepath: Path to a .jsonl or .csv file.
+        label_field: Name of the column holding the label to train on.
+        text_field: Name of the column holding the ticket text.
+
+    Returns:
+        A tuple of (train_data, labels), where train_data is a list of
+        (text, {"cats": {...}}) pairs and labels is the sorted label set.
+    """
+    records = []
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        if filepath.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            if row.get(text_field) and row.get(label_field):
+                records.append((row[text_field], row[label_field]))
+
+    labels = sorted({label for _, label in records})
+    train_data = [
+        (text, {"cats": {label: int(label == gold) for label in labels}})
+        for text, gold in records
+    ]
+    return train_data, labels
+
+def split_train_eval(train_data: list, eval_fraction: float = 0.2, seed: int = 0) -> tuple[list, list]:
+    """
+    Shuffles the data and holds out a fraction of it for evaluation.
+
+    Args:
+        train_data: Data in spaCy's training format.
+        eval_fraction: Share of the examples to hold out.
+        seed: Seed of the shuffle, so the split is reproducible.
+
+    Returns:
+        A tuple of (train_split, eval_split).
+    """
+    shuffled = list(train_data)
+    random.Random(seed).shuffle(shuffled)
+    n_eval = int(len(shuffled) * eval_fraction)
+    return shuffled[n_eval:], shuffled[:n_eval]
+
+def predicted_labels(cats: dict) -> set:
+    """
+    Turns the scores of a doc into its set of predicted labels: the best label of
+    a single-head textcat, or the best label of every head of a multi-head pipeline.
+    """
+    if any(HEAD_SEPARATOR in label for label in cats):
+        return {f"{head}{HEAD_SEPARATOR}{label}" for head, label in top_label_per_head(cats).items()}
+    return {max(cats, key=cats.get)}
+
+def evaluate_classifier(nlp, eval_data: list) -> dict:
+    """
+    Computes per-label precision, recall and F1 on held-out data.
+
+    Labels that an example is not annotated with are skipped for that example,
+    so partially annotated multi-head data is scored correctly.
+
+    Args:
+        nlp: A trained classification pipeline.
+        eval_data: Held-out data in spaCy's training format.
+
+    Returns:
+        A dictionary with a "labels" entry mapping each label to its "p", "r" and
+        "f" scores, and a "macro_f" entry with the unweighted mean F1.
+    """
+    counts = {}
+    texts = [text for text, _ in eval_data]
+    for doc, (_, annotations) in zip(nlp.pipe(texts), eval_data):
+        predicted = predicted_labels(doc.cats)
+        for label, gold in annotations["cats"].items():
+            label_counts = counts.setdefault(label, {"tp": 0, "fp": 0, "fn": 0})
+            if label in predicted:
+                label_counts["tp" if gold == 1 else "fp"] += 1
+            elif gold == 1:
+                label_counts["fn"] += 1
+
+    scores = {}
+    for label, label_counts in sorted(counts.items()):
+        tp, fp, fn = label_counts["tp"], label_counts["fp"], label_counts["fn"]
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f_score = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        scores[label] = {"p": precision, "r": recall, "f": f_score}
+    macro_f = sum(s["f"] for s in scores.values()) / len(scores) if scores else 0.0
+    return {"labels": scores, "macro_f": macro_f}
+
+def print_evaluation(scores: dict) -> None:
+    """
+    Prints the per-label report produced by evaluate_classifier.
+    """
+    print(f"  {'Label':<28} {'P':>6} {'R':>6} {'F1':>6}")
+    for label, s in scores["labels"].items():
+        print(f"  {label:<28} {s['p']:>6.2f} {s['r']:>6.2f} {s['f']:>6.2f}")
+    print(f"  {'Macro F1':<28} {'':>6} {'':>6} {scores['macro_f']:>6.2f}")
+
+def fit_pipeline(
+    nlp,
+    train_data: list,
+    eval_data: list = None,
+    n_iter: int = 10,
+    patience: int = 3,
+    dropout: float = 0.2,
+):
+    """
+    Trains the components of a pipeline with minibatches of growing size.
+
+    Batch sizes compound from 4 to 32 examples over the whole run, which keeps the
+    first updates fine-grained and the later ones cheap. When eval_data is given,
+    the pipeline is scored after every epoch, training stops once the macro F1 has
+    not improved for `patience` epochs, and the best weights are restored.
+
+    Args:
+        nlp: A blank pipeline whose components already have their labels.
+        train_data: Data in spaCy's training format.
+        eval_data: Optional held-out data used for early stopping.
+        n_iter: Maximum number of epochs.
+        patience: Epochs without improvement tolerated before stopping.
+        dropout: Dropout rate applied during the updates.
+
+    Returns:
+        The trained nlp object.
+    """
+    examples = [Example.from_dict(nlp.make_doc(text), annotations) for text, annotations in train_data]
+    optimizer = nlp.initialize(lambda: examples)
+    # One shared schedule, so the batch size keeps growing across epochs.
+    batch_sizes = compounding(4.0, 32.0, 1.001)
+
+    best_f, best_weights, epochs_without_improvement = -1.0, None, 0
+    for i in range(n_iter):
+        random.shuffle(examples)
+        losses = {}
+        for batch in minibatch(examples, size=batch_sizes):
+            nlp.update(batch, sgd=optimizer, drop=dropout, losses=losses)
+
+        if not eval_data:
+            continue
+        macro_f = evaluate_classifier(nlp, eval_data)["macro_f"]
+        print(f"  Epoch {i + 1}: loss={sum(losses.values()):.4f} macro F1={macro_f:.3f}")
+        if macro_f > best_f:
+            best_f, best_weights, epochs_without_improvement = macro_f, nlp.to_bytes(), 0
+        else:
+            epochs_without_improvement += 1
+            if epochs_without_improvement >= patience:
+                print(f"  Early stopping after epoch {i + 1}.")
+                break
+
+    if best_weights is not None:
+        nlp.from_bytes(best_weights)
+    return nlp
+
+def train_classifier(train_data, labels, eval_data=None, n_iter=10, patience=3):
     """
     Trains a new spaCy text classification model.
 
     Args:
         train_data: Data to train the model on.
         labels: The labels for the textcat component.
+        eval_data: Optional held-out data used for early stopping (see fit_pipeline).
+        n_iter: Maximum number of training epochs.
+        patience: Epochs without improvement tolerated before stopping.
 
     Returns:
         A trained spaCy nlp object.
@@ -70,16 +240,58 @@ def train_classifier(train_data, labels):
         textcat.add_label(label)
 
     # Train the model
-    optimizer = nlp.begin_training()
-    for i in range(10): # Number of training iterations
-        random.shuffle(train_data)
-        losses = {}
+    return fit_pipeline(nlp, train_data, eval_data=eval_data, n_iter=n_iter, patience=patience)
+
+# Separator between the head name and the label in a merged multi-head pipeline,
+# e.g. "priority::High" or "category::Bug".
+HEAD_SEPARATOR = "::"
+
+def merge_head_annotations(data_by_head: dict) -> list:
+    """
+    Merges per-head training data into namespaced multi-head training data.
+
+    Examples sharing the same text across heads become a single example, and
+    labels a head was not annotated with are left out (treated as missing).
+
+    Args:
+        data_by_head: Maps a head name (e.g. "priority") to its training data.
+
+    Returns:
+        Data in spaCy's training format with "<head>::<label>" cats.
+    """
+    merged_annotations = {}
+    for head, train_data in data_by_head.items():
         for text, annotations in train_data:
-            doc = nlp.make_doc(text)
-            example = Example.from_dict(doc, annotations)
-            nlp.update([example], sgd=optimizer, losses=losses)
-            
-    return nlp
+            cats = merged_annotations.setdefault(text, {})
+            for label, value in annotations["cats"].items():
+                cats[f"{head}{HEAD_SEPARATOR}{label}"] = value
+    return [(text, {"cats": cats}) for text, cats in merged_annotations.items()]
+
+def train_multihead_classifier(train_data_by_head: dict, labels_by_head: dict, eval_data_by_head=None, n_iter=10, patience=3):
+    """
+    Trains a single spaCy pipeline that predicts every classification head at once.
+
+    All heads live in one textcat_multilabel component with namespaced labels, so
+    each description is tokenized and featurized only once.
+
+    Args:
+        train_data_by_head: Maps a head name (e.g. "priority") to its training data.
+        labels_by_head: Maps the same head names to their labels.
+        eval_data_by_head: Optional held-out data per head, used for early stopping.
+        n_iter: Maximum number of training epochs.
+        patience: Epochs without improvement tolerated before stopping.
+
+    Returns:
+        A trained spaCy nlp object whose doc.cats hold "<head>::<label>" scores.
+    """
+    nlp = spacy.blank("en")
+    textcat = nlp.add_pipe("textcat_multilabel")
+    for head, labels in labels_by_head.items():
+        for label in labels:
+            textcat.add_label(f"{head}{HEAD_SEPARATOR}{label}")
+
+    eval_data = merge_head_annotations(eval_data_by_head) if eval_data_by_head else None
+    return fit_pipeline(nlp, merge_head_annotations(train_data_by_head), eval_data=eval_data, n_iter=n_iter, patience=patience)
 
 def classify_ticket(description: str, nlp_priority, nlp_category) -> (str, str):
     """
@@ -105,6 +317,37 @@ def classify_ticket(description: str, nlp_priority, nlp_category) -> (str, str):
 
     return priority, category
 
+def top_label_per_head(cats: dict) -> dict:
+    """
+    Picks the highest-scoring label of every head from a multi-head doc.cats.
+
+    Args:
+        cats: The doc.cats of a pipeline built by train_multihead_classifier.
+
+    Returns:
+        A dictionary mapping each head name to its winning label.
+    """
+    best = {}
+    for namespaced_label, score in cats.items():
+        head, label = namespaced_label.split(HEAD_SEPARATOR, 1)
+        if head not in best or score > best[head][1]:
+            best[head] = (label, score)
+    return {head: label for head, (label, _) in best.items()}
+
+def classify_ticket_multihead(description: str, nlp_multihead) -> (str, str):
+    """
+    Classifies a ticket's priority and category with one merged pipeline pass.
+
+    Args:
+        description: The text description of the user's issue.
+        nlp_multihead: A pipeline trained with train_multihead_classifier.
+
+    Returns:
+        A tuple containing the classified (priority, category).
+    """
+    labels = top_label_per_head(nlp_multihead(description).cats)
+    return labels["priority"], labels["category"]
+
 def process_tickets(tickets: list[str], nlp_priority, nlp_category) -> list[dict]:
     """
     Processes a list of raw ticket strings, performing extraction and classification.
@@ -130,52 +373,174 @@ def process_tickets(tickets: list[str], nlp_priority, nlp_category) -> list[dict
         processed_list.append(entities)
     return processed_list
 
+def read_tickets_jsonl(filepath: str) -> Iterator[str]:
+    """
+    Lazily reads raw tickets from a JSONL file, one ticket per line.
+
+    Args:
+        filepath: Path to a JSONL file. Each line is either a JSON string with the
+            full ticket text or an object holding it under the "text" key.
+
+    Yields:
+        The full text of each support ticket, in file order.
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield record if isinstance(record, str) else record["text"]
+
+def process_tickets_batch(
+    tickets: Iterable[str], nlp_priority, nlp_category, batch_size: int = 256, n_process: int = 1
+) -> Iterator[dict]:
+    """
+    Streaming counterpart of process_tickets for large ticket volumes.
+
+    Descriptions are streamed through nlp.pipe for both classifiers instead of
+    being classified one doc at a time. The extracted entities ride along as
+    context (as_tuples=True), so results come out in input order and nothing
+    beyond the in-flight batches is held in memory.
+
+    Args:
+        tickets: Any iterable of raw ticket strings (a list, a generator, read_tickets_jsonl, ...).
+        nlp_priority: The trained spaCy model for priority classification.
+        nlp_category: The trained spaCy model for category classification.
+        batch_size: Number of descriptions buffered per nlp.pipe batch.
+        n_process: Number of worker processes used by each nlp.pipe call.
+
+    Yields:
+        One dictionary per ticket, identical in shape to the items of process_tickets.
+    """
+    # Tickets without a description are still piped (as empty docs) so the output
+    # order matches the input order; their labels are overwritten with "N/A" below.
+    entity_stream = (
+        (entities["description"] if entities["description"] != "Not Found" else "", entities)
+        for entities in map(extract_ticket_entities, tickets)
+    )
+    priority_stream = nlp_priority.pipe(entity_stream, as_tuples=True, batch_size=batch_size, n_process=n_process)
+    category_input = (
+        (doc.text, (entities, max(doc.cats, key=doc.cats.get)))
+        for doc, entities in priority_stream
+    )
+    category_stream = nlp_category.pipe(category_input, as_tuples=True, batch_size=batch_size, n_process=n_process)
+
+    for doc, (entities, priority) in category_stream:
+        if entities["description"] != "Not Found":
+            entities["priority"] = priority
+            entities["category"] = max(doc.cats, key=doc.cats.get)
+        else:
+            entities["priority"] = "N/A"
+            entities["category"] = "N/A"
+        yield entities
+
+def process_tickets_batch_multihead(
+    tickets: Iterable[str], nlp_multihead, batch_size: int = 256, n_process: int = 1
+) -> Iterator[dict]:
+    """
+    Same as process_tickets_batch, but scores both heads with one merged pipeline,
+    so every description goes through a single nlp.pipe pass.
+
+    Args:
+        tickets: Any iterable of raw ticket strings.
+        nlp_multihead: A pipeline trained with train_multihead_classifier.
+        batch_size: Number of descriptions buffered per nlp.pipe batch.
+        n_process: Number of worker processes used by nlp.pipe.
+
+    Yields:
+        One dictionary per ticket, identical in shape to the items of process_tickets.
+    """
+    entity_stream = (
+        (entities["description"] if entities["description"] != "Not Found" else "", entities)
+        for entities in map(extract_ticket_entities, tickets)
+    )
+    for doc, entities in nlp_multihead.pipe(entity_stream, as_tuples=True, batch_size=batch_size, n_process=n_process):
+        if entities["description"] != "Not Found":
+            labels = top_label_per_head(doc.cats)
+            entities["priority"] = labels["priority"]
+            entities["category"] = labels["category"]
+        else:
+            entities["priority"] = "N/A"
+            entities["category"] = "N/A"
+        yield entities
+
+def write_results_jsonl(results: Iterable[dict], filepath: str) -> int:
+    """
+    Writes processed tickets to a JSONL file as they are produced.
+
+    Args:
+        results: An iterable of processed ticket dictionaries, e.g. from process_tickets_batch.
+        filepath: Destination JSONL file. It is overwritten if it already exists.
+
+    Returns:
+        The number of tickets written.
+    """
+    count = 0
+    with open(filepath, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
 
 if __name__ == "__main__":
-    # --- Training Data Definition ---
-    # Define labels for each classification task
-    PRIORITY_LABELS = ["High", "Medium", "Low"]
-    CATEGORY_LABELS = ["Bug", "Feature Request", "Question", "Security"]
-
-    # Data for Priority Classification (expanded for better generalization)
-    train_data_priority = [
-        ("The application has a critical error and crashes. I'm unable to work.", {"cats": {"High": 1, "Medium": 0, "Low": 0}}),
-        ("The system is failing and this is urgent.", {"cats": {"High": 1, "Medium": 0, "Low": 0}}),
-        ("I found a critical security vulnerability.", {"cats": {"High": 1, "Medium": 0, "Low": 0}}),
-        ("The app just wiped my data. This is a catastrophe.", {"cats": {"High": 1, "Medium": 0, "Low": 0}}), # New example for data loss
-        ("The new feature is very slow and shows inconsistent data.", {"cats": {"High": 0, "Medium": 1, "Low": 0}}),
-        ("I'm having a problem that makes the tool difficult to use.", {"cats": {"High": 0, "Medium": 1, "Low": 0}}),
-        ("The export function creates a corrupted file. It's an annoying issue.", {"cats": {"High": 0, "Medium": 1, "Low": 0}}),
-        ("The layout is broken on save, making my work unusable.", {"cats": {"High": 0, "Medium": 1, "Low": 0}}), # New example for functional but broken UI
-        ("I have a minor visual glitch on the main screen.", {"cats": {"High": 0, "Medium": 0, "Low": 1}}),
-        ("There is a small typo in the documentation.", {"cats": {"High": 0, "Medium": 0, "Low": 1}}),
-        ("It would be great if you could add a dark mode.", {"cats": {"High": 0, "Medium": 0, "Low": 1}}), 
-        ("What is the maximum file size for uploads?", {"cats": {"High": 0, "Medium": 0, "Low": 1}}),
-        ("A 'nice to have' feature would be CSV export.", {"cats": {"High": 0, "Medium": 0, "Low": 1}}), # New example for low-priority ideas
-    ]
+    # --- Batch Mode Configuration ---
+    # Set BATCH_MODE to True to stream tickets from TICKETS_FILE (JSONL) into
+    # RESULTS_FILE instead of running the sample tickets below.
+    BATCH_MODE = False
+    TICKETS_FILE = "tickets.jsonl"
+    RESULTS_FILE = "results.jsonl"
+    BATCH_SIZE = 256
+    N_PROCESS = 1
+    # Set MULTIHEAD to True to predict priority and category with one merged
+    # pipeline (a single tokenization and forward pass per ticket).
+    MULTIHEAD = False
 
-    # Data for Category Classification (expanded for better generalization)
-    train_data_category = [
-        ("The application crashes when I click the save button. This is an error.", {"cats": {"Bug": 1, "Feature Request": 0, "Question": 0, "Security": 0}}),
-        ("The login doesn't work correctly.", {"cats": {"Bug": 1, "Feature Request": 0, "Question": 0, "Security": 0}}),
-        ("The reporting feature is very slow and shows inconsistent data.", {"cats": {"Bug": 1, "Feature Request": 0, "Question": 0, "Security": 0}}),
-        ("The application erased my files unexpectedly.", {"cats": {"Bug": 1, "Feature Request": 0, "Question": 0, "Security": 0}}), # New example for data loss bug
-        ("It would be great if you could add a dark mode.", {"cats": {"Bug": 0, "Feature Request": 1, "Question": 0, "Security": 0}}),
-        ("I suggest implementing a new export format.", {"cats": {"Bug": 0, "Feature Request": 1, "Question": 0, "Security": 0}}),
-        ("I have an idea for a new button on the toolbar.", {"cats": {"Bug": 0, "Feature Request": 1, "Question": 0, "Security": 0}}), # New example for feature idea
-        ("How do I reset my password?", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 1, "Security": 0}}),
-        ("Is it possible to connect to an external database?", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 1, "Security": 0}}),
-        ("What is the maximum file size for uploads?", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 1, "Security": 0}}),
-        ("I'm having trouble with the setup for an external service.", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 1, "Security": 0}}), # New example for setup question
-        ("I believe I have found a security vulnerability.", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 0, "Security": 1}}),
-    ]
+    # --- Training Configuration ---
+    # Point TRAINING_FILE at a labelled JSONL or CSV file with "text", "priority"
+    # and "category" columns to train on it instead of the built-in examples.
+    # EVAL_FRACTION of that file is held out for evaluation and early stopping;
+    # the built-in examples are too few to hold any out.
+    TRAINING_FILE = None
+    EVAL_FRACTION = 0.2
+    N_ITER = 30
+    PATIENCE = 3
+
+    if TRAINING_FILE:
+        print(f"Loading training data from {TRAINING_FILE}...")
+        data_priority, priority_labels = load_training_data(TRAINING_FILE, label_field="priority")
+        data_category, category_labels = load_training_data(TRAINING_FILE, label_field="category")
+        train_priority, eval_priority = split_train_eval(data_priority, EVAL_FRACTION)
+        train_category, eval_category = split_train_eval(data_category, EVAL_FRACTION)
+    else:
+        priority_labels, category_labels = PRIORITY_LABELS, CATEGORY_LABELS
+        train_priority, eval_priority = list(TRAIN_DATA_PRIORITY), []
+        train_category, eval_category = list(TRAIN_DATA_CATEGORY), []
 
     # --- Model Training ---
     print("Training classification models...")
-    nlp_priority_classifier = train_classifier(train_data_priority, PRIORITY_LABELS)
-    nlp_category_classifier = train_classifier(train_data_category, CATEGORY_LABELS)
+    if MULTIHEAD:
+        nlp_multihead_classifier = train_multihead_classifier(
+            {"priority": train_priority, "category": train_category},
+            {"priority": priority_labels, "category": category_labels},
+            eval_data_by_head={"priority": eval_priority, "category": eval_category} if TRAINING_FILE else None,
+            n_iter=N_ITER,
+            patience=PATIENCE,
+        )
+    else:
+        nlp_priority_classifier = train_classifier(train_priority, priority_labels, eval_priority, N_ITER, PATIENCE)
+        nlp_category_classifier = train_classifier(train_category, category_labels, eval_category, N_ITER, PATIENCE)
     print("Models trained successfully.")
 
+    if TRAINING_FILE:
+        print("\n--- Held-out Evaluation ---")
+        if MULTIHEAD:
+            eval_data = merge_head_annotations({"priority": eval_priority, "category": eval_category})
+            print_evaluation(evaluate_classifier(nlp_multihead_classifier, eval_data))
+        else:
+            print_evaluation(evaluate_classifier(nlp_priority_classifier, eval_priority))
+            print_evaluation(evaluate_classifier(nlp_category_classifier, eval_category))
+
     # --- NEW TEST CASES - UNSEEN BY THE MODEL ---
     # This list contains tickets with phrasing and scenarios not present in the training data
     # to provide a true test of the model's generalization capabilities.
@@ -206,17 +571,40 @@ if __name__ == "__main__":
         """
     ]
 
-    # Process the sample tickets using the trained models
-    analyzed_tickets = process_tickets(sample_tickets, nlp_priority_classifier, nlp_category_classifier)
-
-    # Print the results in a clean format
-    print("\n--- Support Ticket Analysis Results ---")
-    for i, ticket in enumerate(analyzed_tickets, 1):
-        print(f"\n--- Ticket #{i} ---")
-        print(f"  Username: {ticket.get('username', 'N/A')}")
-        print(f"  OS: {ticket.get('os', 'N/A')}")
-        print(f"  Version: {ticket.get('version', 'N/A')}")
-        print(f"  Description: {ticket.get('description', 'N/A')}")
-        print(f"  ==> Classified Priority: {ticket.get('priority', 'N/A')}")
-        print(f"  ==> Classified Category: {ticket.get('category', 'N/A')}")
-    print("\n---------------------------------------")
+    if BATCH_MODE:
+        print(f"Streaming tickets from {TICKETS_FILE} to {RESULTS_FILE}...")
+        if MULTIHEAD:
+            results = process_tickets_batch_multihead(
+                read_tickets_jsonl(TICKETS_FILE),
+                nlp_multihead_classifier,
+                batch_size=BATCH_SIZE,
+                n_process=N_PROCESS,
+            )
+        else:
+            results = process_tickets_batch(
+                read_tickets_jsonl(TICKETS_FILE),
+                nlp_priority_classifier,
+                nlp_category_classifier,
+                batch_size=BATCH_SIZE,
+                n_process=N_PROCESS,
+            )
+        total = write_results_jsonl(results, RESULTS_FILE)
+        print(f"Processed {total} tickets.")
+    else:
+        # Process the sample tickets using the trained models
+        if MULTIHEAD:
+            analyzed_tickets = list(process_tickets_batch_multihead(sample_tickets, nlp_multihead_classifier))
+        else:
+            analyzed_tickets = process_tickets(sample_tickets, nlp_priority_classifier, nlp_category_classifier)
+
+        # Print the results in a clean format
+        print("\n--- Support Ticket Analysis Results ---")
+        for i, ticket in enumerate(analyzed_tickets, 1):
+            print(f"\n--- Ticket #{i} ---")
+            print(f"  Username: {ticket.get('username', 'N/A')}")
+            print(f"  OS: {ticket.get('os', 'N/A')}")
+            print(f"  Version: {ticket.get('version', 'N/A')}")
+            print(f"  Description: {ticket.get('description', 'N/A')}")
+            print(f"  ==> Classified Priority: {ticket.get('priority', 'N/A')}")
+            print(f"  ==> Classified Category: {ticket.get('category', 'N/A')}")
+        print("\n---------------------------------------")
@@ -0,0 +1,41 @@
+"""
+Labelled examples used to train the AutomatedSupport ticket classifiers.
+"""
+
+# --- Training Data Definition ---
+# Define labels for each classification task
+PRIORITY_LABELS = ["High", "Medium", "Low"]
+CATEGORY_LABELS = ["Bug", "Feature Request", "Question", "Security"]
+
+# Data for Priority Classification (expanded for better generalization)
+TRAIN_DATA_PRIORITY = [
+    ("The application has a critical error and crashes. I'm unable to work.", {"cats": {"High": 1, "Medium": 0, "Low": 0}}),
+    ("The system is failing and this is urgent.", {"cats": {"High": 1, "Medium": 0, "Low": 0}}),
+    ("I found a critical security vulnerability.", {"cats": {"High": 1, "Medium": 0, "Low": 0}}),
+    ("The app just wiped my data. This is a catastrophe.", {"cats": {"High": 1, "Medium": 0, "Low": 0}}), # New example for data loss
+    ("The new feature is very slow and shows inconsistent data.", {"cats": {"High": 0, "Medium": 1, "Low": 0}}),
+    ("I'm having a problem that makes the tool difficult to use.", {"cats": {"High": 0, "Medium": 1, "Low": 0}}),
+    ("The export function creates a corrupted file. It's an annoying issue.", {"cats": {"High": 0, "Medium": 1, "Low": 0}}),
+    ("The layout is broken on save, making my work unusable.", {"cats": {"High": 0, "Medium": 1, "Low": 0}}), # New example for functional but broken UI
+    ("I have a minor visual glitch on the main screen.", {"cats": {"High": 0, "Medium": 0, "Low": 1}}),
+    ("There is a small typo in the documentation.", {"cats": {"High": 0, "Medium": 0, "Low": 1}}),
+    ("It would be great if you could add a dark mode.", {"cats": {"High": 0, "Medium": 0, "Low": 1}}), 
+    ("What is the maximum file size for uploads?", {"cats": {"High": 0, "Medium": 0, "Low": 1}}),
+    ("A 'nice to have' feature would be CSV export.", {"cats": {"High": 0, "Medium": 0, "Low": 1}}), # New example for low-priority ideas
+]
+
+# Data for Category Classification (expanded for better generalization)
+TRAIN_DATA_CATEGORY = [
+    ("The application crashes when I click the save button. This is an error.", {"cats": {"Bug": 1, "Feature Request": 0, "Question": 0, "Security": 0}}),
+    ("The login doesn't work correctly.", {"cats": {"Bug": 1, "Feature Request": 0, "Question": 0, "Security": 0}}),
+    ("The reporting feature is very slow and shows inconsistent data.", {"cats": {"Bug": 1, "Feature Request": 0, "Question": 0, "Security": 0}}),
+    ("The application erased my files unexpectedly.", {"cats": {"Bug": 1, "Feature Request": 0, "Question": 0, "Security": 0}}), # New example for data loss bug
+    ("It would be great if you could add a dark mode.", {"cats": {"Bug": 0, "Feature Request": 1, "Question": 0, "Security": 0}}),
+    ("I suggest implementing a new export format.", {"cats": {"Bug": 0, "Feature Request": 1, "Question": 0, "Security": 0}}),
+    ("I have an idea for a new button on the toolbar.", {"cats": {"Bug": 0, "Feature Request": 1, "Question": 0, "Security": 0}}), # New example for feature idea
+    ("How do I reset my password?", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 1, "Security": 0}}),
+    ("Is it possible to connect to an external database?", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 1, "Security": 0}}),
+    ("What is the maximum file size for uploads?", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 1, "Security": 0}}),
+    ("I'm having trouble with the setup for an external service.", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 1, "Security": 0}}), # New example for setup question
+    ("I believe I have found a security vulnerability.", {"cats": {"Bug": 0, "Feature Request": 0, "Question": 0, "Security": 1}}),
+]
@@ -0,0 +1,68 @@
+import json
+import time
+
+from main import extractor
+
+
+def load_labelled_postings(filepath: str) -> list[dict]:
+    """
+    Loads postings annotated with their gold (canonical) technologies.
+
+    Args:
+        filepath: Path to a JSONL file with "id", "text" and "technologies" keys.
+
+    Returns:
+        A list of labelled postings.
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def score(predictions: dict[str, set[str]], postings: list[dict]) -> tuple[float, float, float]:
+    """
+    Computes micro-averaged precision, recall and F1 against the gold technologies.
+    """
+    tp = fp = fn = 0
+    for posting in postings:
+        predicted, gold = predictions[posting["id"]], set(posting["technologies"])
+        tp += len(predicted & gold)
+        fp += len(predicted - gold)
+        fn += len(gold - predicted)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f_score = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f_score
+
+def docs_per_second(postings: list[tuple[str, str]], fast: bool, batch_size: int, n_process: int) -> float:
+    """
+    Streams the postings through the extractor and returns the throughput.
+    """
+    start = time.perf_counter()
+    for _ in extractor.pipe(postings, batch_size=batch_size, n_process=n_process, fast=fast):
+        pass
+    return len(postings) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    LABELLED_FILE = "data/labelled_postings.jsonl"
+    # The labelled postings are replicated to get a stable throughput measurement.
+    CORPUS_MULTIPLIER = 500
+    BATCH_SIZE = 256
+    N_PROCESS = 1
+
+    labelled = load_labelled_postings(LABELLED_FILE)
+    postings = [(posting["id"], posting["text"]) for posting in labelled]
+    corpus = postings * CORPUS_MULTIPLIER
+
+    results = {}
+    for name, fast in [("NER path", False), ("Gazetteer fast mode", True)]:
+        predictions = dict(extractor.pipe(postings, fast=fast))
+        precision, recall, f_score = score(predictions, labelled)
+        results[name] = (docs_per_second(corpus, fast, BATCH_SIZE, N_PROCESS), precision, recall, f_score)
+
+    print(f"--- Technology Extraction Benchmark ({len(corpus)} docs, {len(labelled)} labelled postings) ---")
+    print(f"{'Mode':<22} {'Docs/sec':>10} {'Precision':>10} {'Recall':>8} {'F1':>6}")
+    for name, (throughput, precision, recall, f_score) in results.items():
+        print(f"{name:<22} {throughput:>10.0f} {precision:>10.2%} {recall:>8.2%} {f_score:>6.2f}")
+    speedup = results["Gazetteer fast mode"][0] / results["NER path"][0]
+    print(f"\nFast mode speed-up: {speedup:.1f}x")
+    print("-------------------------------------------------------------------------")
@@ -1,5 +1,10 @@
 import spacy
-from spacy.matcher import Matcher
+from spacy.matcher import Matcher, PhraseMatcher
+from collections import Counter
+from typing import Iterable, Iterator
+import os
+import glob
+import json
 import re
 
 # It's recommended to use a model that's more suited for a production
@@ -45,78 +50,257 @@ def is_valid_entity(entity, job_role_keywords, stop_words):
     return True
 
 
-def extract_technologies(job_descriptions: list[str]) -> list[str]:
+# A more generic set of keywords to identify and filter out job titles.
+JOB_ROLE_KEYWORDS = {
+    "developer", "engineer", "scientist", "specialist", "architect",
+    "manager", "lead", "senior", "junior", "full-stack", "full stack"
+}
+# A smaller, more general list of stop words.
+STOP_WORDS = {
+    "inc", "llc", "company", "team", "agile", "restful apis",
+    "ideal candidate", "strong understanding", "google cloud platform"
+}
+
+# We can add more specific technology patterns here if needed.
+TECH_PATTERNS = [
+    # [{"LOWER": "python"}], [{"LOWER": "java"}], [{"LOWER": "c++"}],
+    # [{"LOWER": "javascript"}], [{"LOWER": "react"}], [{"LOWER": "angular"}],
+    # [{"LOWER": "vue.js"}], [{"LOWER": "node.js"}], [{"LOWER": "django"}],
+    # [{"LOWER": "flask"}], [{"LOWER": "spring"}], [{"LOWER": "kubernetes"}],
+    # [{"LOWER": "docker"}], [{"LOWER": "aws"}], [{"LOWER": "azure"}],
+    # [{"LOWER": "gcp"}], [{"LOWER": "tensorflow"}], [{"LOWER": "pytorch"}],
+    # [{"LOWER": "scikit-learn"}], [{"LOWER": "pandas"}], [{"LOWER": "numpy"}],
+    # [{"LOWER": "sql"}], [{"LOWER": "nosql"}], [{"LOWER": "mongodb"}],
+    # [{"LOWER": "postgresql"}], [{"LOWER": "git"}], [{"LOWER": "jenkins"}],
+    # [{"LOWER": "jira"}], [{"LOWER": "spacy"}], [{"LOWER": "nltk"}],
+    # [{"LOWER": "spark"}], [{"LOWER": "hadoop"}],
+    # [{"TEXT": {"REGEX": r"^[A-Z][a-z]+\.(js|JS)$"}}],
+    # [{"TEXT": {"REGEX": r"^[A-Z][a-z]+(\s[A-Z][a-z]+)*\s(JS|js|Framework|Library)$"}}]
+]
+
+# Regex for acronyms (e.g., AWS, GCP, API)
+ACRONYM_PATTERN = re.compile(r'\b[A-Z]{2,}\b')
+
+# Technology dictionary: each canonical name maps to the aliases it may appear as.
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "technologies.json")
+
+
+def load_gazetteer(filepath: str) -> dict[str, list[str]]:
     """
-    Processes a list of job descriptions to extract unique technologies using NER and pattern matching.
+    Loads a technology dictionary from a JSON file.
 
     Args:
-        job_descriptions: A list of strings, where each string is a job description.
+        filepath: Path to a JSON object mapping each canonical technology name to
+            a list of aliases, e.g. {"kubernetes": ["kubernetes", "k8s"]}.
 
     Returns:
-        A sorted list of unique technologies identified across all job descriptions.
+        A dictionary mapping lowercased canonical names to lowercased aliases.
+        Only the listed aliases are matched: a canonical name that is also an
+        ordinary word (e.g. "go") is left out of its own list on purpose.
     """
-    unique_technologies = set()
-
-    # A more generic set of keywords to identify and filter out job titles.
-    job_role_keywords = {
-        "developer", "engineer", "scientist", "specialist", "architect",
-        "manager", "lead", "senior", "junior", "full-stack", "full stack"
-    }
-    # A smaller, more general list of stop words.
-    stop_words = {
-        "inc", "llc", "company", "team", "agile", "restful apis",
-        "ideal candidate", "strong understanding", "google cloud platform"
+    with open(filepath, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return {
+        canonical.lower(): sorted({alias.lower() for alias in aliases})
+        for canonical, aliases in raw.items()
     }
 
-    # We can add more specific technology patterns here if needed.
-    tech_patterns = [
-        # [{"LOWER": "python"}], [{"LOWER": "java"}], [{"LOWER": "c++"}],
-        # [{"LOWER": "javascript"}], [{"LOWER": "react"}], [{"LOWER": "angular"}],
-        # [{"LOWER": "vue.js"}], [{"LOWER": "node.js"}], [{"LOWER": "django"}],
-        # [{"LOWER": "flask"}], [{"LOWER": "spring"}], [{"LOWER": "kubernetes"}],
-        # [{"LOWER": "docker"}], [{"LOWER": "aws"}], [{"LOWER": "azure"}],
-        # [{"LOWER": "gcp"}], [{"LOWER": "tensorflow"}], [{"LOWER": "pytorch"}],
-        # [{"LOWER": "scikit-learn"}], [{"LOWER": "pandas"}], [{"LOWER": "numpy"}],
-        # [{"LOWER": "sql"}], [{"LOWER": "nosql"}], [{"LOWER": "mongodb"}],
-        # [{"LOWER": "postgresql"}], [{"LOWER": "git"}], [{"LOWER": "jenkins"}],
-        # [{"LOWER": "jira"}], [{"LOWER": "spacy"}], [{"LOWER": "nltk"}],
-        # [{"LOWER": "spark"}], [{"LOWER": "hadoop"}],
-        # [{"TEXT": {"REGEX": r"^[A-Z][a-z]+\.(js|JS)$"}}],
-        # [{"TEXT": {"REGEX": r"^[A-Z][a-z]+(\s[A-Z][a-z]+)*\s(JS|js|Framework|Library)$"}}]
-    ]
 
-    matcher = Matcher(nlp.vocab)
-    for i, pattern in enumerate(tech_patterns):
-        matcher.add(f"TECH_PATTERN_{i}", [pattern])
+class TechnologyExtractor:
+    """
+    Extracts technologies from processed job descriptions.
+
+    The matcher, keyword sets and acronym regex are built once here and reused
+    for every document, instead of being rebuilt on each call. An optional
+    gazetteer is compiled into a PhraseMatcher on the LOWER attribute, and every
+    extracted name is mapped to its canonical form (e.g. "k8s" -> "kubernetes").
+    """
+
+    def __init__(
+        self,
+        nlp,
+        tech_patterns=TECH_PATTERNS,
+        job_role_keywords=JOB_ROLE_KEYWORDS,
+        stop_words=STOP_WORDS,
+        gazetteer: dict[str, list[str]] = None,
+    ):
+        self.nlp = nlp
+        self.job_role_keywords = job_role_keywords
+        self.stop_words = stop_words
+        self.matcher = Matcher(nlp.vocab)
+        for i, pattern in enumerate(tech_patterns):
+            self.matcher.add(f"TECH_PATTERN_{i}", [pattern])
 
-    for description in job_descriptions:
-        doc = nlp(description)
+        # The alias docs only need the tokenizer, since LOWER is a lexical attribute.
+        self.phrase_matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        self.canonical_names = {}
+        for canonical, aliases in (gazetteer or {}).items():
+            self.phrase_matcher.add(canonical, list(nlp.tokenizer.pipe(aliases)))
+            for alias in aliases:
+                self.canonical_names[alias] = canonical
+
+    def match(self, doc) -> set[str]:
+        """
+        Finds the technologies matched by the pattern matcher and the gazetteer.
+        This only relies on the tokenizer, so it works on docs that went through
+        no pipeline component at all.
+        """
+        technologies = set()
+        for match_id, start, end in self.matcher(doc):
+            technologies.add(doc[start:end].text.lower())
+        for match_id, start, end in self.phrase_matcher(doc):
+            technologies.add(self.nlp.vocab.strings[match_id])
+        return technologies
+
+    def extract(self, doc, fast: bool = False) -> set[str]:
+        """
+        Extracts the technologies mentioned in a single processed document.
+
+        Args:
+            doc: A spaCy Doc produced by this extractor's nlp object.
+            fast: If True, only use the matchers (see match), skipping the NER
+                entities and the acronym heuristic.
+
+        Returns:
+            The set of lowercased, canonical technologies found in the document.
+        """
+        technologies = self.match(doc)
+        if fast:
+            return technologies
 
         # 1. Extract entities from the pre-trained NER model
         for ent in doc.ents:
             if ent.label_ in ["PRODUCT", "ORG"]:
                 # Use the new, more intelligent filter function
-                if is_valid_entity(ent, job_role_keywords, stop_words):
-                    unique_technologies.add(ent.text.lower())
-
-        # 2. Use the custom matcher (currently empty based on user's test)
-        matches = matcher(doc)
-        for match_id, start, end in matches:
-            span = doc[start:end]
-            unique_technologies.add(span.text.lower())
-
-        # 3. Use regex for acronyms (e.g., AWS, GCP, API)
-        acronym_pattern = r'\b[A-Z]{2,}\b'
-        found_acronyms = re.findall(acronym_pattern, description)
-        for acronym in found_acronyms:
+                if is_valid_entity(ent, self.job_role_keywords, self.stop_words):
+                    technologies.add(ent.text.lower())
+
+        # 2. Use regex for acronyms (e.g., AWS, GCP, API)
+        for acronym in ACRONYM_PATTERN.findall(doc.text):
             # Check against job role keywords to avoid acronyms like 'HR' or 'PM' if they appear.
-            if acronym.lower() not in job_role_keywords:
-                unique_technologies.add(acronym.lower())
+            if acronym.lower() not in self.job_role_keywords:
+                technologies.add(acronym.lower())
+
+        # 3. Map known aliases to their canonical names
+        return {self.canonical_names.get(tech, tech) for tech in technologies}
+
+    def pipe(
+        self, postings: Iterable[tuple[str, str]], batch_size: int = 256, n_process: int = 1, fast: bool = False
+    ) -> Iterator[tuple[str, set[str]]]:
+        """
+        Streams technology sets for a large corpus of postings.
+
+        Only the NER component runs (its tok2vec is internal to it in the
+        en_core_web_sm pipeline); the tagger, parser, lemmatizer and other
+        components are skipped, and documents are processed in batches across
+        `n_process` worker processes. In fast mode not even the NER runs: the
+        documents are only tokenized and passed to the matchers.
+
+        Args:
+            postings: An iterable of (posting_id, text) pairs, e.g. from read_postings.
+            batch_size: Number of postings per nlp.pipe batch.
+            n_process: Number of worker processes used by nlp.pipe.
+            fast: If True, use the tokenizer and matchers only.
+
+        Yields:
+            (posting_id, technologies) pairs, in input order.
+        """
+        disabled = [name for name in self.nlp.pipe_names if fast or name != "ner"]
+        texts_with_ids = ((text, posting_id) for posting_id, text in postings)
+        docs = self.nlp.pipe(texts_with_ids, as_tuples=True, batch_size=batch_size, n_process=n_process, disable=disabled)
+        for doc, posting_id in docs:
+            yield posting_id, self.extract(doc, fast=fast)
+
+
+# One extractor is shared by every call of extract_technologies.
+extractor = TechnologyExtractor(nlp, gazetteer=load_gazetteer(GAZETTEER_FILE))
+
+
+def extract_technologies(job_descriptions: list[str]) -> list[str]:
+    """
+    Processes a list of job descriptions to extract unique technologies using NER and pattern matching.
+
+    Args:
+        job_descriptions: A list of strings, where each string is a job description.
+
+    Returns:
+        A sorted list of unique technologies identified across all job descriptions.
+    """
+    unique_technologies = set()
+    for doc in nlp.pipe(job_descriptions):
+        unique_technologies.update(extractor.extract(doc))
 
     return sorted(list(unique_technologies))
 
+def read_postings(paths: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """
+    Lazily reads job postings from text and JSONL files.
+
+    A .jsonl file holds one posting per line, either as a JSON string or as an
+    object with a "text" key and an optional "id" key. Any other file is read
+    as a single posting.
+
+    Args:
+        paths: Paths of the files to read.
+
+    Yields:
+        (posting_id, text) pairs. The id falls back to "<path>:<line number>"
+        for JSONL lines and to the path for whole files.
+    """
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if isinstance(record, str):
+                        yield f"{path}:{line_number}", record
+                    else:
+                        yield str(record.get("id", f"{path}:{line_number}")), record["text"]
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                yield path, f.read()
+
+def extract_technologies_corpus(
+    postings: Iterable[tuple[str, str]], output_path: str, batch_size: int = 256, n_process: int = 1, fast: bool = False
+) -> Counter:
+    """
+    Extracts technologies from a whole corpus, streaming per-document results.
+
+    Each posting's technology set is written to `output_path` (JSONL) as soon
+    as it is produced, so memory use does not grow with the corpus size.
+
+    Args:
+        postings: An iterable of (posting_id, text) pairs, e.g. from read_postings.
+        output_path: Destination JSONL file for the per-document results.
+        batch_size: Number of postings per nlp.pipe batch.
+        n_process: Number of worker processes used by nlp.pipe.
+        fast: If True, skip the NER and only use the tokenizer and matchers.
+
+    Returns:
+        A Counter with the number of postings mentioning each technology.
+    """
+    counts = Counter()
+    with open(output_path, "w", encoding="utf-8") as f:
+        for posting_id, technologies in extractor.pipe(postings, batch_size=batch_size, n_process=n_process, fast=fast):
+            counts.update(technologies)
+            f.write(json.dumps({"id": posting_id, "technologies": sorted(technologies)}) + "\n")
+    return counts
+
 if __name__ == "__main__":
-    # A list of sample job descriptions to test the script
+    # --- Corpus Mode Configuration ---
+    # Set CORPUS_MODE to True to stream every posting matched by CORPUS_GLOB
+    # (.jsonl files or one posting per text file) instead of the samples below.
+    CORPUS_MODE = False
+    CORPUS_GLOB = "postings/*.jsonl"
+    OUTPUT_FILE = "technologies.jsonl"
+    BATCH_SIZE = 256
+    N_PROCESS = 4
+    # FAST_MODE skips the NER and relies on the technology gazetteer only.
+    FAST_MODE = False
+    TOP_N = 25
+
     job_postings = [
         """
         Senior Python Developer
@@ -153,10 +337,22 @@ if __name__ == "__main__":
         """
     ]
 
-    # Extract and print the unique technologies
-    identified_technologies = extract_technologies(job_postings)
+    if CORPUS_MODE:
+        print(f"Streaming postings from {CORPUS_GLOB} to {OUTPUT_FILE}...")
+        postings = read_postings(sorted(glob.glob(CORPUS_GLOB)))
+        technology_counts = extract_technologies_corpus(
+            postings, OUTPUT_FILE, batch_size=BATCH_SIZE, n_process=N_PROCESS, fast=FAST_MODE
+        )
+
+        print(f"--- Top {TOP_N} Technologies ---")
+        for tech, count in technology_counts.most_common(TOP_N):
+            print(f"- {tech}: {count}")
+        print("------------------------------------")
+    else:
+        # Extract and print the unique technologies
+        identified_technologies = extract_technologies(job_postings)
 
-    print("--- Unique Technologies Identified ---")
-    for tech in identified_technologies:
-        print(f"- {tech}")
-    print("------------------------------------")
+        print("--- Unique Technologies Identified ---")
+        for tech in identified_technologies:
+            print(f"- {tech}")
+        print("------------------------------------")
@@ -0,0 +1,229 @@
+import os
+import glob
+import json
+import sqlite3
+import hashlib
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from main import extractor
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    content_hash TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS document_technologies (
+    content_hash TEXT NOT NULL,
+    technology TEXT NOT NULL,
+    PRIMARY KEY (content_hash, technology)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    posting_id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    posted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_postings_hash ON postings (content_hash);
+CREATE INDEX IF NOT EXISTS idx_postings_posted_at ON postings (posted_at);
+"""
+
+
+def content_hash(text: str, salt: str = "") -> str:
+    """
+    Returns the SHA-256 hex digest of a posting's text, after trimming surrounding
+    whitespace. salt should describe the extraction (see extraction_salt), so a
+    text indexed with another extractor is extracted again instead of reused.
+    """
+    return hashlib.sha256(salt.encode("utf-8") + b"\0" + text.strip().encode("utf-8")).hexdigest()
+
+def extraction_salt(fast: bool) -> str:
+    """Identifies the extraction mode and the gazetteer version it ran with."""
+    gazetteer = json.dumps(sorted(extractor.canonical_names.items()))
+    return f"{'fast' if fast else 'ner'}:{hashlib.sha256(gazetteer.encode('utf-8')).hexdigest()[:16]}"
+
+def read_dated_postings(paths: Iterable[str]) -> Iterator[tuple[str, str, str]]:
+    """
+    Lazily reads job postings together with their publication date.
+
+    A .jsonl file holds one posting per line as an object with a "text" key and
+    optional "id" and "posted_at" (ISO 8601) keys. Any other file is read as a
+    single posting dated by its modification time.
+
+    Args:
+        paths: Paths of the files to read.
+
+    Yields:
+        (posting_id, text, posted_at) triples.
+    """
+    for path in paths:
+        file_date = datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc).isoformat()
+        if path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    posting_id = str(record.get("id", f"{path}:{line_number}"))
+                    yield posting_id, record["text"], record.get("posted_at", file_date)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                yield path, f.read(), file_date
+
+
+class TechnologyTrendIndex:
+    """
+    An incremental index of the technologies mentioned in job postings.
+
+    Technology sets are stored per document, keyed by the content hash of the
+    posting text salted with the extraction mode and gazetteer version, so a
+    daily update only runs extraction for postings whose text has not been
+    indexed the same way before. Aggregate queries load the relevant rows
+    once and compute the results with vectorized pandas/NumPy operations.
+    """
+
+    def __init__(self, db_path: str):
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def update(
+        self, postings: Iterable[tuple[str, str, str]], batch_size: int = 256, n_process: int = 1, fast: bool = False
+    ) -> dict:
+        """
+        Adds new postings to the index and re-indexes the ones whose text changed.
+
+        Args:
+            postings: An iterable of (posting_id, text, posted_at) triples.
+            batch_size: Number of postings per nlp.pipe batch.
+            n_process: Number of worker processes used by nlp.pipe.
+            fast: If True, extract with the gazetteer only (see TechnologyExtractor).
+
+        Returns:
+            A dictionary with the number of postings "seen" and of documents
+            "extracted" (the rest were served from the index).
+        """
+        known_hashes = {row[0] for row in self.connection.execute("SELECT content_hash FROM documents")}
+        salt = extraction_salt(fast)
+        stats = {"seen": 0, "extracted": 0}
+
+        def pending_documents():
+            # Record every posting, and only hand unseen texts to the extractor.
+            for posting_id, text, posted_at in postings:
+                stats["seen"] += 1
+                digest = content_hash(text, salt)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO postings (posting_id, content_hash, posted_at) VALUES (?, ?, ?)",
+                    (posting_id, digest, posted_at),
+                )
+                if digest not in known_hashes:
+                    known_hashes.add(digest)
+                    yield digest, text
+
+        for i, (digest, technologies) in enumerate(
+            extractor.pipe(pending_documents(), batch_size=batch_size, n_process=n_process, fast=fast), 1
+        ):
+            self.connection.execute("INSERT OR IGNORE INTO documents (content_hash) VALUES (?)", (digest,))
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO document_technologies (content_hash, technology) VALUES (?, ?)",
+                [(digest, technology) for technology in technologies],
+            )
+            stats["extracted"] = i
+            if i % batch_size == 0:
+                self.connection.commit()
+        self.connection.commit()
+        return stats
+
+    def mentions(self, start: str = None, end: str = None) -> pd.DataFrame:
+        """
+        Returns one row per (posting, technology) mention, optionally limited to a
+        [start, end) window of publication dates.
+
+        Returns:
+            A DataFrame with "posting_id", "posted_at" (datetime) and "technology" columns.
+        """
+        query = (
+            "SELECT p.posting_id, p.posted_at, t.technology FROM postings p "
+            "JOIN document_technologies t ON t.content_hash = p.content_hash WHERE 1 = 1"
+        )
+        params = []
+        if start:
+            query += " AND p.posted_at >= ?"
+            params.append(start)
+        if end:
+            query += " AND p.posted_at < ?"
+            params.append(end)
+        frame = pd.read_sql_query(query, self.connection, params=params)
+        frame["posted_at"] = pd.to_datetime(frame["posted_at"], utc=True, format="ISO8601")
+        return frame
+
+    def top_technologies(self, n: int = 20, start: str = None, end: str = None) -> pd.Series:
+        """
+        Returns the n technologies mentioned by the most postings.
+        """
+        return self.mentions(start, end)["technology"].value_counts().head(n)
+
+    def cooccurrence(self, top_n: int = 20, start: str = None, end: str = None) -> pd.DataFrame:
+        """
+        Returns how many postings mention each pair of the top_n technologies.
+
+        The matrix is computed as X.T @ X over the binary posting x technology
+        matrix X, so its diagonal holds the per-technology posting counts.
+        """
+        frame = self.mentions(start, end)
+        top = frame["technology"].value_counts().head(top_n).index
+        frame = frame[frame["technology"].isin(top)]
+        postings = pd.Categorical(frame["posting_id"])
+        technologies = pd.Categorical(frame["technology"], categories=top)
+
+        matrix = np.zeros((len(postings.categories), len(top)), dtype=np.int32)
+        matrix[postings.codes, technologies.codes] = 1
+        return pd.DataFrame(matrix.T @ matrix, index=top, columns=top)
+
+    def counts_by_window(self, freq: str = "W", technologies: list[str] = None, start: str = None, end: str = None) -> pd.DataFrame:
+        """
+        Returns the number of postings mentioning each technology per time window.
+
+        Args:
+            freq: A pandas offset alias for the window size ("D", "W", "MS", ...).
+            technologies: Optional subset of technologies to report.
+
+        Returns:
+            A DataFrame indexed by window start, with one column per technology.
+        """
+        frame = self.mentions(start, end)
+        if technologies:
+            frame = frame[frame["technology"].isin(technologies)]
+        return (
+            frame.groupby([pd.Grouper(key="posted_at", freq=freq), "technology"])
+            .size()
+            .unstack(fill_value=0)
+        )
+
+
+if __name__ == "__main__":
+    # Postings matched by CORPUS_GLOB are (re)indexed into INDEX_FILE. Running
+    # this again only extracts postings that are new or whose text changed.
+    CORPUS_GLOB = "postings/*.jsonl"
+    INDEX_FILE = "technology_trends.db"
+    BATCH_SIZE = 256
+    N_PROCESS = 4
+    TOP_N = 10
+
+    index = TechnologyTrendIndex(INDEX_FILE)
+    stats = index.update(read_dated_postings(sorted(glob.glob(CORPUS_GLOB))), batch_size=BATCH_SIZE, n_process=N_PROCESS)
+    print(f"Indexed {stats['seen']} postings ({stats['extracted']} extracted, {stats['seen'] - stats['extracted']} unchanged).")
+
+    print(f"\n--- Top {TOP_N} Technologies ---")
+    print(index.top_technologies(TOP_N).to_string())
+
+    print(f"\n--- Co-occurrence of the Top {TOP_N} Technologies ---")
+    print(index.cooccurrence(TOP_N).to_string())
+
+    print("\n--- Weekly Mentions of the Top 5 Technologies ---")
+    print(index.counts_by_window("W", technologies=list(index.top_technologies(5).index)).to_string())
+    index.close()
@@ -4,6 +4,10 @@ from dotenv import load_dotenv
 import os
 import json
 from prompt import PROMPT
+import asyncio
+from openai import AsyncOpenAI
+from cache import RefactorCache, cache_key
+from chunked import refactor_file, should_chunk
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -11,6 +15,14 @@ load_dotenv()
 # Inicializa a aplicação Flask
 app = Flask(__name__)
 
+# Modelo usado na refatoração e cache de resultados (compartilhado com o async_app.py)
+MODEL = "gpt-4o-mini"
+CACHE_DIRECTORY = "cache"
+refactor_cache = RefactorCache(directory=CACHE_DIRECTORY)
+
+# Arquivos Python a partir deste tamanho são refatorados função por função / classe por classe
+CHUNKED_MODE_MIN_LINES = 300
+
 # Inicializa o cliente da OpenAI com a chave da API a partir das variáveis de ambiente
 try:
     api_key = os.getenv("OPENAI_API_KEY")
@@ -45,6 +57,25 @@ def refactor_code():
     if not original_code:
         return jsonify({'error': 'Nenhum código foi fornecido'}), 400
 
+    # Retorna imediatamente se o mesmo código já foi refatorado com o mesmo prompt e modelo
+    key = cache_key(original_code, MODEL)
+    cached_result = refactor_cache.get(key)
+    if cached_result:
+        print("Resultado encontrado no cache.")
+        return jsonify(cached_result)
+
+    # Arquivos grandes: divide em unidades com ast e as refatora de forma concorrente
+    if should_chunk(original_code, CHUNKED_MODE_MIN_LINES):
+        try:
+            print("Refatorando o arquivo por unidades (funções e classes)...")
+            result = asyncio.run(refactor_file(original_code, AsyncOpenAI(api_key=api_key), refactor_cache, MODEL))
+            print(f"Unidades: {result.pop('stats')}")
+            refactor_cache.set(key, result)
+            return jsonify(result)
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado: {e}")
+            return jsonify({'error': 'Ocorreu um erro inesperado ao comunicar com a API da OpenAI.'}), 500
+
     try:
         # Formata o prompt principal com o código do usuário
         final_prompt = PROMPT.format(user_request=original_code)
@@ -52,7 +83,7 @@ def refactor_code():
         # Envia o prompt finalizado para a API da OpenAI
         print("Enviando requisição para a API da OpenAI...")
         completion = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=MODEL,
             messages=[{"role": "user", "content": final_prompt}],
             response_format={"type": "json_object"} # Garante que a resposta seja um objeto JSON
         )
@@ -65,10 +96,12 @@ def refactor_code():
         response_data = json.loads(response_content)
 
         # O frontend espera as chaves 'refactoredCode' e 'explanation'.
-        return jsonify({
+        result = {
             'refactoredCode': response_data.get('refactoredCode', ''),
             'explanation': response_data.get('explanation', '')
-        })
+        }
+        refactor_cache.set(key, result)
+        return jsonify(result)
 
     except json.JSONDecodeError:
         print(f"Erro ao decodificar o JSON da resposta da OpenAI: {response_content}")
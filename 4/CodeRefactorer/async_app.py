@@ -0,0 +1,234 @@
+import os
+import json
+import traceback
+
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+from prompt import PROMPT
+from cache import RefactorCache, cache_key
+from chunked import refactor_file, should_chunk
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+
+# Mesmo modelo e mesmo diretório de cache do app.py, para que os dois apps compartilhem resultados
+MODEL = "gpt-4o-mini"
+CACHE_DIRECTORY = "cache"
+refactor_cache = RefactorCache(directory=CACHE_DIRECTORY)
+
+# Arquivos Python a partir deste tamanho são refatorados função por função / classe por classe
+CHUNKED_MODE_MIN_LINES = 300
+
+# Inicializa o cliente assíncrono da OpenAI: cada requisição aguarda a API sem bloquear uma thread
+api_key = os.getenv("OPENAI_API_KEY")
+if not api_key:
+    raise ValueError("A variável OPENAI_API_KEY não foi encontrada no arquivo .env ou nas variáveis de ambiente.")
+client = AsyncOpenAI(api_key=api_key)
+
+app = FastAPI(
+    title="Code Refactorer (ASGI)",
+    description="Versão assíncrona do refatorador de código, com streaming e cache de resultados.",
+    version="1.0.0",
+)
+
+
+class RefactorRequest(BaseModel):
+    """O corpo da requisição: o código a ser refatorado."""
+    code: str
+
+
+class JsonStringFieldStreamer:
+    """
+    Extrai incrementalmente os valores string de um objeto JSON plano enquanto ele
+    ainda está sendo recebido, como {"refactoredCode": "...", "explanation": "..."}.
+
+    Cada chamada de feed() devolve os trechos de valor decodificados que ficaram
+    disponíveis, na forma de pares (campo, trecho). Sequências de escape divididas
+    entre dois pedaços da resposta são mantidas até estarem completas, assim como
+    a metade alta de um par substituto (\\ud83d\\ude00) até chegar a metade baixa.
+    """
+
+    def __init__(self):
+        self.state = "before_key"
+        self.key = ""
+        self.escape = ""
+        # Escape \uD800-\uDBFF à espera da sua metade baixa
+        self.high_surrogate = ""
+
+    def take_high_surrogate(self) -> str:
+        """Descarta uma metade alta que não foi seguida da metade baixa, como U+FFFD."""
+        if not self.high_surrogate:
+            return ""
+        self.high_surrogate = ""
+        return "\ufffd"
+
+    def decode_escape(self) -> str:
+        escape, self.escape = self.escape, ""
+        if escape[1] == "u":
+            code = int(escape[2:], 16)
+            if 0xD800 <= code <= 0xDBFF:
+                lone = self.take_high_surrogate()
+                self.high_surrogate = escape
+                return lone
+            if 0xDC00 <= code <= 0xDFFF:
+                if not self.high_surrogate:
+                    return "\ufffd"
+                pair, self.high_surrogate = self.high_surrogate + escape, ""
+                return json.loads(f'"{pair}"')
+        return self.take_high_surrogate() + json.loads(f'"{escape}"')
+
+    def feed(self, text: str) -> list[tuple[str, str]]:
+        deltas = []
+        value = []
+        for char in text:
+            if self.state == "before_key":
+                if char == '"':
+                    self.state, self.key = "in_key", ""
+            elif self.state == "in_key":
+                if char == '"':
+                    self.state = "before_value"
+                else:
+                    self.key += char
+            elif self.state == "before_value":
+                if char == '"':
+                    self.state = "in_value"
+                elif char not in ": \t\r\n":
+                    # Valores que não são strings (null, números) não são transmitidos.
+                    self.state = "before_key"
+            elif self.escape:
+                self.escape += char
+                if self.escape[1] != "u" or len(self.escape) == 6:
+                    value.append(self.decode_escape())
+            elif char == "\\":
+                self.escape = char
+            elif char == '"':
+                value.append(self.take_high_surrogate())
+                if "".join(value):
+                    deltas.append((self.key, "".join(value)))
+                    value = []
+                self.state = "before_key"
+            else:
+                value.append(self.take_high_surrogate() + char)
+        if "".join(value):
+            deltas.append((self.key, "".join(value)))
+        return deltas
+
+
+def ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+@app.get("/")
+async def index():
+    """
+    Serve a mesma página principal do app Flask.
+    """
+    return FileResponse(os.path.join("templates", "index.html"))
+
+
+@app.post("/refactor")
+async def refactor_code(request: RefactorRequest):
+    """
+    Mesmo contrato do endpoint /refactor do app Flask, mas sem bloquear uma thread
+    durante a chamada à OpenAI e respondendo a partir do cache quando possível.
+    """
+    if not request.code:
+        raise HTTPException(status_code=400, detail="Nenhum código foi fornecido")
+
+    key = cache_key(request.code, MODEL)
+    cached_result = refactor_cache.get(key)
+    if cached_result:
+        return cached_result
+
+    try:
+        # Arquivos grandes: divide em unidades com ast e as refatora de forma concorrente
+        if should_chunk(request.code, CHUNKED_MODE_MIN_LINES):
+            result = await refactor_file(request.code, client, refactor_cache, MODEL)
+            print(f"Unidades: {result.pop('stats')}")
+            refactor_cache.set(key, result)
+            return result
+
+        completion = await client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": PROMPT.format(user_request=request.code)}],
+            response_format={"type": "json_object"},
+        )
+        response_data = json.loads(completion.choices[0].message.content)
+        result = {
+            'refactoredCode': response_data.get('refactoredCode', ''),
+            'explanation': response_data.get('explanation', '')
+        }
+        refactor_cache.set(key, result)
+        return result
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=500, detail="Falha ao processar a resposta do modelo de IA.")
+    except Exception as e:
+        print(f"Ocorreu um erro inesperado: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Ocorreu um erro inesperado ao comunicar com a API da OpenAI.")
+
+
+@app.post("/refactor/stream")
+async def refactor_code_stream(request: RefactorRequest):
+    """
+    Refatora o código enviando o resultado progressivamente, em NDJSON.
+
+    Cada linha é um evento: {"field": "explanation" | "refactoredCode", "delta": "..."}
+    à medida que o modelo gera o texto, seguido de {"done": true, "cached": bool}.
+    Em caso de falha, uma linha {"error": "..."} encerra o stream.
+    """
+    if not request.code:
+        raise HTTPException(status_code=400, detail="Nenhum código foi fornecido")
+
+    key = cache_key(request.code, MODEL)
+
+    async def events():
+        cached_result = refactor_cache.get(key)
+        if cached_result:
+            for field in ("explanation", "refactoredCode"):
+                yield ndjson({"field": field, "delta": cached_result.get(field, "")})
+            yield ndjson({"done": True, "cached": True})
+            return
+
+        try:
+            stream = await client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": PROMPT.format(user_request=request.code)}],
+                response_format={"type": "json_object"},
+                stream=True,
+            )
+            streamer = JsonStringFieldStreamer()
+            response_content = []
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                text = chunk.choices[0].delta.content
+                response_content.append(text)
+                for field, delta in streamer.feed(text):
+                    if field in ("explanation", "refactoredCode"):
+                        yield ndjson({"field": field, "delta": delta})
+
+            response_data = json.loads("".join(response_content))
+            refactor_cache.set(key, {
+                'refactoredCode': response_data.get('refactoredCode', ''),
+                'explanation': response_data.get('explanation', '')
+            })
+            yield ndjson({"done": True, "cached": False})
+        except json.JSONDecodeError:
+            yield ndjson({"error": "Falha ao processar a resposta do modelo de IA."})
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado: {e}")
+            traceback.print_exc()
+            yield ndjson({"error": "Ocorreu um erro inesperado ao comunicar com a API da OpenAI."})
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+if __name__ == '__main__':
+    # Executa a aplicação com um servidor ASGI (uvicorn)
+    uvicorn.run(app, host="127.0.0.1", port=8000)
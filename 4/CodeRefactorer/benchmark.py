@@ -0,0 +1,73 @@
+import time
+import uuid
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Trecho de código usado nas requisições. Um comentário único é adicionado a cada
+# requisição "fria" para que o cache não seja usado.
+SAMPLE_CODE = """
+def calc(l):
+    t = 0
+    for i in range(len(l)):
+        if l[i] % 2 == 0:
+            t = t + l[i]
+    return t
+"""
+
+
+def send_request(url: str, code: str, stream: bool) -> tuple[float, float]:
+    """
+    Envia uma requisição e retorna (tempo até o primeiro byte, tempo total) em segundos.
+    """
+    start = time.perf_counter()
+    with requests.post(url, json={"code": code}, stream=stream, timeout=300) as response:
+        response.raise_for_status()
+        first_byte = None
+        for _ in response.iter_content(chunk_size=None):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+    return first_byte or 0.0, time.perf_counter() - start
+
+def run_level(url: str, concurrency: int, total_requests: int, cold: bool, stream: bool) -> dict:
+    """
+    Dispara total_requests requisições a partir de `concurrency` threads cliente.
+
+    Returns:
+        Um dicionário com a vazão (req/s) e as medianas de TTFB e de latência total (ms).
+    """
+    def code_for(i: int) -> str:
+        return f"# bench {uuid.uuid4()}\n{SAMPLE_CODE}" if cold else SAMPLE_CODE
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        timings = list(executor.map(lambda i: send_request(url, code_for(i), stream), range(total_requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "throughput": total_requests / elapsed,
+        "ttfb": statistics.median(t[0] for t in timings) * 1000,
+        "latency": statistics.median(t[1] for t in timings) * 1000,
+    }
+
+
+if __name__ == '__main__':
+    # Inicie os dois servidores antes de executar este script:
+    #   python app.py        (servidor de desenvolvimento do Flask, porta 5000)
+    #   python async_app.py  (uvicorn, porta 8000)
+    # As requisições "frias" chamam a API da OpenAI de verdade e têm custo.
+    TARGETS = {
+        "Flask dev server /refactor": ("http://127.0.0.1:5000/refactor", False),
+        "ASGI /refactor": ("http://127.0.0.1:8000/refactor", False),
+        "ASGI /refactor/stream": ("http://127.0.0.1:8000/refactor/stream", True),
+    }
+    CONCURRENCY_LEVELS = [1, 4, 16]
+    REQUESTS_PER_LEVEL = 16
+
+    print(f"{'Alvo':<28} {'Cache':<6} {'Conc.':>5} {'Req/s':>7} {'TTFB ms':>9} {'Total ms':>9}")
+    for name, (url, stream) in TARGETS.items():
+        for cold in (True, False):
+            for concurrency in CONCURRENCY_LEVELS:
+                stats = run_level(url, concurrency, REQUESTS_PER_LEVEL, cold, stream)
+                label = "frio" if cold else "hit"
+                print(f"{name:<28} {label:<6} {concurrency:>5} {stats['throughput']:>7.2f} {stats['ttfb']:>9.0f} {stats['latency']:>9.0f}")
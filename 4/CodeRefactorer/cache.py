@@ -0,0 +1,86 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from prompt import PROMPT
+
+
+def prompt_version(prompt: str) -> str:
+    """
+    Deriva a versão de um prompt a partir do seu texto. Qualquer alteração no prompt
+    muda a sua versão e, com isso, todas as chaves do cache que a utilizam.
+    """
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+PROMPT_VERSION = prompt_version(PROMPT)
+
+
+def normalize_code(code: str) -> str:
+    """
+    Normaliza um trecho de código para que diferenças cosméticas não impeçam o uso do cache:
+    unifica as quebras de linha, remove espaços no fim de cada linha e descarta linhas
+    em branco no início e no fim. A indentação é mantida.
+    """
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+def cache_key(code: str, model: str, prompt_version: str = PROMPT_VERSION) -> str:
+    """
+    Gera a chave de cache de uma requisição de refatoração a partir do código
+    normalizado, da versão do prompt e do nome do modelo.
+    """
+    payload = "\0".join([normalize_code(code), prompt_version, model])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RefactorCache:
+    """
+    Cache thread-safe de resultados de refatoração.
+
+    Os resultados recentes ficam em um LRU em memória. Quando um diretório é
+    informado, cada resultado também é gravado nele como <chave>.json, de modo que
+    o cache sobrevive a reinicializações e é compartilhado entre o app Flask e o app assíncrono.
+    """
+
+    def __init__(self, max_entries: int = 1024, directory: str = None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str):
+        """Retorna o resultado armazenado para uma chave, ou None."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        if self.directory:
+            path = os.path.join(self.directory, f"{key}.json")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    result = json.load(f)
+                self._remember(key, result)
+                return result
+        return None
+
+    def set(self, key: str, result: dict) -> None:
+        """Armazena um resultado sob uma chave."""
+        self._remember(key, result)
+        if self.directory:
+            path = os.path.join(self.directory, f"{key}.json")
+            # Grava primeiro em um arquivo temporário para que leitores nunca vejam um arquivo parcial.
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key: str, result: dict) -> None:
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
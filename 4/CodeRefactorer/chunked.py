@@ -0,0 +1,216 @@
+import os
+import ast
+import sys
+import json
+import asyncio
+from dataclasses import dataclass
+
+from prompt import UNIT_PROMPT
+from cache import RefactorCache, cache_key, prompt_version
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+# Divide as linhas só em \r\n, \r e \n, como o ast numera as linhas
+from shared.code_splitter import source_lines
+
+UNIT_PROMPT_VERSION = prompt_version(UNIT_PROMPT)
+
+
+@dataclass
+class CodeUnit:
+    """
+    Um trecho contíguo de um arquivo Python.
+
+    kind é "function" ou "class" para definições de nível superior (incluindo
+    decoradores) e "module" para todo o resto (imports, constantes, comentários,
+    linhas em branco), que é mantido sem alterações.
+    """
+    kind: str
+    name: str
+    source: str
+
+
+def split_into_units(source: str) -> list[CodeUnit]:
+    """
+    Divide um arquivo Python em unidades de nível superior usando o módulo ast.
+
+    A concatenação de todas as unidades, na ordem retornada, reproduz o arquivo original.
+
+    Raises:
+        SyntaxError: Se o código não for Python válido.
+    """
+    tree = ast.parse(source)
+    lines = source_lines(source)
+    units = []
+    cursor = 0
+
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        start = (node.decorator_list[0].lineno if node.decorator_list else node.lineno) - 1
+        if start > cursor:
+            units.append(CodeUnit("module", None, "".join(lines[cursor:start])))
+        kind = "class" if isinstance(node, ast.ClassDef) else "function"
+        units.append(CodeUnit(kind, node.name, "".join(lines[start:node.end_lineno])))
+        cursor = node.end_lineno
+
+    if cursor < len(lines):
+        units.append(CodeUnit("module", None, "".join(lines[cursor:])))
+    return units
+
+def should_chunk(source: str, min_lines: int) -> bool:
+    """
+    Indica se o código deve ser refatorado por unidades: ele precisa ter pelo menos
+    min_lines linhas, ser Python válido e conter alguma função ou classe.
+    """
+    if len(source_lines(source)) < min_lines:
+        return False
+    try:
+        return any(unit.kind != "module" for unit in split_into_units(source))
+    except SyntaxError:
+        return False
+
+def collect_imports(source: str) -> str:
+    """
+    Retorna as instruções de import de nível superior do arquivo, uma por linha.
+    """
+    tree = ast.parse(source)
+    imports = [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(imports) or "(no imports)"
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimativa rápida do número de tokens de um texto (~4 caracteres por token).
+    """
+    return len(text) // 4 + 1
+
+def is_valid_replacement(unit: CodeUnit, refactored_code: str) -> bool:
+    """
+    Verifica se o código refatorado é Python válido e ainda define, no nível
+    superior, uma função ou classe com o mesmo nome da unidade original.
+    """
+    try:
+        tree = ast.parse(refactored_code)
+    except SyntaxError:
+        return False
+    return any(
+        isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.name == unit.name
+        for node in tree.body
+    )
+
+
+class TokenBudget:
+    """
+    Limita a soma estimada de tokens das requisições em andamento.
+
+    Uma requisição maior que o orçamento inteiro é limitada ao orçamento, de modo
+    que ela ainda possa ser executada (sozinha).
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.available = max_tokens
+        self.condition = asyncio.Condition()
+
+    async def acquire(self, tokens: int) -> int:
+        tokens = min(tokens, self.max_tokens)
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.available >= tokens)
+            self.available -= tokens
+        return tokens
+
+    async def release(self, tokens: int) -> None:
+        async with self.condition:
+            self.available += tokens
+            self.condition.notify_all()
+
+
+async def refactor_unit(unit: CodeUnit, file_imports: str, client, model: str, budget: TokenBudget, semaphore: asyncio.Semaphore) -> dict:
+    """
+    Refatora uma única unidade com o UNIT_PROMPT, respeitando o orçamento de tokens
+    e o limite de requisições simultâneas.
+    """
+    final_prompt = UNIT_PROMPT.format(file_imports=file_imports, unit_code=unit.source)
+    # Entrada (prompt) mais uma saída de tamanho semelhante ao da unidade.
+    tokens = await budget.acquire(estimate_tokens(final_prompt) + estimate_tokens(unit.source))
+    try:
+        async with semaphore:
+            completion = await client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": final_prompt}],
+                response_format={"type": "json_object"},
+            )
+    finally:
+        await budget.release(tokens)
+    response_data = json.loads(completion.choices[0].message.content)
+    return {
+        'refactoredCode': response_data.get('refactoredCode', ''),
+        'explanation': response_data.get('explanation', '')
+    }
+
+async def refactor_file(
+    source: str,
+    client,
+    cache: RefactorCache,
+    model: str = "gpt-4o-mini",
+    max_tokens_in_flight: int = 60000,
+    max_concurrency: int = 8,
+) -> dict:
+    """
+    Refatora um arquivo Python grande unidade por unidade.
+
+    As funções e classes de nível superior são refatoradas de forma concorrente
+    (limitadas por max_concurrency requisições e por max_tokens_in_flight tokens
+    estimados em andamento) e costuradas de volta na ordem original. O restante do
+    arquivo é mantido como está. Unidades cujo código não mudou desde uma execução
+    anterior são servidas pelo cache, sem chamar a API. Se a resposta para uma
+    unidade for inválida ou a chamada falhar, a unidade original é mantida.
+
+    Args:
+        source: O código Python completo.
+        client: Um cliente AsyncOpenAI.
+        cache: O cache de resultados por unidade.
+        model: O modelo usado na refatoração.
+        max_tokens_in_flight: Orçamento de tokens estimados das requisições simultâneas.
+        max_concurrency: Número máximo de requisições simultâneas.
+
+    Returns:
+        Um dicionário com 'refactoredCode', 'explanation' e 'stats' (quantidade de
+        unidades refatoradas, servidas pelo cache e mantidas).
+    """
+    units = split_into_units(source)
+    file_imports = collect_imports(source)
+    budget = TokenBudget(max_tokens_in_flight)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    stats = {"units": len(units), "refactored": 0, "cached": 0, "kept": 0}
+
+    async def process(unit: CodeUnit) -> tuple[str, str]:
+        if unit.kind == "module":
+            return unit.source, ""
+        # Os imports fazem parte do contexto do prompt e, portanto, da chave.
+        key = cache_key(f"{file_imports}\0{unit.source}", model, UNIT_PROMPT_VERSION)
+        result = cache.get(key)
+        if result:
+            stats["cached"] += 1
+        else:
+            try:
+                result = await refactor_unit(unit, file_imports, client, model, budget, semaphore)
+            except Exception as e:
+                print(f"Falha ao refatorar '{unit.name}': {e}")
+                stats["kept"] += 1
+                return unit.source, ""
+            if not is_valid_replacement(unit, result['refactoredCode']):
+                print(f"Resposta inválida para '{unit.name}'. A unidade original será mantida.")
+                stats["kept"] += 1
+                return unit.source, ""
+            cache.set(key, result)
+            stats["refactored"] += 1
+        # Mantém a mesma quantidade de quebras de linha no fim da unidade original.
+        trailing = unit.source[len(unit.source.rstrip("\n")):]
+        return result['refactoredCode'].rstrip("\n") + trailing, f"**`{unit.name}`**: {result['explanation']}"
+
+    results = await asyncio.gather(*(process(unit) for unit in units))
+    return {
+        'refactoredCode': "".join(code for code, _ in results),
+        'explanation': "\n\n".join(explanation for _, explanation in results if explanation),
+        'stats': stats,
+    }
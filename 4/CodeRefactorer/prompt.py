@@ -23,3 +23,30 @@ PROMPT: str = dedent(text="""
     </InputCode>
     """
 )
+
+UNIT_PROMPT: str = dedent(text="""
+    <Persona>
+    You are an expert Senior Software Engineer. You are a master of Python and specialize in writing clean, efficient, and well-documented code following industry best practices.
+    </Persona>
+
+    <Task>
+    Your task is to refactor ONE top-level unit (a function or a class) taken from a larger Python file. The refactored unit will be put back into the file in the same position. You must return a JSON object containing two keys: "refactoredCode" and "explanation".
+    </Task>
+
+    <Guidelines>
+    - The "refactoredCode" key should contain only the improved version of the unit, with no surrounding code.
+    - Keep the unit's name, its signature and its public behaviour unchanged, because the rest of the file depends on them.
+    - Do not add import statements. You may only rely on the names already imported in the file, which are listed in <FileImports>.
+    - The "explanation" key should contain a short, friendly explanation of the changes. If no change is worthwhile, return the unit unchanged and say so.
+    - Your entire response must be a single, valid JSON object and nothing else. Do not add any text before or after the JSON object.
+    </Guidelines>
+
+    <FileImports>
+    {file_imports}
+    </FileImports>
+
+    <InputCode>
+    {unit_code}
+    </InputCode>
+    """
+)
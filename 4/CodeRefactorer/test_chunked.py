@@ -0,0 +1,27 @@
+import unittest
+
+from chunked import split_into_units, should_chunk
+
+
+class SplitIntoUnitsTest(unittest.TestCase):
+    def test_form_feed_between_definitions(self):
+        # str.splitlines quebra em \x0c, o que deslocava as unidades em relação às linhas do ast
+        source = "import os\n\x0c\ndef f():\n    return 1\n\x0c\nclass C:\n    x = '\u2028'\n"
+        units = split_into_units(source)
+        self.assertEqual("".join(unit.source for unit in units), source)
+        self.assertEqual(
+            [(unit.kind, unit.name, unit.source) for unit in units],
+            [
+                ("module", None, "import os\n\x0c\n"),
+                ("function", "f", "def f():\n    return 1\n"),
+                ("module", None, "\x0c\n"),
+                ("class", "C", "class C:\n    x = '\u2028'\n"),
+            ],
+        )
+
+    def test_should_chunk_counts_real_lines(self):
+        self.assertFalse(should_chunk("def f():\n    return '\x0c\x0c\x0c'\n", min_lines=3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,19 +1,43 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, url_for
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
+import json
+import time
+
+from audio_chunking import transcribe_recording, join_segments
+from jobs import TranscriptionJobManager, QueueFullError
+from transcript_cache import HashingRequest, TranscriptCache, audio_cache_key
 
 # Load environment variables from a .env file
 load_dotenv()
 
 # Initialize the Flask application
 app = Flask(__name__)
-
-# Define the folder for temporary file uploads
-UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Hashes uploaded files while they are received, for the transcript cache
+app.request_class = HashingRequest
+
+# Transcription settings. Recordings longer than LONG_AUDIO_MS are split at
+# silences into segments of about SEGMENT_MS that are transcribed in parallel.
+TRANSCRIPTION_MODEL = "gpt-4o-mini-transcribe"
+LONG_AUDIO_MS = 8 * 60 * 1000
+SEGMENT_MS = 5 * 60 * 1000
+MAX_PARALLEL_REQUESTS = 4
+
+# Background job settings (see /jobs). At most JOB_WORKERS recordings are
+# transcribed at once; up to MAX_PENDING_JOBS more wait in the queue. Finished
+# jobs are deleted from JOBS_FOLDER JOB_TTL_SECONDS after they complete.
+JOBS_FOLDER = "jobs"
+JOB_WORKERS = 2
+MAX_PENDING_JOBS = 32
+JOB_TTL_SECONDS = 24 * 60 * 60
+SSE_POLL_SECONDS = 1
+
+# Transcripts are cached by audio content and model, so re-uploading the same
+# recording costs nothing. The cache folder is kept under TRANSCRIPT_CACHE_MAX_BYTES.
+TRANSCRIPT_CACHE_FOLDER = "transcript_cache"
+TRANSCRIPT_CACHE_MAX_BYTES = 100 * 1024 * 1024
+transcript_cache = TranscriptCache(TRANSCRIPT_CACHE_FOLDER, max_bytes=TRANSCRIPT_CACHE_MAX_BYTES)
 
 
 # Initialize the OpenAI client with the API key from environment variables
@@ -27,6 +51,19 @@ except ValueError as e:
     print(f"Error: {e}")
     client = None
 
+job_manager = TranscriptionJobManager(
+    client,
+    TRANSCRIPTION_MODEL,
+    jobs_dir=JOBS_FOLDER,
+    num_workers=JOB_WORKERS,
+    max_pending_jobs=MAX_PENDING_JOBS,
+    ttl_seconds=JOB_TTL_SECONDS,
+    long_audio_ms=LONG_AUDIO_MS,
+    segment_ms=SEGMENT_MS,
+    max_parallel_requests=MAX_PARALLEL_REQUESTS,
+    cache=transcript_cache,
+) if client else None
+
 @app.route('/')
 def index():
     """
@@ -51,41 +88,109 @@ def transcribe_audio():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
-    filepath = "" # Define filepath to ensure it's available in the finally block
-    if file:
-        try:
-            # Save the file temporarily
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-            file.save(filepath)
-            print(f"File saved temporarily to {filepath}")
-
-            # Open the saved file and send it to the Whisper API
-            with open(filepath, "rb") as audio_file:
-                print("Sending audio to OpenAI Whisper API for transcription...")
-                # The correct, official model for audio transcription is "whisper-1"
-                transcription = client.audio.transcriptions.create(
-                  model="gpt-4o-mini-transcribe", 
-                  file=audio_file
-                )
-                print("Transcription received.")
-
-            # Return the transcription text
-            return jsonify({'transcription': transcription.text})
-
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            return jsonify({'error': str(e)}), 500
-        
-        finally:
-            # Clean up the temporary file if it exists
-            if filepath and os.path.exists(filepath):
-                # os.remove(filepath)
-                print(f"Temporary file {filepath} removed.")
-
-
-    return jsonify({'error': 'An unknown error occurred'}), 500
+    try:
+        cache_key = audio_cache_key(file, TRANSCRIPTION_MODEL)
+        cached_result = transcript_cache.get(cache_key)
+        if cached_result:
+            print("Transcription served from the cache.")
+            return jsonify({**cached_result, 'cached': True})
+
+        # Uploads are never written to our own folder: Werkzeug keeps small files in
+        # memory and spools large ones to a temporary file that it deletes itself.
+        print("Sending audio to OpenAI for transcription...")
+        segments = transcribe_recording(
+            client,
+            TRANSCRIPTION_MODEL,
+            file.stream,
+            file.filename,
+            long_audio_ms=LONG_AUDIO_MS,
+            segment_ms=SEGMENT_MS,
+            max_parallel_requests=MAX_PARALLEL_REQUESTS,
+        )
+        print(f"Transcription of {len(segments)} segment(s) received.")
+
+        # Return the full transcription text along with the timestamped segments
+        result = {'transcription': join_segments(segments), 'segments': segments}
+        transcript_cache.set(cache_key, result)
+        return jsonify({**result, 'cached': False})
+
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Receives an audio file and queues it for transcription in the background.
+    Responds immediately with the job id and the URLs to follow its progress.
+    """
+    if not job_manager:
+        return jsonify({'error': 'OpenAI client is not initialized. Please check your API key setup.'}), 500
+
+    if 'audio_file' not in request.files:
+        return jsonify({'error': 'No audio file found in the request'}), 400
+
+    file = request.files['audio_file']
+
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    try:
+        job_id = job_manager.submit(file)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '30'}
+
+    return jsonify({
+        'job_id': job_id,
+        'status_url': url_for('job_status', job_id=job_id),
+        'events_url': url_for('job_events', job_id=job_id),
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Returns the status of a job: "queued", "running", "done" or "failed", the
+    segments transcribed so far and, once done, the full transcription.
+    """
+    status = job_manager.get(job_id) if job_manager else None
+    if not status:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Streams the status of a job as Server-Sent Events: one event every time it
+    changes, until the job is done or failed.
+    """
+    if not job_manager or not job_manager.get(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+
+    def events():
+        last_update = None
+        while True:
+            status = job_manager.get(job_id)
+            if not status:
+                yield "event: error\ndata: {\"error\": \"Job not found\"}\n\n"
+                return
+            if status['updated_at'] != last_update:
+                last_update = status['updated_at']
+                yield f"data: {json.dumps(status)}\n\n"
+            if status['status'] in ('done', 'failed'):
+                return
+            time.sleep(SSE_POLL_SECONDS)
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+    Returns the transcript cache hit rate and size.
+    """
+    return jsonify(transcript_cache.stats())
 
 
 if __name__ == '__main__':
     # Run the app in debug mode for development
-    app.run(debug=True)
+    # (threaded so that SSE streams and uploads do not block each other)
+    app.run(debug=True, threaded=True)
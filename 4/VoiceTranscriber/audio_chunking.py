@@ -0,0 +1,167 @@
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pydub import AudioSegment
+from pydub.silence import detect_silence
+
+
+def find_split_points(
+    audio: AudioSegment,
+    target_segment_ms: int,
+    search_window_ms: int,
+    min_silence_ms: int = 400,
+    silence_offset_db: float = 16,
+) -> list[int]:
+    """
+    Chooses where to cut a long recording so that segments end in silence.
+
+    Around every multiple of target_segment_ms, the quietest gap inside a
+    +/- search_window_ms window is used as the cut point. When the window holds
+    no silence, the recording is cut exactly at the target position.
+
+    Args:
+        audio: The decoded recording.
+        target_segment_ms: Desired segment length in milliseconds.
+        search_window_ms: How far from the target position a silence is looked for.
+        min_silence_ms: Minimum length of a gap to count as silence.
+        silence_offset_db: A gap is silent when it is this many dB below the recording's average loudness.
+
+    Returns:
+        The sorted cut points in milliseconds, starting at 0 and ending at len(audio).
+    """
+    # A fully silent recording has a loudness of -inf dBFS.
+    silence_thresh = audio.dBFS - silence_offset_db if audio.dBFS != float("-inf") else -50
+    points = [0]
+    target = target_segment_ms
+    # Stop early enough that the last segment is not a tiny leftover.
+    while target < len(audio) - target_segment_ms // 2:
+        window_start = max(points[-1] + 1, target - search_window_ms)
+        window_end = min(len(audio), target + search_window_ms)
+        silences = detect_silence(audio[window_start:window_end], min_silence_len=min_silence_ms, silence_thresh=silence_thresh)
+        if silences:
+            # Cut in the middle of the silence closest to the target position.
+            start, end = min(silences, key=lambda s: abs(window_start + (s[0] + s[1]) // 2 - target))
+            cut = window_start + (start + end) // 2
+        else:
+            cut = target
+        points.append(cut)
+        target = cut + target_segment_ms
+    points.append(len(audio))
+    return points
+
+def transcribe_segment(client, model: str, segment: AudioSegment) -> str:
+    """
+    Encodes one segment to MP3 in memory and sends it for transcription.
+    """
+    buffer = io.BytesIO()
+    segment.export(buffer, format="mp3", bitrate="64k")
+    transcription = client.audio.transcriptions.create(
+        model=model,
+        file=("segment.mp3", buffer.getvalue()),
+    )
+    return transcription.text
+
+def transcribe_long_audio(
+    client,
+    model: str,
+    audio: AudioSegment,
+    target_segment_ms: int = 5 * 60 * 1000,
+    search_window_ms: int = 30 * 1000,
+    max_parallel_requests: int = 4,
+    on_segment=None,
+) -> list[dict]:
+    """
+    Transcribes a long recording as silence-delimited segments, in parallel.
+
+    Args:
+        client: An OpenAI client.
+        model: The transcription model.
+        audio: The decoded recording.
+        target_segment_ms: Desired segment length in milliseconds.
+        search_window_ms: How far from the target position a silence is looked for.
+        max_parallel_requests: Maximum number of transcription requests in flight.
+        on_segment: Optional callback called as on_segment(index, total, segment)
+            as soon as each segment is transcribed (in completion order).
+
+    Returns:
+        The segments in order, each with "start" and "end" (in seconds) and "text".
+    """
+    points = find_split_points(audio, target_segment_ms, search_window_ms)
+    bounds = list(zip(points, points[1:]))
+    results = [None] * len(bounds)
+
+    with ThreadPoolExecutor(max_workers=max_parallel_requests) as executor:
+        futures = {
+            executor.submit(transcribe_segment, client, model, audio[start:end]): i
+            for i, (start, end) in enumerate(bounds)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            start, end = bounds[i]
+            results[i] = {"start": start / 1000, "end": end / 1000, "text": future.result().strip()}
+            if on_segment:
+                on_segment(i, len(bounds), results[i])
+
+    return results
+
+def transcribe_recording(
+    client,
+    model: str,
+    source,
+    filename: str,
+    long_audio_ms: int,
+    segment_ms: int,
+    max_parallel_requests: int,
+    on_segment=None,
+) -> list[dict]:
+    """
+    Transcribes an uploaded recording, splitting it only when it is long.
+
+    Args:
+        client: An OpenAI client.
+        model: The transcription model.
+        source: A seekable binary file object holding the recording.
+        filename: The original file name (its extension tells the API the format).
+        long_audio_ms: Recordings longer than this are transcribed in segments.
+        segment_ms: Desired segment length in milliseconds.
+        max_parallel_requests: Maximum number of transcription requests in flight.
+        on_segment: Optional progress callback (see transcribe_long_audio).
+
+    Returns:
+        The segments in order, each with "start" and "end" (in seconds) and "text".
+    """
+    audio = AudioSegment.from_file(source)
+
+    if len(audio) > long_audio_ms:
+        return transcribe_long_audio(
+            client,
+            model,
+            audio,
+            target_segment_ms=segment_ms,
+            max_parallel_requests=max_parallel_requests,
+            on_segment=on_segment,
+        )
+
+    # Short recordings are sent as they were uploaded, in a single request.
+    source.seek(0)
+    transcription = client.audio.transcriptions.create(model=model, file=(filename, source.read()))
+    segment = {"start": 0.0, "end": len(audio) / 1000, "text": transcription.text.strip()}
+    if on_segment:
+        on_segment(0, 1, segment)
+    return [segment]
+
+def join_segments(segments: list[dict]) -> str:
+    """
+    Joins transcribed segments into one text, prefixing each with its start time
+    when there is more than one.
+    """
+    if len(segments) == 1:
+        return segments[0]["text"]
+    return "\n".join(f"[{format_timestamp(s['start'])}] {s['text']}" for s in segments)
+
+def format_timestamp(seconds: float) -> str:
+    """
+    Formats a number of seconds as HH:MM:SS.
+    """
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
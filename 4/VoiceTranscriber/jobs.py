@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import uuid
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from audio_chunking import transcribe_recording, join_segments
+from transcript_cache import audio_cache_key
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the pending queue is full."""
+
+
+class TranscriptionJobManager:
+    """
+    Runs transcriptions in the background so HTTP requests never wait for them.
+
+    Every job lives in its own folder under jobs_dir: the uploaded audio (deleted
+    once the job finishes) and a status.json file that is rewritten atomically as
+    segments complete. A fixed number of worker threads take jobs from a bounded
+    queue, and a cleanup thread removes finished jobs older than ttl_seconds.
+    When a TranscriptCache is given, recordings already transcribed with the same
+    model complete immediately, without being queued.
+
+    Several processes may share jobs_dir (multiple server workers, or the debug
+    reloader): each job records the manager that owns it (a random id, plus the
+    pid and start time of its process), and on start a manager fails every queued
+    or running job whose owning process is not provably still running. A bare pid
+    would not do: a restarted server often gets the same one (always 1 as a
+    container entrypoint), or another process takes it over.
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str,
+        jobs_dir: str = "jobs",
+        num_workers: int = 2,
+        max_pending_jobs: int = 32,
+        ttl_seconds: int = 24 * 60 * 60,
+        cleanup_interval_seconds: int = 10 * 60,
+        long_audio_ms: int = 8 * 60 * 1000,
+        segment_ms: int = 5 * 60 * 1000,
+        max_parallel_requests: int = 4,
+        cache=None,
+    ):
+        self.client = client
+        self.model = model
+        self.jobs_dir = jobs_dir
+        self.ttl_seconds = ttl_seconds
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self.long_audio_ms = long_audio_ms
+        self.segment_ms = segment_ms
+        self.max_parallel_requests = max_parallel_requests
+        self.cache = cache
+        self.pending = queue.Queue()
+        # A slot is reserved before an upload is written to disk and freed once a worker takes the job
+        self.pending_slots = threading.BoundedSemaphore(max_pending_jobs)
+        self.lock = threading.Lock()
+        self.owner = {"instance": uuid.uuid4().hex, "pid": os.getpid(), "started": self._process_start_time(os.getpid())}
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._fail_interrupted_jobs()
+
+        for i in range(num_workers):
+            threading.Thread(target=self._worker, name=f"transcription-worker-{i}", daemon=True).start()
+        threading.Thread(target=self._cleanup_loop, name="transcription-cleanup", daemon=True).start()
+
+    def submit(self, file) -> str:
+        """
+        Stores an uploaded file and queues it for transcription.
+
+        Args:
+            file: A Werkzeug FileStorage from request.files.
+
+        Returns:
+            The new job id.
+
+        Raises:
+            QueueFullError: If max_pending_jobs jobs are already waiting.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        now = time.time()
+        status = {
+            "id": job_id,
+            "owner": self.owner,
+            "status": "queued",
+            "filename": file.filename,
+            "created_at": now,
+            "updated_at": now,
+            "progress": {"completed": 0, "total": None},
+            "segments": [],
+            "transcription": None,
+            "error": None,
+        }
+
+        cache_key = audio_cache_key(file, self.model) if self.cache else None
+        cached_result = self.cache.get(cache_key) if self.cache else None
+        if cached_result:
+            os.makedirs(job_dir)
+            segments = cached_result["segments"]
+            status.update(
+                status="done",
+                progress={"completed": len(segments), "total": len(segments)},
+                segments=segments,
+                transcription=cached_result["transcription"],
+                cached=True,
+            )
+            self._write_status(job_id, status)
+            return job_id
+
+        # Rejected before anything is written, so an overloaded server does not store uploads it drops.
+        if not self.pending_slots.acquire(blocking=False):
+            raise QueueFullError("Too many transcription jobs are waiting. Please try again later.")
+        try:
+            os.makedirs(job_dir)
+            # The extension is kept because it tells the API the audio format.
+            audio_path = os.path.join(job_dir, "audio" + os.path.splitext(file.filename)[1].lower())
+            # FileStorage.save copies the upload in chunks, so large files are never held in memory.
+            file.save(audio_path)
+            self._write_status(job_id, status)
+        except Exception:
+            self.pending_slots.release()
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        self.pending.put((job_id, audio_path, file.filename, cache_key))
+        return job_id
+
+    def get(self, job_id: str):
+        """
+        Returns the current status of a job, or None if it does not exist (or expired).
+        """
+        # Job ids are generated by uuid4().hex; anything else cannot be a job folder.
+        if len(job_id) != 32 or not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            with open(os.path.join(self._job_dir(job_id), "status.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _write_status(self, job_id: str, status: dict) -> None:
+        path = os.path.join(self._job_dir(job_id), "status.json")
+        # Write to a temporary file first so that pollers never read a partial file.
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(status, f)
+        os.replace(tmp_path, path)
+
+    def _update_status(self, job_id: str, **changes) -> dict:
+        with self.lock:
+            status = self.get(job_id)
+            status.update(changes, updated_at=time.time())
+            self._write_status(job_id, status)
+            return status
+
+    @contextmanager
+    def _jobs_dir_lock(self):
+        """Serializes the start-up sweep between processes sharing jobs_dir (no-op without fcntl)."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.jobs_dir, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _process_start_time(pid: int):
+        """The start time of a process, in clock ticks since boot (Linux only), or None."""
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                # The command name in parentheses may contain spaces; field 22 is the start time
+                return f.read().rsplit(")", 1)[1].split()[19]
+        except (OSError, IndexError):
+            return None
+
+    def _owner_alive(self, owner) -> bool:
+        """Whether the process of a job's owner is still the one that wrote it."""
+        if not isinstance(owner, dict):
+            # Jobs written before owners were recorded
+            return False
+        if owner.get("instance") == self.owner["instance"]:
+            return True
+        # Without a start time the pid alone proves nothing, so the job is failed.
+        started = owner.get("started")
+        return started is not None and self._process_start_time(owner.get("pid")) == started
+
+    def _fail_interrupted_jobs(self) -> None:
+        # Jobs that were queued or running in a process that has since stopped will never finish.
+        with self._jobs_dir_lock():
+            for job_id in os.listdir(self.jobs_dir):
+                status = self.get(job_id)
+                if status and status["status"] in ("queued", "running") and not self._owner_alive(status.get("owner")):
+                    self._fail_interrupted_job(job_id)
+
+    def _fail_interrupted_job(self, job_id: str) -> None:
+        for name in os.listdir(self._job_dir(job_id)):
+            if name.startswith("audio"):
+                os.remove(os.path.join(self._job_dir(job_id), name))
+        self._update_status(job_id, status="failed", error="The server restarted before the job finished.")
+
+    def _worker(self) -> None:
+        while True:
+            job_id, audio_path, filename, cache_key = self.pending.get()
+            self.pending_slots.release()
+            try:
+                self._run(job_id, audio_path, filename, cache_key)
+            finally:
+                self.pending.task_done()
+
+    def _run(self, job_id: str, audio_path: str, filename: str, cache_key: str) -> None:
+        self._update_status(job_id, status="running")
+        segments = []
+
+        def on_segment(index: int, total: int, segment: dict) -> None:
+            # Segments complete out of order; the partial transcript is kept sorted by time.
+            segments.append(segment)
+            segments.sort(key=lambda s: s["start"])
+            self._update_status(
+                job_id,
+                progress={"completed": len(segments), "total": total},
+                segments=list(segments),
+            )
+
+        try:
+            with open(audio_path, "rb") as source:
+                result = transcribe_recording(
+                    self.client,
+                    self.model,
+                    source,
+                    filename,
+                    long_audio_ms=self.long_audio_ms,
+                    segment_ms=self.segment_ms,
+                    max_parallel_requests=self.max_parallel_requests,
+                    on_segment=on_segment,
+                )
+            transcription = join_segments(result)
+            if self.cache:
+                self.cache.set(cache_key, {"segments": result, "transcription": transcription})
+            self._update_status(job_id, status="done", segments=result, transcription=transcription)
+            print(f"Job {job_id}: transcription of {len(result)} segment(s) finished.")
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self._update_status(job_id, status="failed", error=str(e))
+        finally:
+            # Only the result is kept on disk once the job is over.
+            os.remove(audio_path)
+
+    def _cleanup_loop(self) -> None:
+        while True:
+            time.sleep(self.cleanup_interval_seconds)
+            try:
+                self.cleanup()
+            except Exception as e:
+                print(f"Job cleanup failed: {e}")
+
+    def cleanup(self) -> int:
+        """
+        Deletes finished jobs whose last update is older than ttl_seconds.
+
+        Returns:
+            The number of jobs removed.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for job_id in os.listdir(self.jobs_dir):
+            status = self.get(job_id)
+            if status and status["status"] in ("done", "failed") and status["updated_at"] < cutoff:
+                shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+                removed += 1
+        return removed
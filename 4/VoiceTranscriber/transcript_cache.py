@@ -0,0 +1,149 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Request
+from werkzeug.formparser import default_stream_factory
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class HashingStream:
+    """
+    Wraps the file Werkzeug spools an upload into and computes the SHA-256 of
+    every byte written to it, so the hash is ready as soon as the upload is received.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self._stream.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __iter__(self):
+        return iter(self._stream)
+
+
+class HashingRequest(Request):
+    """
+    A Flask request whose uploaded files are hashed while they are being received.
+    Install it with app.request_class = HashingRequest.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingStream(default_stream_factory(total_content_length, content_type, filename, content_length))
+
+
+def audio_cache_key(file, model: str) -> str:
+    """
+    Returns the cache key of an uploaded file: the SHA-256 of its bytes combined
+    with the transcription model.
+
+    Uploads received through HashingRequest are already hashed; anything else is
+    read once, in chunks, and rewound.
+    """
+    if isinstance(file.stream, HashingStream):
+        audio_digest = file.stream.sha256.hexdigest()
+    else:
+        sha256 = hashlib.sha256()
+        for chunk in iter(lambda: file.stream.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+        file.stream.seek(0)
+        audio_digest = sha256.hexdigest()
+    return hashlib.sha256(f"{audio_digest}\0{model}".encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """
+    Thread-safe on-disk cache of transcription results, stored as <key>.json.
+
+    The total size of the files is kept under max_bytes by evicting the least
+    recently used entries. Entries already on disk are picked up at startup,
+    ordered by their modification time, which is refreshed on every hit.
+    """
+
+    def __init__(self, directory: str = "transcript_cache", max_bytes: int = 100 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.sizes = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self.sizes[key] = size
+            self.total_bytes += size
+        with self.lock:
+            self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        """Returns the stored result for a key, or None. Counts a hit or a miss."""
+        with self.lock:
+            if key not in self.sizes:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    result = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.total_bytes -= self.sizes.pop(key)
+                self.misses += 1
+                return None
+            self.sizes.move_to_end(key)
+            os.utime(self._path(key))
+            self.hits += 1
+            return result
+
+    def set(self, key: str, result: dict) -> None:
+        """Stores a result under a key, evicting old entries if the cache is full."""
+        data = json.dumps(result).encode("utf-8")
+        path = self._path(key)
+        # Write to a temporary file first so that readers never see a partial file.
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self.lock:
+            os.replace(tmp_path, path)
+            self.total_bytes += len(data) - self.sizes.pop(key, 0)
+            self.sizes[key] = len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        # The entry just stored is kept even if it alone is larger than max_bytes.
+        while self.total_bytes > self.max_bytes and len(self.sizes) > 1:
+            key, size = self.sizes.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        """Returns the hit and miss counts since startup, the hit rate and the cache size."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.sizes),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,293 @@
+import os
+import csv
+import json
+import time
+import asyncio
+import sys
+import hashlib
+
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+from prompts import QUESTION, SOURCE_REQUEST, SOURCE_VALIDATION
+from local_verification import ReferenceCorpus, verify_locally
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.prompt_layout import build_messages
+
+# The three steps of the verification chain, in order
+STEPS = ("answer", "sources", "validation")
+
+
+def question_id(question: str) -> str:
+    """
+    Derives a stable id from the question text, used when the input has no id column.
+    """
+    return hashlib.sha256(question.strip().encode("utf-8")).hexdigest()[:16]
+
+def read_questions(path: str) -> list[dict]:
+    """
+    Reads the questions to verify from a CSV file (with a "question" column and an
+    optional "id" column) or from a JSONL file (one {"question": ..., "id": ...} per line).
+
+    Returns:
+        A list of {"id": ..., "question": ...} dictionaries, in file order.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    questions = []
+    for row in rows:
+        question = (row.get("question") or "").strip()
+        if question:
+            questions.append({"id": str(row.get("id") or question_id(question)), "question": question})
+    return questions
+
+def verdict_of(validation_result: str) -> str:
+    """
+    Maps the free-text output of the SOURCE_VALIDATION prompt to a short verdict.
+    """
+    text = validation_result.strip().lower()
+    if text.startswith("source hallucination"):
+        return "source_hallucination"
+    if text.startswith("answer hallucination"):
+        return "answer_hallucination"
+    if text.startswith("verified"):
+        return "verified"
+    return "unknown"
+
+
+class RateLimiter:
+    """
+    Spaces out requests so that, across every concurrent task, no more than
+    requests_per_minute calls are started per minute.
+    """
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60 / requests_per_minute
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class Checkpoint:
+    """
+    An append-only JSONL log of every completed step: {"id", "step", "value"}.
+
+    Each line is flushed as soon as the step finishes, so after a crash the log
+    holds everything that was paid for and a new run only repeats unfinished steps.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a crash; that step will simply run again.
+                        continue
+                    self.state.setdefault(record["id"], {})[record["step"]] = record["value"]
+        self.file = open(path, "a", encoding="utf-8")
+
+    def get(self, item_id: str) -> dict:
+        return self.state.setdefault(item_id, {})
+
+    def record(self, item_id: str, step: str, value: str) -> None:
+        self.get(item_id)[step] = value
+        self.file.write(json.dumps({"id": item_id, "step": step, "value": value}, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def complete(client: AsyncOpenAI, limiter: RateLimiter, model: str, messages: list[dict]) -> str:
+    """
+    Sends one conversation through the rate limiter and returns the stripped answer.
+    """
+    await limiter.acquire()
+    response = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+    )
+    return response.choices[0].message.content.strip()
+
+async def verify_question(client, limiter, checkpoint, model: str, item: dict, stats: dict, corpus=None) -> None:
+    """
+    Runs the three-step chain for one question, skipping the steps already in the checkpoint.
+    When a reference corpus is given, the validation step is first attempted locally
+    and the LLM is only asked when the corpus cannot decide.
+    """
+    state = checkpoint.get(item["id"])
+    question = item["question"]
+
+    if "answer" not in state:
+        answer = await complete(client, limiter, model, build_messages(QUESTION, question_input=question))
+        checkpoint.record(item["id"], "answer", answer)
+        stats["calls"] += 1
+
+    if "sources" not in state:
+        sources = await complete(
+            client, limiter, model,
+            build_messages(SOURCE_REQUEST, question_input=question, llm_answer=state["answer"]),
+        )
+        checkpoint.record(item["id"], "sources", sources)
+        stats["calls"] += 1
+
+    if "validation" not in state and corpus is not None:
+        validation = verify_locally(state["answer"], state["sources"], corpus)
+        if validation is not None:
+            checkpoint.record(item["id"], "validation_method", "local")
+            checkpoint.record(item["id"], "validation", validation)
+
+    if "validation" not in state:
+        validation = await complete(
+            client, limiter, model,
+            build_messages(SOURCE_VALIDATION, llm_answer=state["answer"], sources=state["sources"]),
+        )
+        checkpoint.record(item["id"], "validation_method", "llm")
+        checkpoint.record(item["id"], "validation", validation)
+        stats["calls"] += 1
+
+async def run_batch(
+    client: AsyncOpenAI,
+    questions: list[dict],
+    checkpoint: Checkpoint,
+    model: str = "gpt-4o-mini",
+    max_concurrency: int = 20,
+    requests_per_minute: int = 500,
+    corpus: ReferenceCorpus = None,
+) -> dict:
+    """
+    Verifies many questions concurrently.
+
+    max_concurrency workers each take the next unfinished question and run its
+    chain; all of them share one RateLimiter. A question that fails is reported
+    and left unfinished in the checkpoint, so the next run retries it. See
+    verify_question for the optional reference corpus.
+
+    Returns:
+        Statistics: total, already done before this run, completed, failed, LLM calls and elapsed seconds.
+    """
+    limiter = RateLimiter(requests_per_minute)
+    pending = [item for item in questions if not all(step in checkpoint.get(item["id"]) for step in STEPS)]
+    stats = {
+        "total": len(questions),
+        "resumed": len(questions) - len(pending),
+        "completed": 0,
+        "failed": 0,
+        "calls": 0,
+    }
+    queue = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+
+    async def worker():
+        while not queue.empty():
+            item = queue.get_nowait()
+            try:
+                await verify_question(client, limiter, checkpoint, model, item, stats, corpus)
+                stats["completed"] += 1
+            except Exception as e:
+                print(f"❌ Question {item['id']} failed: {e}")
+                stats["failed"] += 1
+            done = stats["completed"] + stats["failed"]
+            if done % 50 == 0:
+                print(f"... {done}/{len(pending)} questions processed")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(max_concurrency, len(pending)) or 1)))
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+def write_results(path: str, questions: list[dict], checkpoint: Checkpoint) -> None:
+    """
+    Writes one row per question, in input order, to a CSV or JSONL file
+    (chosen by the file extension). Unfinished steps are left empty.
+    """
+    rows = []
+    for item in questions:
+        state = checkpoint.get(item["id"])
+        rows.append({
+            "id": item["id"],
+            "question": item["question"],
+            "answer": state.get("answer", ""),
+            "sources": state.get("sources", ""),
+            "validation": state.get("validation", ""),
+            "verdict": verdict_of(state["validation"]) if "validation" in state else "",
+            "validation_method": state.get("validation_method", ""),
+        })
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["id"])
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+def main(input_path: str, output_path: str, checkpoint_path: str, model: str, max_concurrency: int, requests_per_minute: int, corpus_path: str = None, coverage_path: str = None):
+    """
+    Verifies every question of a CSV/JSONL file and writes the results file.
+    """
+    load_dotenv()
+
+    api_key = os.getenv(key="OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found. Please set it in your .env file.")
+    # The client retries rate-limit and server errors itself, with exponential backoff.
+    client = AsyncOpenAI(api_key=api_key, max_retries=5)
+
+    questions = read_questions(input_path)
+    corpus = ReferenceCorpus.from_jsonl(corpus_path, coverage_path) if corpus_path and os.path.exists(corpus_path) else None
+    checkpoint = Checkpoint(checkpoint_path)
+    print(f"--- Verifying {len(questions)} questions with up to {max_concurrency} concurrent chains ---")
+    try:
+        stats = asyncio.run(run_batch(client, questions, checkpoint, model, max_concurrency, requests_per_minute, corpus))
+        write_results(output_path, questions, checkpoint)
+    finally:
+        checkpoint.close()
+
+    verdicts = {}
+    validated = resolved_locally = 0
+    for item in questions:
+        state = checkpoint.get(item["id"])
+        if "validation" in state:
+            verdicts[verdict_of(state["validation"])] = verdicts.get(verdict_of(state["validation"]), 0) + 1
+            validated += 1
+            resolved_locally += state.get("validation_method") == "local"
+
+    elapsed = stats["elapsed"]
+    print("--- BATCH RESULT ---")
+    print(f"📄 Results written to {output_path}")
+    print(f"Questions: {stats['total']} ({stats['resumed']} already done, {stats['completed']} completed, {stats['failed']} failed)")
+    print(f"Verdicts: {verdicts}")
+    if validated:
+        print(f"Resolved locally: {resolved_locally}/{validated} ({resolved_locally / validated:.0%}), without a validation LLM call")
+    if elapsed > 0:
+        print(f"⏱️ {elapsed:.1f}s, {stats['completed'] / elapsed * 60:.1f} questions/min, {stats['calls'] / elapsed:.2f} LLM calls/s")
+    print("--------------------")
+
+if __name__ == "__main__":
+    INPUT_FILE = "data/questions.jsonl"  # .csv with a "question" column also works
+    OUTPUT_FILE = "results.jsonl"  # .csv or .jsonl
+    CHECKPOINT_FILE = "checkpoint.jsonl"  # Delete it to start over
+    MODEL = "gpt-4o-mini"
+    MAX_CONCURRENCY = 20
+    REQUESTS_PER_MINUTE = 500
+    REFERENCE_CORPUS_FILE = "data/reference_corpus.jsonl"  # Set to None to always validate with the LLM
+    REFERENCE_COVERAGE_FILE = "data/reference_coverage.json"  # Optional JSON list of sites the corpus holds completely
+    main(INPUT_FILE, OUTPUT_FILE, CHECKPOINT_FILE, MODEL, MAX_CONCURRENCY, REQUESTS_PER_MINUTE, REFERENCE_CORPUS_FILE, REFERENCE_COVERAGE_FILE)
@@ -0,0 +1,226 @@
+import os
+import re
+import json
+from difflib import SequenceMatcher
+from urllib.parse import urlsplit
+
+URL_PATTERN = re.compile(r"https?://[^\s<>\"'\)\]]+")
+MARKDOWN_LINK_PATTERN = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+LIST_ITEM_PATTERN = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s+(.*\S)")
+QUOTED_TITLE_PATTERN = re.compile(r"[\"“*_]([^\"”*_]{4,})[\"”*_]")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SEGMENT_SEPARATOR_PATTERN = re.compile(r"\s*(?:[.,;:|()\[\]]|\s[-–—]\s)\s*")
+NUMBER_PATTERN = re.compile(r"\b\d[\d,]*(?:\.\d+)?\b")
+SENTENCE_START_PATTERN = re.compile(r"(?:^|[.!?:;]\s*|\n\s*|[\"“(]\s*)$")
+NAME_PATTERN = re.compile(r"\b[A-Z][\w'’-]+(?:\s+(?:(?:de|da|van|von|of|the)\s+)?[A-Z][\w'’-]+)*")
+
+# Capitalised words that are not worth checking on their own
+NAME_STOP_WORDS = {
+    "The", "A", "An", "In", "On", "At", "It", "He", "She", "They", "This", "That",
+    "January", "February", "March", "April", "May", "June", "July", "August",
+    "September", "October", "November", "December",
+}
+
+TITLE_MATCH_THRESHOLD = 0.85
+FACT_MATCH_THRESHOLD = 0.9
+
+
+def normalize_url(url: str) -> str:
+    """
+    Reduces a URL to host + path, so that http/https, "www.", fragments, query
+    strings and trailing slashes do not prevent a match.
+    """
+    parts = urlsplit(url.strip().rstrip(".,;"))
+    host = parts.netloc.lower().removeprefix("www.")
+    return f"{host}{parts.path.rstrip('/')}"
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+def parse_sources(sources: str) -> list[dict]:
+    """
+    Splits the output of the SOURCE_REQUEST prompt into individual citations.
+
+    Returns:
+        One {"text", "url", "title"} dictionary per list item (or per non-empty
+        line when the output is not a list). url and title are None when missing.
+    """
+    lines = [line for line in sources.splitlines() if line.strip()]
+    items = [m.group(1) for m in map(LIST_ITEM_PATTERN.match, lines) if m] or [line.strip() for line in lines]
+
+    citations = []
+    for item in items:
+        link = MARKDOWN_LINK_PATTERN.search(item)
+        url_match = URL_PATTERN.search(item)
+        url = link.group(2) if link else url_match.group(0) if url_match else None
+        title_match = QUOTED_TITLE_PATTERN.search(item)
+        if link:
+            title = link.group(1)
+        elif title_match:
+            title = title_match.group(1)
+        else:
+            title = URL_PATTERN.sub("", item).strip(" -:.,") or None
+        citations.append({"text": item, "url": url, "title": title})
+    return citations
+
+def extract_facts(answer: str) -> tuple[list[str], list[str]]:
+    """
+    Pulls the checkable facts out of an answer: numbers (years, dates, counts)
+    and proper names.
+
+    Returns:
+        (facts, uncertain): a single capitalised word that starts a sentence
+        ("Although", "Apollo") may be an ordinary word, so it goes to uncertain
+        instead; multi-word names and names inside a sentence are facts.
+    """
+    facts = [number.replace(",", "") for number in NUMBER_PATTERN.findall(answer)]
+    uncertain = []
+    for match in NAME_PATTERN.finditer(answer):
+        words = [word for word in match.group(0).split() if word not in NAME_STOP_WORDS]
+        if not words:
+            continue
+        name = " ".join(words)
+        sentence_initial = SENTENCE_START_PATTERN.search(answer, 0, match.start()) is not None
+        if len(words) == 1 and sentence_initial and match.group(0).split()[0] == words[0]:
+            uncertain.append(name)
+        else:
+            facts.append(name)
+    # Keep the order, drop duplicates.
+    facts = list(dict.fromkeys(facts))
+    return facts, [word for word in dict.fromkeys(uncertain) if word not in facts]
+
+
+class ReferenceCorpus:
+    """
+    An offline snapshot of reference pages, loaded from a JSONL file with one
+    {"url", "title", "text"} document per line.
+
+    Documents are indexed by normalised URL and by an inverted index of the
+    tokens of their title and text. A cited URL that is not in the snapshot is
+    unknown (left to the LLM), unless its site is listed in complete_sites, the
+    coverage manifest of sites the snapshot holds every page of; only then is
+    it treated as fabricated.
+    """
+
+    def __init__(self, documents: list[dict], complete_sites: list[str] = ()):
+        self.documents = documents
+        self.by_url = {}
+        self.index = {}
+        self.complete_sites = {normalize_url(f"//{site}" if "//" not in site else site) for site in complete_sites}
+        for i, doc in enumerate(documents):
+            doc["normalized_text"] = " ".join(tokenize(doc["text"].replace(",", "")))
+            if doc.get("url"):
+                self.by_url[normalize_url(doc["url"])] = doc
+            for token in set(tokenize(f"{doc.get('title', '')} {doc['text']}")):
+                self.index.setdefault(token, set()).add(i)
+
+    @classmethod
+    def from_jsonl(cls, path: str, coverage_path: str = None) -> "ReferenceCorpus":
+        """
+        Loads the snapshot, and the coverage manifest (a JSON list of sites such
+        as ["nasa.gov"]) from coverage_path, if given and present.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            documents = [json.loads(line) for line in f if line.strip()]
+        complete_sites = []
+        if coverage_path and os.path.exists(coverage_path):
+            with open(coverage_path, "r", encoding="utf-8") as f:
+                complete_sites = json.load(f)
+        return cls(documents, complete_sites)
+
+    def candidates(self, text: str, limit: int = 5) -> list[dict]:
+        """
+        Returns the documents sharing the most tokens with the text, best first.
+        """
+        counts = {}
+        for token in set(tokenize(text)):
+            for i in self.index.get(token, ()):
+                counts[i] = counts.get(i, 0) + 1
+        best = sorted(counts, key=counts.get, reverse=True)[:limit]
+        return [self.documents[i] for i in best]
+
+    def find(self, citation: dict):
+        """
+        Looks a citation up in the snapshot.
+
+        Returns:
+            ("found", document), ("missing", None) when the cited URL belongs to a
+            site listed as complete but the page is not in the snapshot, or
+            ("unknown", None).
+        """
+        if citation["url"]:
+            url = normalize_url(citation["url"])
+            if url in self.by_url:
+                return "found", self.by_url[url]
+            if url.split("/", 1)[0] in self.complete_sites:
+                return "missing", None
+
+        if citation["title"]:
+            # Unquoted citations mix the title with authors, publishers and dates,
+            # so each separated segment is also compared with the document titles.
+            title = citation["title"].lower()
+            segments = [title] + [s for s in SEGMENT_SEPARATOR_PATTERN.split(title) if s]
+            for doc in self.candidates(citation["title"]):
+                doc_title = doc.get("title", "").lower()
+                if any(SequenceMatcher(None, segment, doc_title).ratio() >= TITLE_MATCH_THRESHOLD for segment in segments):
+                    return "found", doc
+        return "unknown", None
+
+
+def fact_is_supported(fact: str, documents: list[dict]) -> bool:
+    """
+    Checks whether a fact appears in any of the documents. Numbers must appear
+    exactly. Names are supported when every one of their words appears in the
+    same document, allowing a small spelling difference ("Yuri Gagarin" matches
+    "Yuri Alekseyevich Gagarin", "Flemming" matches "Fleming").
+    """
+    fact_words = tokenize(fact)
+    if not fact_words:
+        return True
+    normalized_fact = " ".join(fact_words)
+    for doc in documents:
+        text = doc["normalized_text"]
+        if f" {normalized_fact} " in f" {text} ":
+            return True
+        if normalized_fact.isdigit():
+            continue
+        doc_words = set(text.split())
+        if all(
+            word in doc_words
+            or any(SequenceMatcher(None, word, doc_word).ratio() >= FACT_MATCH_THRESHOLD for doc_word in doc_words)
+            for word in fact_words
+        ):
+            return True
+    return False
+
+def verify_locally(answer: str, sources: str, corpus: ReferenceCorpus):
+    """
+    Tries to settle the SOURCE_VALIDATION step against the offline corpus, without an LLM.
+
+    Returns:
+        A result in the same format as the SOURCE_VALIDATION prompt ("Verified",
+        "Source Hallucination Detected: ..." or "Answer Hallucination Detected: ..."),
+        or None when the corpus cannot decide and the LLM validation is needed.
+    """
+    citations = parse_sources(sources)
+    if not citations:
+        return None
+
+    documents = []
+    for citation in citations:
+        status, doc = corpus.find(citation)
+        if status == "missing":
+            return f"Source Hallucination Detected: {citation['text']} (not found in the reference snapshot of {normalize_url(citation['url']).split('/', 1)[0]})"
+        if status == "unknown":
+            # A single source outside the snapshot is enough to need the LLM.
+            return None
+        documents.append(doc)
+
+    facts, uncertain = extract_facts(answer)
+    for fact in facts:
+        if not fact_is_supported(fact, documents):
+            return f'Answer Hallucination Detected: "{fact}"'
+    if not all(fact_is_supported(word, documents) for word in uncertain):
+        # Possibly just a capitalised word starting a sentence: the LLM decides.
+        return None
+    return "Verified"
@@ -1,8 +1,14 @@
 import os
+import sys
 from openai import OpenAI
 from dotenv import load_dotenv
 # Imports the three prompts from your prompts.py file
 from prompts import QUESTION, SOURCE_REQUEST, SOURCE_VALIDATION
+from local_verification import ReferenceCorpus, verify_locally
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+# Splits each prompt into a static system message and a variable user message
+from shared.prompt_layout import build_messages
 
 def main():
     """
@@ -22,14 +28,14 @@ def main():
 
     print("--- Step 1: Asking the initial question ---")
     # Format the prompt with the actual question content
-    question_prompt = QUESTION.format(question_input=question_content)
+    question_messages = build_messages(QUESTION, question_input=question_content)
     print(f"Question being asked: '{question_content}'\n")
 
     # 1. Send the initial question to the API
     try:
         initial_response = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": question_prompt}],
+            messages=question_messages,
         )
         llm_answer = initial_response.choices[0].message.content.strip()
         print(f"✅ Initial Answer from LLM: '{llm_answer}'\n")
@@ -42,13 +48,13 @@ def main():
     print("--- Step 2: Requesting sources for the answer ---")
     
     # 2. Format the source request prompt with the question and the LLM's answer
-    source_request_prompt = SOURCE_REQUEST.format(question_input=question_content, llm_answer=llm_answer)
+    source_request_messages = build_messages(SOURCE_REQUEST, question_input=question_content, llm_answer=llm_answer)
     
     # Send the source request to the API
     try:
         source_response = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": source_request_prompt}],
+            messages=source_request_messages,
         )
         sources = source_response.choices[0].message.content.strip()
         print(f"✅ Sources from LLM: \n{sources}\n")
@@ -60,14 +66,25 @@ def main():
     # ---
     print("--- Step 3: Verifying the answer against the provided sources ---")
 
+    # 3a. Try to settle the verification against the offline reference corpus first
+    if REFERENCE_CORPUS_FILE and os.path.exists(REFERENCE_CORPUS_FILE):
+        corpus = ReferenceCorpus.from_jsonl(REFERENCE_CORPUS_FILE, REFERENCE_COVERAGE_FILE)
+        validation_result = verify_locally(llm_answer, sources, corpus)
+        if validation_result is not None:
+            print("--- FINAL VERIFICATION RESULT (reference corpus, no LLM call) ---")
+            print(f"📊 Result: {validation_result}")
+            print("---------------------------------")
+            return
+        print("ℹ️ The reference corpus could not settle it. Falling back to the LLM.\n")
+
     # 3. Format the validation prompt with the answer and the sources
-    validation_prompt = SOURCE_VALIDATION.format(llm_answer=llm_answer, sources=sources)
+    validation_messages = build_messages(SOURCE_VALIDATION, llm_answer=llm_answer, sources=sources)
     
     # Send the validation request to the API
     try:
         validation_response = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": validation_prompt}],
+            messages=validation_messages,
         )
         validation_result = validation_response.choices[0].message.content.strip()
         
@@ -81,5 +98,7 @@ def main():
 
 if __name__ == "__main__":
     PRECISE_ANSWER = "Who was the first person to go to space, and in what year did it happen?"
+    REFERENCE_CORPUS_FILE = "data/reference_corpus.jsonl"  # Set to None to always validate with the LLM
+    REFERENCE_COVERAGE_FILE = "data/reference_coverage.json"  # Optional JSON list of sites the corpus holds completely
     HALLUCINATED_ANSWER = "What song was the New York City radio station WABC playing at the exact moment the city-wide blackout began on the evening of July 13, 1977?"
     main()
\ No newline at end of file
@@ -0,0 +1,432 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+
+import openai
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+from prompt import INVOICE_PARSING_PROMPT, HINTED_INVOICE_PARSING_PROMPT, INVOICE_CORRECTION_PROMPT
+from preextract import pre_extract, format_hints
+from validation import complete_line_totals, find_arithmetic_problems
+from templates import TemplateStore
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.prompt_layout import build_messages
+
+SUPPORTED_EXTENSIONS = (".txt", ".pdf")
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# API errors worth retrying; anything else (bad request, authentication...) fails immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+class InvalidInvoiceError(Exception):
+    """Raised when the model's output is not valid JSON or does not follow the schema."""
+
+
+def iter_invoices(source: str):
+    """
+    Yields (invoice_id, loader) pairs, where loader() returns the invoice text.
+
+    source is either a directory, scanned recursively for .txt and .pdf files
+    (the id is the relative path), or "-" to read a stream of JSONL records
+    {"id": ..., "text": ...} from standard input.
+    """
+    if source == "-":
+        for line in sys.stdin:
+            if line.strip():
+                record = json.loads(line)
+                yield str(record["id"]), (lambda text=record["text"]: text)
+        return
+
+    for root, _, files in os.walk(source):
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, source), (lambda path=path: extract_text(path))
+
+def extract_text(path: str) -> str:
+    """
+    Returns the text of a .txt or .pdf invoice file.
+    """
+    if path.lower().endswith(".pdf"):
+        import fitz  # PyMuPDF, only needed for PDF invoices
+        with fitz.open(path) as doc:
+            return "".join(page.get_text() for page in doc)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+def validate_invoice(data) -> list[str]:
+    """
+    Checks a parsed invoice against the schema of INVOICE_PARSING_PROMPT.
+
+    Returns:
+        A list of problems; empty when the invoice is valid.
+    """
+    if not isinstance(data, dict):
+        return ["the output is not a JSON object"]
+
+    def is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    errors = []
+    for field in ("vendorName", "invoiceDate", "totalAmount", "lineItems"):
+        if field not in data:
+            errors.append(f"missing field '{field}'")
+    if data.get("vendorName") is not None and not isinstance(data["vendorName"], str):
+        errors.append("vendorName is not a string")
+    if data.get("invoiceDate") is not None and not DATE_PATTERN.match(str(data["invoiceDate"])):
+        errors.append(f"invoiceDate '{data['invoiceDate']}' is not YYYY-MM-DD")
+
+    total = data.get("totalAmount")
+    if total is not None:
+        if not isinstance(total, dict):
+            errors.append("totalAmount is not an object")
+        elif total.get("value") is not None and not is_number(total["value"]):
+            errors.append("totalAmount.value is not a number")
+
+    items = data.get("lineItems")
+    if items is not None and not isinstance(items, list):
+        errors.append("lineItems is not an array")
+    for i, item in enumerate(items if isinstance(items, list) else []):
+        if not isinstance(item, dict):
+            errors.append(f"lineItems[{i}] is not an object")
+            continue
+        for field in ("quantity", "unitPrice", "lineTotal"):
+            if item.get(field) is not None and not is_number(item[field]):
+                errors.append(f"lineItems[{i}].{field} is not a number")
+    return errors
+
+def build_prompt_messages(text: str, hints: dict = None) -> list[dict]:
+    """
+    Returns the messages of the full few-shot prompt, or of the much shorter
+    hinted prompt when pre-extracted hints are given. The static instructions
+    and examples are the system message, so every call shares the same prefix.
+    """
+    if hints is None:
+        return build_messages(INVOICE_PARSING_PROMPT, unstructured_invoice_text=text)
+    return build_messages(HINTED_INVOICE_PARSING_PROMPT, unstructured_invoice_text=text, hints=format_hints(hints))
+
+async def request_invoice(client: AsyncOpenAI, messages: list[dict], model: str, max_attempts: int = 5, base_delay: float = 1.0) -> dict:
+    """
+    Sends a parsing conversation, retrying with exponential backoff (plus jitter)
+    on transient API errors and on outputs that fail validation.
+
+    Raises:
+        InvalidInvoiceError: If the output is still invalid after max_attempts.
+        openai.OpenAIError: If the API keeps failing or fails with a non-retryable error.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                # Enforce JSON output for higher reliability
+                response_format={"type": "json_object"},
+            )
+            content = response.choices[0].message.content
+            try:
+                data = json.loads(content)
+            except json.JSONDecodeError as e:
+                raise InvalidInvoiceError(f"invalid JSON: {e}")
+            errors = validate_invoice(data)
+            if errors:
+                raise InvalidInvoiceError("; ".join(errors))
+            return data
+        except (InvalidInvoiceError, *RETRYABLE_ERRORS):
+            if attempt == max_attempts:
+                raise
+            await asyncio.sleep(base_delay * 2 ** (attempt - 1) * (1 + random.random()))
+
+async def parse_invoice(client: AsyncOpenAI, text: str, model: str, max_attempts: int = 5, hints: dict = None) -> dict:
+    """
+    Parses one invoice (see build_prompt_messages for the role of hints). With hints,
+    missing line totals are computed locally.
+    """
+    data = await request_invoice(client, build_prompt_messages(text, hints), model, max_attempts)
+    return complete_line_totals(data) if hints is not None else data
+
+async def reparse_invoice(client: AsyncOpenAI, text: str, hints: dict, previous: dict, problems: list[str], model: str, max_attempts: int = 5) -> dict:
+    """
+    Asks the model to correct a previous answer that failed the arithmetic checks,
+    continuing the same conversation with the list of failed checks.
+    """
+    messages = build_prompt_messages(text, hints) + [
+        {"role": "assistant", "content": json.dumps(previous)},
+        {"role": "user", "content": INVOICE_CORRECTION_PROMPT.format(problems="\n".join(f"- {p}" for p in problems))},
+    ]
+    return complete_line_totals(await request_invoice(client, messages, model, max_attempts))
+
+
+class Checkpoint:
+    """
+    The ids of the invoices already written, one per line. The result writers
+    add an id only once its record is on disk, so a crash never loses a result.
+    Failed invoices (API or extraction errors) are written but not added, so
+    the next run retries them.
+    """
+
+    def __init__(self, path: str):
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+        self.file = open(path, "a", encoding="utf-8")
+
+    def add(self, invoice_id: str) -> None:
+        self.done.add(invoice_id)
+        self.file.write(invoice_id + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class JsonlResultWriter:
+    """Appends one JSON record per line, flushing (and checkpointing) every record."""
+
+    def __init__(self, path: str, checkpoint: Checkpoint):
+        self.file = open(path, "a", encoding="utf-8")
+        self.checkpoint = checkpoint
+
+    def write(self, record: dict) -> None:
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        if record["status"] != "failed":
+            self.checkpoint.add(record["id"])
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """
+    Writes records to Parquet, rows_per_group records per file.
+
+    A Parquet file is only readable once its footer is written on close, and
+    cannot be appended to afterwards, so every flush writes and closes its own
+    part file next to the requested path (results.part-0001.parquet, ...).
+    The parsed invoice is stored as a JSON string column. Buffered records are
+    only checkpointed once their part file is closed.
+    """
+
+    def __init__(self, path: str, checkpoint: Checkpoint, rows_per_group: int = 100):
+        import pyarrow as pa  # Only needed for Parquet output
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        self.schema = pa.schema([
+            ("id", pa.string()),
+            ("status", pa.string()),
+            ("data", pa.string()),
+            ("error", pa.string()),
+            ("source", pa.string()),
+            ("elapsed_seconds", pa.float64()),
+        ])
+        self.stem = path[:-len(".parquet")]
+        self.part = 0
+        self.checkpoint = checkpoint
+        self.rows_per_group = rows_per_group
+        self.buffer = []
+
+    def write(self, record: dict) -> None:
+        self.buffer.append({**record, "data": json.dumps(record["data"], ensure_ascii=False) if record["data"] is not None else None})
+        if len(self.buffer) >= self.rows_per_group:
+            self.flush()
+
+    def next_part_path(self) -> str:
+        self.part += 1
+        while os.path.exists(f"{self.stem}.part-{self.part:04d}.parquet"):
+            self.part += 1
+        return f"{self.stem}.part-{self.part:04d}.parquet"
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.pq.write_table(self.pa.Table.from_pylist(self.buffer, schema=self.schema), self.next_part_path())
+            for record in self.buffer:
+                if record["status"] != "failed":
+                    self.checkpoint.add(record["id"])
+            self.buffer = []
+
+    def close(self) -> None:
+        self.flush()
+
+
+async def run_batch(
+    client: AsyncOpenAI,
+    invoices,
+    writer,
+    checkpoint: Checkpoint,
+    model: str = "gpt-4o-mini",
+    max_concurrency: int = 16,
+    max_attempts: int = 5,
+    validation_batch_size: int = 200,
+    templates: TemplateStore = None,
+) -> dict:
+    """
+    Parses a stream of invoices with at most max_concurrency requests in flight.
+
+    Invoices are pulled lazily from the iterable of (id, loader) pairs, so memory
+    use does not grow with the size of the batch. Each invoice is pre-extracted
+    with regexes and parsed with the hinted prompt. Parsed invoices are collected
+    and their arithmetic is checked validation_batch_size at a time with
+    validation.find_arithmetic_problems; only the failing ones are sent back to
+    the model, once, with the list of failed checks. Invoices that still fail are
+    written with the status "inconsistent" and their problems.
+
+    When a TemplateStore is given, invoices whose layout matches a learned vendor
+    template are parsed locally ("source": "template") and go through the same
+    checks; a template that produces a failing parse is dropped. Every LLM parse
+    that passes the checks on the first try is used to learn a template.
+
+    Returns:
+        Statistics: parsed, inconsistent, invalid, failed, skipped (already in
+        the checkpoint), reprompted, template hits and elapsed seconds.
+    """
+    stats = {"parsed": 0, "inconsistent": 0, "invalid": 0, "failed": 0, "skipped": 0, "reprompted": 0, "template_hits": 0}
+    semaphore = asyncio.Semaphore(max_concurrency)
+    pending_validation = []
+    invoices = iter(invoices)
+
+    def next_invoice():
+        for invoice_id, loader in invoices:
+            if invoice_id in checkpoint.done:
+                stats["skipped"] += 1
+                continue
+            return invoice_id, loader
+        return None
+
+    def write(record: dict) -> None:
+        stats[record["status"]] += 1
+        writer.write(record)
+        done = stats["parsed"] + stats["inconsistent"] + stats["invalid"] + stats["failed"]
+        if done % 100 == 0:
+            print(f"... {done} invoices processed")
+
+    async def validate_and_write(group: list[dict]) -> None:
+        # Problems are keyed by position in the list checked, since ids may repeat
+        remaining = {}
+        try:
+            problems = find_arithmetic_problems(group)
+
+            async def reprompt(invoice: dict, invoice_problems: list[str]) -> None:
+                try:
+                    async with semaphore:
+                        invoice["data"] = await reparse_invoice(
+                            client, invoice["text"], invoice["hints"], invoice["data"], invoice_problems, model, max_attempts
+                        )
+                except Exception as e:
+                    print(f"⚠️ Re-prompt failed for {invoice['id']}: {e}")
+
+            if templates:
+                for position, invoice in enumerate(group):
+                    if invoice["record"]["source"] == "llm" and position not in problems:
+                        templates.learn(invoice["text"], invoice["data"])
+                    elif invoice["record"]["source"] == "template" and position in problems:
+                        templates.forget(invoice["text"])
+                templates.save()
+            failing = sorted(problems)
+            stats["reprompted"] += len(failing)
+            await asyncio.gather(*(reprompt(group[position], problems[position]) for position in failing))
+            remaining = {failing[i]: found for i, found in find_arithmetic_problems([group[position] for position in failing]).items()}
+        except Exception as e:
+            # A bug or an odd parse in one group must not lose the whole group: write it unchecked
+            print(f"⚠️ Arithmetic checks failed for a group of {len(group)} invoices, written unchecked: {e}")
+
+        for position, invoice in enumerate(group):
+            record = invoice["record"]
+            record["data"] = invoice["data"]
+            if position in remaining:
+                record.update(status="inconsistent", error="; ".join(remaining[position]))
+            write(record)
+
+    async def worker():
+        nonlocal pending_validation
+        # Workers share the iterator; there is no await between two next() calls.
+        while (invoice := next_invoice()) is not None:
+            invoice_id, loader = invoice
+            start = time.perf_counter()
+            record = {"id": invoice_id, "status": "parsed", "data": None, "error": None, "source": "llm"}
+            try:
+                # PDF extraction is CPU-bound and blocking, so it runs in a thread.
+                text = await asyncio.to_thread(loader)
+                hints = pre_extract(text)
+                data = templates.parse(text) if templates else None
+                if data is not None:
+                    record["source"] = "template"
+                    stats["template_hits"] += 1
+                else:
+                    async with semaphore:
+                        data = await parse_invoice(client, text, model, max_attempts, hints)
+            except InvalidInvoiceError as e:
+                record.update(status="invalid", error=str(e))
+            except Exception as e:
+                record.update(status="failed", error=str(e))
+            record["elapsed_seconds"] = time.perf_counter() - start
+
+            if record["status"] != "parsed":
+                write(record)
+                continue
+            pending_validation.append({"id": invoice_id, "text": text, "hints": hints, "data": data, "record": record})
+            if len(pending_validation) >= validation_batch_size:
+                group, pending_validation = pending_validation, []
+                await validate_and_write(group)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max_concurrency)))
+    await validate_and_write(pending_validation)
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+def main(source: str, output_path: str, checkpoint_path: str, model: str, max_concurrency: int, templates_path: str = None):
+    """
+    Parses every invoice of a directory (or of a JSONL stream on stdin) and writes the results.
+    """
+    # Load environment variables from the .env file
+    load_dotenv()
+
+    api_key = os.getenv(key="OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found. Please set it in your .env file.")
+    # Retries are handled by request_invoice, so the client's own retries are disabled.
+    client = AsyncOpenAI(api_key=api_key, max_retries=0)
+
+    checkpoint = Checkpoint(checkpoint_path)
+    if output_path.endswith(".parquet"):
+        writer = ParquetResultWriter(output_path, checkpoint)
+    else:
+        writer = JsonlResultWriter(output_path, checkpoint)
+    templates = TemplateStore(templates_path) if templates_path else None
+    print(f"--- Parsing invoices from {source} with up to {max_concurrency} concurrent requests ---")
+    try:
+        stats = asyncio.run(run_batch(client, iter_invoices(source), writer, checkpoint, model, max_concurrency, templates=templates))
+    finally:
+        writer.close()
+        checkpoint.close()
+
+    processed = stats["parsed"] + stats["inconsistent"] + stats["invalid"] + stats["failed"]
+    print("\n--- Batch Result ---")
+    print(f"✅ Parsed: {stats['parsed']}   🧮 Inconsistent: {stats['inconsistent']}   ⚠️ Invalid: {stats['invalid']}   ❌ Failed: {stats['failed']}   ⏭️ Skipped (checkpoint): {stats['skipped']}")
+    print(f"🔁 Re-prompted after the arithmetic checks: {stats['reprompted']}")
+    if templates:
+        print(f"🧩 Vendor templates: {templates.hits}/{templates.lookups} hits ({templates.hit_rate():.0%}), {templates.learned} learned, {len(templates.templates)} stored")
+    if stats["elapsed"] > 0:
+        print(f"⏱️ {processed} invoices in {stats['elapsed']:.1f}s: {processed / stats['elapsed'] * 60:.1f} invoices/min")
+
+if __name__ == "__main__":
+    SOURCE = "invoices"  # A directory of .txt/.pdf files, or "-" for JSONL records on stdin
+    OUTPUT_FILE = "results.jsonl"  # .jsonl or .parquet (requires pyarrow)
+    CHECKPOINT_FILE = "checkpoint.txt"  # Delete it to start over
+    MODEL = "gpt-4o-mini"
+    MAX_CONCURRENCY = 16
+    TEMPLATES_FILE = "templates.json"  # Learned vendor templates; set to None to always use the LLM
+    main(SOURCE, OUTPUT_FILE, CHECKPOINT_FILE, MODEL, MAX_CONCURRENCY, TEMPLATES_FILE)
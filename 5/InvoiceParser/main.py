@@ -1,10 +1,14 @@
 import os
 import json
 from openai import OpenAI
+import sys
 from dotenv import load_dotenv
 # Assumes the prompt is saved in a file named prompt.py
 from prompt import INVOICE_PARSING_PROMPT
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.prompt_layout import build_messages
+
 def main():
     """
     Executes the invoice parsing process using the designed prompt.
@@ -43,14 +47,14 @@ def main():
     print("--- 1. Input: Unstructured Invoice Text ---")
     print(unstructured_text)
 
-    # Format the final prompt with the invoice text
-    final_prompt = INVOICE_PARSING_PROMPT.format(unstructured_invoice_text=unstructured_text)
+    # Static instructions as the system message, the invoice text as the user message
+    messages = build_messages(INVOICE_PARSING_PROMPT, unstructured_invoice_text=unstructured_text)
 
     print("\n--- 2. Sending Request to LLM ---")
     try:
         response = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": final_prompt}],
+            messages=messages,
             # Enforce JSON output for higher reliability
             response_format={"type": "json_object"},
         )
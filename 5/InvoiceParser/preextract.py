@@ -0,0 +1,165 @@
+import re
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# "July 21st, 2025", "Jul 21 2025"
+MONTH_NAME_DATE_PATTERN = re.compile(r"\b([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b")
+# "21 July 2025"
+DAY_MONTH_NAME_DATE_PATTERN = re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,9})\.?,?\s+(\d{4})\b")
+# "2025-07-13"
+ISO_DATE_PATTERN = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+# "14.07.2025", "15/07/2025", "07/15/2025" (dotted dates are day first; see normalize_date)
+NUMERIC_DATE_PATTERN = re.compile(r"\b(\d{1,2})([./])(\d{1,2})\2(\d{4})\b")
+
+CURRENCY_SYMBOLS = {"$": "$", "€": "EUR", "£": "GBP", "R$": "BRL"}
+CURRENCY_CODES = ("USD", "EUR", "GBP", "BRL", "CAD", "AUD", "JPY", "CHF")
+# "1,234.56", "1.234,56", "1234,56", "12.50"; to_number decides which separator is the decimal one
+AMOUNT = r"(\d{1,3}(?:[.,]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?)"
+AMOUNT_PATTERN = re.compile(
+    rf"(R\$|[$€£])\s?{AMOUNT}(?:\s?({'|'.join(CURRENCY_CODES)})\b)?"
+    rf"|\b{AMOUNT}\s?({'|'.join(CURRENCY_CODES)})\b"
+)
+
+SKU_PATTERN = re.compile(r"\bSKU\b[^A-Z0-9]{0,40}?([A-Z0-9]+(?:-[A-Z0-9]+)+|[A-Z0-9]{4,})")
+
+# Labelled amounts: "GRAND TOTAL: $2,150.50", "Total: $1,450.00", "VAT (18%): $328.00"
+GRAND_TOTAL_LABEL_PATTERN = re.compile(r"\b(?:grand\s+total|total\s+due|total\s+amount\s+due|amount\s+due)\b[^\n\d$€£]{0,15}", re.IGNORECASE)
+TOTAL_LABEL_PATTERN = re.compile(r"(?<![-\w])total\b[^\n\d$€£]{0,15}", re.IGNORECASE)
+SUBTOTAL_LABEL_PATTERN = re.compile(r"\bsub-?\s?total\b[^\n\d$€£]{0,5}", re.IGNORECASE)
+TAX_LABEL_PATTERN = re.compile(r"\b(?:vat|tax|gst|iva)\b\s*(?:\(?\s*(\d+(?:\.\d+)?)\s*%\s*\)?)?[^\n\d$€£]{0,5}", re.IGNORECASE)
+
+
+def to_number(text: str):
+    """
+    Converts an AMOUNT match to a float, whichever of "." and "," is the decimal
+    separator: "1,234.56" and "1.234,56" are both 1234.56, "1234,5" is 1234.5.
+    Returns None when the number is ambiguous ("1,234" or "1.234": thousands, or
+    three decimals?) or mixes up its separators ("1,234,56").
+    """
+    separators = [c for c in text if c in ".,"]
+    if not separators:
+        return float(text)
+    integer, last, fraction = text.rpartition(separators[-1])
+    if len(fraction) == 3:
+        # Only thousands separators: fine if there are several of the same kind
+        if len(set(separators)) == 1 and len(separators) > 1:
+            return float(text.replace(last, ""))
+        return None
+    if last in integer:
+        return None
+    return float(f"{integer.replace(',', '').replace('.', '')}.{fraction}")
+
+def normalize_date(match: re.Match, pattern: re.Pattern):
+    """
+    Converts a date match of one of the date patterns to YYYY-MM-DD, or None if
+    it is not a real date or could be two ("03/04/2025": March or April?).
+    """
+    if pattern is ISO_DATE_PATTERN:
+        year, month, day = (int(g) for g in match.groups())
+    elif pattern is NUMERIC_DATE_PATTERN:
+        day, separator, month, year = match.groups()
+        day, month, year = int(day), int(month), int(year)
+        if month > 12 and day <= 12:
+            day, month = month, day
+        elif separator == "/" and day <= 12 and month <= 12 and day != month:
+            return None
+    else:
+        groups = match.groups()
+        if pattern is MONTH_NAME_DATE_PATTERN:
+            month_name, day, year = groups
+        else:
+            day, month_name, year = groups
+        month = MONTHS.get(month_name[:3].lower())
+        if month is None:
+            return None
+        day, year = int(day), int(year)
+    if not (1 <= month <= 12 and 1 <= day <= 31):
+        return None
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+def find_dates(text: str) -> list[str]:
+    """Returns the distinct dates in the text, normalised to YYYY-MM-DD, in order of appearance."""
+    found = []
+    for pattern in (MONTH_NAME_DATE_PATTERN, DAY_MONTH_NAME_DATE_PATTERN, ISO_DATE_PATTERN, NUMERIC_DATE_PATTERN):
+        for match in pattern.finditer(text):
+            date = normalize_date(match, pattern)
+            if date:
+                found.append((match.start(), date))
+    return list(dict.fromkeys(date for _, date in sorted(found)))
+
+def find_amounts(text: str) -> list[dict]:
+    """
+    Returns every amount written with a currency symbol or code, as
+    {"value", "currency", "start"} dictionaries.
+    """
+    amounts = []
+    for match in AMOUNT_PATTERN.finditer(text):
+        symbol, value, code, bare_value, bare_code = match.groups()
+        currency = code or bare_code or CURRENCY_SYMBOLS[symbol]
+        number = to_number(value or bare_value)
+        if number is not None:
+            amounts.append({"value": number, "currency": currency, "start": match.start()})
+    return amounts
+
+def labelled_amount(text: str, label_pattern: re.Pattern, last: bool = False):
+    """
+    Returns (value, label match) for the first (or last) label that is directly
+    followed by a number, or (None, None). The value is None when that number
+    is ambiguous (see to_number).
+    """
+    found = (None, None)
+    for label in label_pattern.finditer(text):
+        number = re.match(rf"\s*(?:R\$|[$€£])?\s?{AMOUNT}", text[label.end():])
+        if number:
+            found = (to_number(number.group(1)), label)
+            if not last:
+                break
+    return found
+
+def pre_extract(text: str) -> dict:
+    """
+    Extracts what can be found reliably without a model: dates, currency, SKUs,
+    the grand total, the subtotal and the tax amount and rate.
+
+    Every field is None (or empty) when it cannot be found or is ambiguous.
+    """
+    amounts = find_amounts(text)
+    currencies = [amount["currency"] for amount in amounts]
+
+    # A plain "Total" label also appears on line items ("Total for nails: $150.00"),
+    # so it is only used, last occurrence first, when no explicit grand total exists.
+    total, total_label = labelled_amount(text, GRAND_TOTAL_LABEL_PATTERN)
+    if total_label is None:
+        total, _ = labelled_amount(text, TOTAL_LABEL_PATTERN, last=True)
+    subtotal, _ = labelled_amount(text, SUBTOTAL_LABEL_PATTERN)
+    tax, tax_label = labelled_amount(text, TAX_LABEL_PATTERN)
+    tax_rate = float(tax_label.group(1)) / 100 if tax_label and tax_label.group(1) else None
+
+    return {
+        "dates": find_dates(text),
+        # The most frequent currency; codes win over "$" when both are written.
+        "currency": max(set(currencies), key=lambda c: (currencies.count(c), len(c))) if currencies else None,
+        "skus": list(dict.fromkeys(SKU_PATTERN.findall(text))),
+        "total": total,
+        "subtotal": subtotal,
+        "tax": tax,
+        "taxRate": tax_rate,
+    }
+
+def format_hints(hints: dict) -> str:
+    """
+    Formats the pre-extracted values as the short <Hints> block of HINTED_INVOICE_PARSING_PROMPT.
+    """
+    lines = []
+    if hints["dates"]:
+        lines.append(f"- Dates found (already YYYY-MM-DD): {', '.join(hints['dates'])}")
+    if hints["currency"]:
+        lines.append(f"- Currency: {hints['currency']}")
+    if hints["total"] is not None:
+        lines.append(f"- Total amount: {hints['total']:.2f}")
+    if hints["skus"]:
+        lines.append(f"- SKUs: {', '.join(hints['skus'])}")
+    return "\n".join(lines) or "- (none)"
@@ -193,3 +193,70 @@ INVOICE_PARSING_PROMPT: str = dedent(text="""
     </InvoiceText>
     """
 )
+
+
+# A shorter variant used by the batch pipeline. Dates, currency, the total and
+# SKUs are pre-extracted with regexes (see preextract.py) and given as hints, and
+# line totals are computed locally, so most guidelines and two examples can go.
+HINTED_INVOICE_PARSING_PROMPT: str = dedent(text="""
+    <Persona>
+    You are an expert AI data extraction engine that converts unstructured invoice text into JSON.
+    </Persona>
+
+    <JSON_Schema>
+    {{
+      "vendorName": "string",
+      "invoiceDate": "string // YYYY-MM-DD",
+      "totalAmount": {{"value": "number", "currency": "string"}},
+      "lineItems": [
+        {{
+          "description": "string",
+          "quantity": "number",
+          "unitPrice": "number",
+          "lineTotal": "number or null // only when the text states it; do not calculate it"
+        }}
+      ]
+    }}
+    </JSON_Schema>
+
+    <Guidelines>
+    1.  Respond with ONLY the JSON object. Numbers must be JSON numbers, without symbols or commas.
+    2.  The <Hints> were extracted with exact rules: prefer them for the date, currency and total.
+    3.  Use `null` for anything missing and `[]` when there are no line items. The text may be jumbled.
+    </Guidelines>
+
+    <Example>
+    **Input Text:**
+    "RECEIPT - Tech Gadgets Inc. Total amount due: 349.96 EUR. Date issued: 14.07.2025.
+    - 1 item: Wireless Mouse Pro, price per unit is 79.99.
+    - USB-C Hub (5-in-1), 1 unit. Total for this was 120.00 EUR.
+    We also included: 3 of the Premium HDMI Cable, they are 49.99 each."
+
+    **Expected JSON Output:**
+    {{"vendorName": "Tech Gadgets Inc.", "invoiceDate": "2025-07-14", "totalAmount": {{"value": 349.96, "currency": "EUR"}},
+    "lineItems": [
+      {{"description": "Wireless Mouse Pro", "quantity": 1, "unitPrice": 79.99, "lineTotal": null}},
+      {{"description": "USB-C Hub (5-in-1)", "quantity": 1, "unitPrice": 120.00, "lineTotal": 120.00}},
+      {{"description": "Premium HDMI Cable", "quantity": 3, "unitPrice": 49.99, "lineTotal": null}}
+    ]}}
+    </Example>
+
+    <Hints>
+    {hints}
+    </Hints>
+
+    <InvoiceText>
+    {unstructured_invoice_text}
+    </InvoiceText>
+    """
+)
+
+# Sent after the model's previous answer when the arithmetic checks fail.
+INVOICE_CORRECTION_PROMPT: str = dedent(text="""
+    Your JSON does not add up. The following checks failed:
+    {problems}
+
+    Re-read the invoice text and return the corrected JSON object only, with the same schema.
+    Do not change values that the text states explicitly just to make the checks pass.
+    """
+)
@@ -0,0 +1,233 @@
+import os
+import re
+import json
+import hashlib
+
+from preextract import AMOUNT, find_dates, to_number
+
+# "Date issued: 14.07.2025", "TOTAL DUE: $201.90 USD", "Tax (0%): 0.00"
+LABEL_PATTERN = re.compile(r"^([A-Za-z#][^:]{0,40}):\s*(.*)$")
+# AMOUNT without its capturing group, to be wrapped in named groups
+NUMBER = AMOUNT[1:-1]
+NUMBER_PATTERN = re.compile(NUMBER)
+# The amount at the start of a label's value: "$2,150.50", "349.96 EUR"
+LEADING_AMOUNT_PATTERN = re.compile(rf"\s*(?:R\$|[$€£])?\s?{AMOUNT}")
+# A line with a price-like number that no template rule explains could be a new line item.
+PRICE_PATTERN = re.compile(r"\d[.,]\d{2}\b|[$€£]\s?\d")
+NUMERIC_FIELDS = ("quantity", "unitPrice", "lineTotal")
+
+
+def lines_of(text: str) -> list[str]:
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def literal_pattern(text: str) -> str:
+    """Escapes literal text for a regex, letting any run of whitespace match any other."""
+    return r"\s+".join(map(re.escape, re.split(r"\s+", text)))
+
+def leading_amount(value: str):
+    match = LEADING_AMOUNT_PATTERN.match(value)
+    return to_number(match.group(1)) if match else None
+
+def mask_digits(text: str) -> str:
+    return re.sub(r"\d", "9", re.sub(r"\s+", " ", text))
+
+def labels_of(lines: list[str]) -> list[tuple[str, str]]:
+    """Returns the (label, value) pairs of the "Label: value" lines, in order."""
+    return [(mask_digits(m.group(1).strip()).lower(), m.group(2)) for m in map(LABEL_PATTERN.match, lines) if m]
+
+def fingerprint(text: str) -> str:
+    """
+    A structural fingerprint of an invoice: the header line and the sequence of
+    "Label:" keys, with digits masked. Invoices from the same vendor template
+    share it even though their values and line items differ.
+    """
+    lines = lines_of(text)
+    if not lines:
+        return ""
+    skeleton = [mask_digits(lines[0])] + [label for label, _ in labels_of(lines)]
+    return hashlib.sha256("\n".join(skeleton).encode("utf-8")).hexdigest()[:16]
+
+def derive_item_pattern(line: str, item: dict):
+    """
+    Turns the text line of a parsed line item into a regex with named groups, e.g.
+    "- 2x Heavy Duty Stapler @ 25.50 each" -> "^-\\s+(?P<quantity>...)x\\s+(?P<description>.+?)\\s+@\\s+(?P<unitPrice>...)\\s+each$".
+
+    Returns:
+        {"pattern", "default_quantity"}, or None when the line does not contain
+        the description and enough of the numbers to rebuild the item.
+    """
+    description = item.get("description") or ""
+    start = line.lower().find(description.lower()) if description else -1
+    if start < 0:
+        return None
+    spans = [(start, start + len(description), "description")]
+
+    used = set()
+    for match in NUMBER_PATTERN.finditer(line):
+        if match.start() < spans[0][1] and match.end() > spans[0][0]:
+            continue
+        value = to_number(match.group(0))
+        field = next(
+            (f for f in NUMERIC_FIELDS if value is not None and f not in used and item.get(f) is not None and abs(item[f] - value) < 0.005),
+            "number",
+        )
+        used.add(field)
+        spans.append((match.start(), match.end(), field))
+
+    # quantity may be implicit ("Monitor Stand, unit price $51.00") only when it is 1.
+    default_quantity = None
+    if "quantity" not in used:
+        if item.get("quantity") != 1:
+            return None
+        default_quantity = 1
+    if not ({"unitPrice", "lineTotal"} & used):
+        return None
+
+    pattern, cursor = "", 0
+    for span_start, span_end, field in sorted(spans):
+        pattern += literal_pattern(line[cursor:span_start])
+        if field == "description":
+            pattern += r"(?P<description>.+?)"
+        elif field == "number":
+            pattern += f"(?:{NUMBER})"
+        else:
+            pattern += f"(?P<{field}>{NUMBER})"
+        cursor = span_end
+    pattern += literal_pattern(line[cursor:])
+    return {"pattern": f"^{pattern}$", "default_quantity": default_quantity}
+
+def item_from_match(match: re.Match, default_quantity):
+    """Returns the line item of a matched item line, or None when one of its numbers is ambiguous."""
+    values = {field: to_number(match.group(field)) if field in match.groupdict() else None for field in NUMERIC_FIELDS}
+    if any(values[field] is None for field in NUMERIC_FIELDS if field in match.groupdict()):
+        return None
+    quantity = values["quantity"] if values["quantity"] is not None else default_quantity
+    unit_price, line_total = values["unitPrice"], values["lineTotal"]
+    if unit_price is None and quantity:
+        unit_price = round(line_total / quantity, 2)
+    if line_total is None:
+        line_total = round(quantity * unit_price, 2)
+    return {"description": match.group("description").strip(), "quantity": quantity, "unitPrice": unit_price, "lineTotal": line_total}
+
+
+class TemplateStore:
+    """
+    Vendor templates learned from successful LLM parses, keyed by fingerprint
+    and saved to a JSON file.
+
+    A template records which label holds the date and the total, the vendor name
+    and currency, and one regex per line-item layout. An invoice is only parsed
+    from a template when every field is found and every price-like line is
+    explained by the template; otherwise the caller falls back to the LLM.
+    """
+
+    def __init__(self, path: str = "templates.json"):
+        self.path = path
+        self.templates = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.templates = json.load(f)
+        self.lookups = 0
+        self.hits = 0
+        self.learned = 0
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.templates, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def learn(self, text: str, data: dict) -> bool:
+        """
+        Derives a template from an invoice the LLM parsed correctly.
+
+        Returns:
+            True if a template was stored, False if the layout could not be described.
+        """
+        key = fingerprint(text)
+        if not key or key in self.templates:
+            return False
+        lines = lines_of(text)
+        labels = labels_of(lines)
+        total = (data.get("totalAmount") or {}).get("value")
+
+        date_label = next((label for label, value in labels if data.get("invoiceDate") in find_dates(value)), None)
+        # The last matching label, since a subtotal without tax holds the same amount as the grand total below it.
+        total_label = next((
+            label for label, value in reversed(labels)
+            if total is not None and leading_amount(value) is not None and abs(leading_amount(value) - total) < 0.005
+        ), None)
+        if not date_label or not total_label or not data.get("vendorName") or not data.get("lineItems"):
+            return False
+
+        item_patterns = []
+        for item in data["lineItems"]:
+            candidates = [derive_item_pattern(line, item) for line in lines if (item.get("description") or "").lower() in line.lower()]
+            candidates = [c for c in candidates if c]
+            if not candidates:
+                return False
+            if candidates[0] not in item_patterns:
+                item_patterns.append(candidates[0])
+
+        self.templates[key] = {
+            "vendorName": data["vendorName"],
+            "currency": data["totalAmount"].get("currency"),
+            "dateLabel": date_label,
+            "totalLabel": total_label,
+            "itemPatterns": item_patterns,
+        }
+        self.learned += 1
+        return True
+
+    def forget(self, text: str) -> None:
+        """Drops the template of an invoice whose template parse turned out wrong."""
+        self.templates.pop(fingerprint(text), None)
+
+    def parse(self, text: str):
+        """
+        Parses an invoice locally if a template matches it.
+
+        Returns:
+            The parsed invoice (same schema as the LLM output), or None.
+        """
+        self.lookups += 1
+        template = self.templates.get(fingerprint(text))
+        if template is None:
+            return None
+
+        lines = lines_of(text)
+        labels = dict(reversed(labels_of(lines)))
+        dates = find_dates(labels.get(template["dateLabel"], ""))
+        total = leading_amount(labels.get(template["totalLabel"], ""))
+        if not dates or total is None:
+            return None
+
+        patterns = [(re.compile(p["pattern"]), p["default_quantity"]) for p in template["itemPatterns"]]
+        items = []
+        for line in lines:
+            for pattern, default_quantity in patterns:
+                match = pattern.match(line)
+                if match:
+                    item = item_from_match(match, default_quantity)
+                    if item is None:
+                        return None
+                    items.append(item)
+                    break
+            else:
+                # A price on a line that is neither an item nor a labelled field
+                # (those are part of the fingerprint): unknown layout.
+                if PRICE_PATTERN.search(line) and not LABEL_PATTERN.match(line):
+                    return None
+        if not items:
+            return None
+
+        self.hits += 1
+        return {
+            "vendorName": template["vendorName"],
+            "invoiceDate": dates[0],
+            "totalAmount": {"value": total, "currency": template["currency"]},
+            "lineItems": items,
+        }
+
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
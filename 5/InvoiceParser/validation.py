@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Absolute tolerance (in currency units) for rounding differences
+LINE_TOLERANCE = 0.01
+TOTAL_TOLERANCE = 0.05
+
+
+def complete_line_totals(data: dict) -> dict:
+    """
+    Fills in every missing lineTotal as quantity * unitPrice, rounded to cents.
+    The hinted prompt leaves this arithmetic to us instead of the model.
+    """
+    for item in data.get("lineItems") or []:
+        if item.get("lineTotal") is None and item.get("quantity") is not None and item.get("unitPrice") is not None:
+            item["lineTotal"] = round(item["quantity"] * item["unitPrice"], 2)
+    return data
+
+def build_frames(invoices: list[dict]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Flattens parsed invoices into one row per invoice and one row per line item.
+
+    Args:
+        invoices: {"id", "data", "hints"} dictionaries, where data is the parsed
+            invoice and hints the output of preextract.pre_extract.
+
+    Returns:
+        (invoice frame indexed by position in invoices, line item frame with a
+        "position" column). Ids are not used as keys: a stream may repeat one.
+    """
+    invoice_rows = []
+    item_rows = []
+    for position, invoice in enumerate(invoices):
+        data, hints = invoice["data"], invoice["hints"]
+        invoice_rows.append({
+            "position": position,
+            "total": (data.get("totalAmount") or {}).get("value"),
+            "hint_total": hints.get("total"),
+            "subtotal": hints.get("subtotal"),
+            "tax": hints.get("tax"),
+            "tax_rate": hints.get("taxRate"),
+        })
+        for item in data.get("lineItems") or []:
+            item_rows.append({
+                "position": position,
+                "quantity": item.get("quantity"),
+                "unitPrice": item.get("unitPrice"),
+                "lineTotal": item.get("lineTotal"),
+            })
+
+    invoice_frame = pd.DataFrame(invoice_rows, columns=["position", "total", "hint_total", "subtotal", "tax", "tax_rate"]).set_index("position")
+    item_frame = pd.DataFrame(item_rows, columns=["position", "quantity", "unitPrice", "lineTotal"])
+    # None becomes NaN, so every check below is a plain vectorized comparison.
+    invoice_frame = invoice_frame.astype(float)
+    item_frame[["quantity", "unitPrice", "lineTotal"]] = item_frame[["quantity", "unitPrice", "lineTotal"]].astype(float)
+    return invoice_frame, item_frame
+
+def find_arithmetic_problems(invoices: list[dict]) -> dict[int, list[str]]:
+    """
+    Checks the arithmetic of a whole batch of parsed invoices at once.
+
+    The checks are:
+      - every line total equals quantity * unitPrice;
+      - the line totals add up to the subtotal found in the text, if any;
+      - the tax found in the text matches its rate applied to the line totals;
+      - the line totals plus tax add up to the total amount;
+      - the total amount equals the total found in the text, if any.
+    A check is skipped for an invoice when one of its inputs is missing.
+
+    Returns:
+        The problems of every failing invoice, keyed by its position in invoices.
+    """
+    if not invoices:
+        return {}
+    frame, items = build_frames(invoices)
+    problems = {}
+
+    def report(mask: pd.Series, message) -> None:
+        # Comparisons with NaN are False, so missing inputs never fail a check.
+        for position, row in frame[mask].iterrows():
+            problems.setdefault(position, []).append(message(row))
+
+    expected_line = items["quantity"] * items["unitPrice"]
+    bad_line = (items["lineTotal"] - expected_line).abs() > LINE_TOLERANCE
+    bad_lines = items[bad_line].groupby("position").size()
+    for position, count in bad_lines.items():
+        problems.setdefault(position, []).append(f"{count} line item(s) where lineTotal != quantity * unitPrice")
+
+    frame["items_sum"] = items["lineTotal"].fillna(expected_line).groupby(items["position"]).sum(min_count=1)
+
+    report(
+        (frame["items_sum"] - frame["subtotal"]).abs() > TOTAL_TOLERANCE,
+        lambda r: f"line totals add up to {r.items_sum:.2f} but the subtotal is {r.subtotal:.2f}",
+    )
+    report(
+        (frame["tax"] - frame["tax_rate"] * frame["items_sum"]).abs() > TOTAL_TOLERANCE,
+        lambda r: f"tax of {r.tax:.2f} is not {r.tax_rate:.0%} of the line totals ({r.items_sum:.2f})",
+    )
+    expected_total = frame["items_sum"] + frame["tax"].fillna(0)
+    report(
+        (frame["total"] - expected_total).abs() > TOTAL_TOLERANCE,
+        lambda r: f"line totals plus tax add up to {r.items_sum + (0 if np.isnan(r.tax) else r.tax):.2f} but totalAmount is {r.total:.2f}",
+    )
+    report(
+        (frame["total"] - frame["hint_total"]).abs() > LINE_TOLERANCE,
+        lambda r: f"totalAmount is {r.total:.2f} but the invoice states a total of {r.hint_total:.2f}",
+    )
+    return problems
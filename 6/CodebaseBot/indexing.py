@@ -0,0 +1,271 @@
+import io
+import os
+import sys
+import time
+import queue
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from agno.document import Document
+from qdrant_client.http import models
+
+from repo_source import iter_repo_files
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.code_splitter import split_code, is_code
+from shared.ingestion import content_hash
+
+# Marks the end of a stage's output
+DONE = None
+
+# One docling converter per worker process; building it loads its models.
+_converter = None
+
+
+def convert_markdown(name: str, content: bytes) -> str:
+    """
+    Converts a markdown file with docling. Runs in a process pool worker.
+    """
+    global _converter
+    from docling.datamodel.base_models import DocumentStream
+    from docling.document_converter import DocumentConverter
+
+    if _converter is None:
+        _converter = DocumentConverter()
+    result = _converter.convert(DocumentStream(name=name, stream=io.BytesIO(content)))
+    return result.document.export_to_markdown()
+
+def insert_documents(vector_db, embedder, docs: list[Document]) -> None:
+    """
+    Embeds a whole batch of documents with one embeddings request and upserts them
+    with one Qdrant call. vector_db.insert would send one embeddings request per chunk.
+
+    The points have the payload agno's Qdrant writes itself, so vector_db.search
+    still works. Ids include the file path, so the same text in two files (e.g. a
+    license header) gives two points that each belong to their own source.
+    A LocalVectorDb gets the same ids and payloads through its add method.
+    """
+    contents = [doc.content.replace("\x00", "\ufffd") for doc in docs]
+    response = embedder.client.embeddings.create(input=contents, model=embedder.id)
+    ids = [hashlib.md5(f"{doc.meta_data.get('source', '')}\n{content}".encode()).hexdigest() for doc, content in zip(docs, contents)]
+    if not hasattr(vector_db, "client"):
+        # LocalVectorDb
+        for doc, content in zip(docs, contents):
+            doc.content = content
+        vector_db.add(docs, [item.embedding for item in response.data], ids)
+        return
+    points = [
+        models.PointStruct(
+            id=point_id,
+            vector=item.embedding,
+            payload={"name": doc.name, "meta_data": doc.meta_data, "content": content, "usage": doc.usage},
+        )
+        for doc, content, item, point_id in zip(docs, contents, response.data, ids)
+    ]
+    vector_db.client.upsert(collection_name=vector_db.collection, points=points, wait=False)
+
+
+class PipelineStats:
+    """Thread-safe counters and per-stage busy time of an indexing run."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {"files": 0, "unchanged": 0, "converted": 0, "failed": 0, "chunks": 0, "batches": 0, "inserted": 0, "removed": 0}
+        self.seconds = {"fetch": 0.0, "convert": 0.0, "chunk": 0.0, "embed_insert": 0.0}
+        self.start = time.perf_counter()
+
+    def add(self, stage: str = None, seconds: float = 0.0, **counts) -> None:
+        with self.lock:
+            if stage:
+                self.seconds[stage] += seconds
+            for name, value in counts.items():
+                self.counts[name] += value
+
+    def progress(self) -> str:
+        c = self.counts
+        return (
+            f"{c['files']} files fetched ({c['unchanged']} unchanged), {c['converted']} converted, {c['failed']} failed, "
+            f"{c['inserted']}/{c['chunks']} chunks inserted ({time.perf_counter() - self.start:.1f}s)"
+        )
+
+
+def index_repository(
+    source: str,
+    vector_db,
+    embedder,
+    splitter,
+    extensions=(".py", ".js", ".md"),
+    convert_workers: int = 2,
+    embed_workers: int = 2,
+    embed_batch_size: int = 256,
+    queue_size: int = 64,
+    ingestion=None,
+    salt: str = "",
+) -> dict:
+    """
+    Indexes a repository with a staged pipeline, every stage running concurrently:
+
+        fetch (archive stream) -> convert (docling on a process pool for .md)
+        -> chunk (code at function/class boundaries, prose with splitter)
+        -> embed + insert (batches of chunks from many files)
+
+    The stages are joined by bounded queues, so a slow stage holds the ones
+    before it back instead of letting files pile up in memory.
+
+    With an IngestionManager, every chunk is stored with its file's content hash:
+    unchanged files are dropped right after fetching, changed ones replace their
+    old chunks and files gone from the repository are deleted.
+
+    :param source: A GitHub folder URL, a local clone or an archive (see repo_source.iter_repo_files).
+    :param convert_workers: Processes converting markdown with docling.
+    :param embed_workers: Threads sending embedding + insert batches.
+    :param embed_batch_size: Chunks per embeddings request and Qdrant upsert.
+    :param queue_size: Capacity of each queue between two stages.
+    :param ingestion: An optional shared.ingestion.IngestionManager for the collection.
+    :param salt: Folded into the content hashes (see shared.ingestion.content_hash).
+    :return: {"counts": ..., "seconds": time spent per stage, summed over its workers, "elapsed": wall seconds}.
+    """
+    stats = PipelineStats()
+    # One scroll over the collection instead of one lookup per file
+    stored_hashes = ingestion.stored_hashes() if ingestion else {}
+    seen = set()
+    changed = {}  # path -> new hash, for every file that is (re)ingested
+    failed_paths = set()
+    fetch_complete = threading.Event()
+    files = queue.Queue(maxsize=queue_size)
+    texts = queue.Queue(maxsize=queue_size)
+    batches = queue.Queue(maxsize=max(2, embed_workers * 2))
+
+    def fetch():
+        try:
+            started = time.perf_counter()
+            for repo_file in iter_repo_files(source, extensions=extensions):
+                stats.add("fetch", time.perf_counter() - started, files=1)
+                seen.add(repo_file.path)
+                digest = content_hash(repo_file.content, salt)
+                if stored_hashes.get(repo_file.path) == digest:
+                    stats.add(unchanged=1)
+                else:
+                    changed[repo_file.path] = digest
+                    files.put(repo_file)
+                started = time.perf_counter()
+            fetch_complete.set()
+        except Exception as e:
+            print(f"    - Failed to fetch {source}: {e}")
+        finally:
+            files.put(DONE)
+
+    def fail(path: str, e: Exception) -> None:
+        print(f"    - Failed to process {path}: {e}")
+        failed_paths.add(path)
+        stats.add(failed=1)
+
+    def convert():
+        in_flight = threading.BoundedSemaphore(queue_size)
+
+        def converted(path, started, future):
+            try:
+                texts.put((path, future.result()))
+                stats.add("convert", time.perf_counter() - started, converted=1)
+            except Exception as e:
+                fail(path, e)
+            finally:
+                in_flight.release()
+
+        # Every file is either passed on or counted as failed, and DONE always
+        # follows, so neither fetch nor chunk waits forever on a broken stage
+        # (e.g. a BrokenProcessPool after a worker crash).
+        finished = False
+        try:
+            with ProcessPoolExecutor(max_workers=convert_workers) as pool:
+                while (repo_file := files.get()) is not DONE:
+                    try:
+                        if repo_file.path.endswith(".md"):
+                            in_flight.acquire()
+                            started = time.perf_counter()
+                            try:
+                                future = pool.submit(convert_markdown, repo_file.path.rsplit("/", 1)[-1], repo_file.content)
+                            except BaseException:
+                                in_flight.release()
+                                raise
+                            future.add_done_callback(lambda f, p=repo_file.path, s=started: converted(p, s, f))
+                        else:
+                            texts.put((repo_file.path, repo_file.content.decode("utf-8", errors="replace")))
+                            stats.add(converted=1)
+                    except Exception as e:
+                        fail(repo_file.path, e)
+                finished = True
+            # Leaving the with block waited for every conversion
+        except Exception as e:
+            print(f"    - Conversion stopped: {e}")
+            while not finished:
+                if (repo_file := files.get()) is DONE:
+                    finished = True
+                else:
+                    fail(repo_file.path, e)
+        finally:
+            texts.put(DONE)
+
+    def chunk():
+        batch = []
+        try:
+            while (item := texts.get()) is not DONE:
+                path, text = item
+                started = time.perf_counter()
+                try:
+                    if not text:
+                        docs = []
+                    elif is_code(path):
+                        # Whole functions and classes, with their qualified names, and no overlap
+                        docs = [Document(content=c.text, meta_data={"path": path, **c.metadata()}) for c in split_code(text, path)]
+                    else:
+                        docs = [Document(content=c, meta_data={"path": path}) for c in splitter.chunks(text)]
+                    for doc in docs:
+                        doc.meta_data.update(source=path, source_hash=changed[path])
+                except Exception as e:
+                    fail(path, e)
+                    continue
+                stats.add("chunk", time.perf_counter() - started, chunks=len(docs))
+                batch += docs
+                while len(batch) >= embed_batch_size:
+                    batches.put(batch[:embed_batch_size])
+                    batch = batch[embed_batch_size:]
+            if batch:
+                batches.put(batch)
+        finally:
+            for _ in range(embed_workers):
+                batches.put(DONE)
+
+    def embed_and_insert():
+        while (batch := batches.get()) is not DONE:
+            started = time.perf_counter()
+            try:
+                insert_documents(vector_db, embedder, batch)
+                stats.add("embed_insert", time.perf_counter() - started, batches=1, inserted=len(batch))
+            except Exception as e:
+                print(f"    - Failed to insert a batch of {len(batch)} chunks: {e}")
+                failed_paths.update(doc.meta_data["path"] for doc in batch)
+            print(f"  ... {stats.progress()}")
+
+    threads = [threading.Thread(target=fetch), threading.Thread(target=convert), threading.Thread(target=chunk)]
+    threads += [threading.Thread(target=embed_and_insert) for _ in range(embed_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if ingestion:
+        for path, digest in changed.items():
+            if path in failed_paths:
+                # Drop whatever made it in, so the stored hash does not hide the failure next run
+                ingestion.delete_source(path)
+            elif path in stored_hashes:
+                ingestion.delete_source(path, keep_hash=digest)
+        # Only after a complete listing: a failed download must not look like deleted files
+        if fetch_complete.is_set():
+            for path in stored_hashes.keys() - seen:
+                ingestion.delete_source(path)
+                stats.add(removed=1)
+
+    return {"counts": stats.counts, "seconds": stats.seconds, "elapsed": time.perf_counter() - stats.start}
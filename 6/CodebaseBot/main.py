@@ -1,132 +1,55 @@
-from docling.document_converter import DocumentConverter
 from semantic_text_splitter import TextSplitter
-from agno.embedder.openai import OpenAIEmbedder
 from agno.models.openai import OpenAIChat
-from agno.vectordb.qdrant import Qdrant
-from qdrant_client.http import models
-from agno.document import Document
 from dotenv import load_dotenv
 from agno.agent import Agent
-import requests
 import os
-import re
+import sys
 
 # Import the system prompt from your new file
 from prompt import SYSTEM_PROMPT
+from indexing import index_repository
 
-def create_qdrant_table(
-    table_name: str, embedder: OpenAIEmbedder, vector_db: Qdrant
-) -> None:
-    """
-    Creates a Qdrant collection if it doesn't already exist.
-
-    :param table_name: The name of the table to create.
-    :param embedder: The embedder instance for vector dimensions.
-    :param vector_db: The Qdrant vector database instance.
-    """
-    collections_response = vector_db.client.get_collections()
-    collection_names = [c.name for c in collections_response.collections]
-
-    if table_name not in collection_names:
-        vector_db.client.create_collection(
-            collection_name=table_name,
-            vectors_config=models.VectorParams(
-                size=embedder.dimensions, distance=models.Distance.COSINE
-            ),
-        )
-
-def get_all_repo_files(repo_url: str) -> list[str]:
-    """
-    Gets all files with specified extensions from a GitHub repository folder
-    using the GitHub API.
-
-    :param repo_url: The URL of the GitHub repository folder.
-    :return: A list of download URLs for the files in the repository.
-    """
-    match = re.search(r"github\.com/([^/]+)/([^/]+)/tree/[^/]+/(.*)", repo_url)
-    if not match:
-        print(f"Error: Could not parse the provided GitHub folder URL: {repo_url}")
-        return []
-        
-    owner, repo, path = match.groups()
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-
-    try:
-        response = requests.get(api_url)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching from GitHub API: {e}")
-        return []
-
-    files_data = response.json()
-    file_urls = []
-    
-    for item in files_data:
-        if item.get('type') == 'file' and item.get('download_url'):
-            file_name = item.get('name', '')
-            if file_name.endswith((".py", ".js", ".md")):
-                file_urls.append(item['download_url'])
-                
-    return file_urls
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.ingestion import IngestionManager
+from shared.vector_store import get_embedder, get_vector_db
 
 if __name__ == "__main__":
     load_dotenv()
 
     # --- Configuration ---
-    INSERT_CHUNKS = True
     WITH_CONTEXT = True  # The WITH_CONTEXT flag is back
     QUERY = "What does the example of lecture 2 do?"
-    REPO_URL = "https://github.com/tfvieira/tic43/tree/main/Lecture2"
+    REPO_URL = "https://github.com/tfvieira/tic43/tree/main/Lecture2"  # Also a local clone or a .tar.gz/.zip archive
+    FILE_EXTENSIONS = (".py", ".js", ".md")
+    CONVERT_WORKERS = 2  # docling processes for .md files
+    EMBED_WORKERS = 2
+    EMBED_BATCH_SIZE = 256  # chunks per embeddings request
     COLLECTION_NAME = "tic43_lectures"
 
     # --- Initializations ---
-    embedder = OpenAIEmbedder(api_key=os.getenv("OPENAI_API_KEY"))
-    vector_db = Qdrant(
-        collection=COLLECTION_NAME, url="http://localhost:6333", embedder=embedder
-    )
-    converter = DocumentConverter()
+    # Creates the collection on first use; the embedder is the one it was created with
+    vector_db = get_vector_db(COLLECTION_NAME)
+    embedder = get_embedder()
     # TextSplitter parameters are now positional
     splitter = TextSplitter(1000, 200)
 
     # --- Indexing Logic ---
-    if INSERT_CHUNKS:
-        print(f"Creating Qdrant table '{COLLECTION_NAME}' if it doesn't exist...")
-        create_qdrant_table(COLLECTION_NAME, embedder, vector_db)
-        
-        print(f"Fetching files from repository: {REPO_URL}")
-        repo_files = get_all_repo_files(REPO_URL)
-
-        if not repo_files:
-            print("No files found to index. Exiting.")
-        else:
-            print(f"Found {len(repo_files)} files to index.")
-            for file_url in repo_files:
-                file_name = file_url.split('/')[-1]
-                print(f"  - Processing {file_name}...")
-                
-                document_text = ""
-                try:
-                    if file_url.endswith((".py", ".js")):
-                        response = requests.get(file_url)
-                        response.raise_for_status()
-                        document_text = response.text
-                    elif file_url.endswith(".md"):
-                        result = converter.convert(file_url)
-                        document_text = result.document.export_to_markdown()
-                    else:
-                        print(f"    - Skipping unsupported file type: {file_name}")
-                        continue
-
-                    if document_text:
-                        chunks = splitter.chunks(document_text)
-                        docs = [Document(content=chunk) for chunk in chunks]
-                        vector_db.insert(docs)
-
-                except Exception as e:
-                    print(f"    - Failed to process {file_name}: {e}")
-                    continue
-
-            print("Finished indexing all files.")
+    # Runs on every start: only files whose content changed are converted and embedded again.
+    print(f"Indexing repository: {REPO_URL}")
+    stats = index_repository(
+        REPO_URL, vector_db, embedder, splitter, FILE_EXTENSIONS,
+        convert_workers=CONVERT_WORKERS, embed_workers=EMBED_WORKERS, embed_batch_size=EMBED_BATCH_SIZE,
+        ingestion=IngestionManager(vector_db), salt="split_code(1000) / TextSplitter(1000, 200)",
+    )
+    counts = stats["counts"]
+    if not counts["files"]:
+        print("No files found to index.")
+    else:
+        print(
+            f"Indexed {counts['converted']} new or changed files ({counts['unchanged']} unchanged, {counts['failed']} failed, "
+            f"{counts['removed']} removed) into {counts['inserted']} chunks in {stats['elapsed']:.1f}s."
+        )
+        print("Time per stage: " + ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in stats["seconds"].items()))
 
     # --- Querying Logic ---
     if WITH_CONTEXT:
@@ -0,0 +1,128 @@
+import os
+import re
+import tarfile
+import zipfile
+from typing import Iterator, NamedTuple
+
+import requests
+
+DEFAULT_EXTENSIONS = (".py", ".js", ".md")
+SKIPPED_DIRECTORIES = {".git", "node_modules", "__pycache__", ".venv"}
+# https://github.com/<owner>/<repo>[/tree/<ref>[/<path>]]
+GITHUB_URL_PATTERN = re.compile(r"github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/tree/([^/]+)(?:/(.*))?)?/?$")
+ARCHIVE_URL = "https://codeload.github.com/{owner}/{repo}/tar.gz/{ref}"
+
+
+class RepoFile(NamedTuple):
+    path: str  # relative to the repository folder that was asked for, with "/" separators
+    content: bytes
+
+
+def parse_github_url(repo_url: str) -> tuple[str, str, str, str]:
+    """
+    Splits a GitHub repository or folder URL.
+
+    :param repo_url: e.g. https://github.com/owner/repo/tree/main/Lecture2
+    :return: (owner, repo, ref, folder path). ref is "HEAD" and the path is empty when the URL does not give them.
+    """
+    match = GITHUB_URL_PATTERN.search(repo_url)
+    if not match:
+        raise ValueError(f"Could not parse the provided GitHub URL: {repo_url}")
+    owner, repo, ref, path = match.groups()
+    return owner, repo, ref or "HEAD", (path or "").strip("/")
+
+def relative_to(path: str, folder: str):
+    """Returns path relative to folder, or None when it lies outside of it."""
+    if not folder:
+        return path
+    if path.startswith(folder + "/"):
+        return path[len(folder) + 1:]
+    return None
+
+def strip_root(member_name: str) -> str:
+    """GitHub archives wrap everything in a "<repo>-<sha>/" directory."""
+    return member_name.split("/", 1)[1] if "/" in member_name else ""
+
+def iter_tar_files(fileobj, folder: str = "", extensions=DEFAULT_EXTENSIONS, strip_top_level: bool = True) -> Iterator[RepoFile]:
+    """
+    Streams matching files out of a .tar.gz, member by member, without writing
+    anything to disk or seeking, so fileobj can be an HTTP response body.
+
+    :param fileobj: A readable binary file object with the gzipped tarball.
+    :param folder: Only files under this folder (relative to the repository root) are returned.
+    :param extensions: File extensions to keep.
+    :param strip_top_level: Whether to drop the archive's single top-level directory.
+    """
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            name = strip_root(member.name) if strip_top_level else member.name
+            path = relative_to(name, folder)
+            if not path or not path.endswith(extensions) or SKIPPED_DIRECTORIES & set(path.split("/")):
+                continue
+            yield RepoFile(path, archive.extractfile(member).read())
+
+def iter_zip_files(fileobj, folder: str = "", extensions=DEFAULT_EXTENSIONS, strip_top_level: bool = True) -> Iterator[RepoFile]:
+    """
+    Same as iter_tar_files for a zipball. A zip's index is at its end, so fileobj
+    must be seekable (e.g. an io.BytesIO of the downloaded archive).
+    """
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            name = strip_root(info.filename) if strip_top_level else info.filename
+            path = relative_to(name, folder)
+            if not path or not path.endswith(extensions) or SKIPPED_DIRECTORIES & set(path.split("/")):
+                continue
+            yield RepoFile(path, archive.read(info))
+
+def iter_local_files(root: str, folder: str = "", extensions=DEFAULT_EXTENSIONS) -> Iterator[RepoFile]:
+    """
+    Walks a local clone (or any directory), recursively, skipping .git and similar folders.
+    """
+    base = os.path.join(root, folder)
+    for directory, subdirectories, file_names in os.walk(base):
+        subdirectories[:] = sorted(d for d in subdirectories if d not in SKIPPED_DIRECTORIES)
+        for file_name in sorted(file_names):
+            if file_name.endswith(extensions):
+                full_path = os.path.join(directory, file_name)
+                with open(full_path, "rb") as f:
+                    yield RepoFile(os.path.relpath(full_path, base).replace(os.sep, "/"), f.read())
+
+def iter_github_files(repo_url: str, extensions=DEFAULT_EXTENSIONS, session: requests.Session = None, timeout: float = 60) -> Iterator[RepoFile]:
+    """
+    Downloads the whole repository as one tarball and streams the matching files
+    of the folder in the URL (and all of its subfolders) out of it.
+
+    Set GITHUB_TOKEN for private repositories.
+    """
+    owner, repo, ref, folder = parse_github_url(repo_url)
+    headers = {}
+    if os.getenv("GITHUB_TOKEN"):
+        headers["Authorization"] = f"Bearer {os.getenv('GITHUB_TOKEN')}"
+    session = session or requests.Session()
+    with session.get(ARCHIVE_URL.format(owner=owner, repo=repo, ref=ref), headers=headers, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        yield from iter_tar_files(response.raw, folder, extensions)
+
+def iter_repo_files(source: str, folder: str = "", extensions=DEFAULT_EXTENSIONS) -> Iterator[RepoFile]:
+    """
+    Yields every file with one of the extensions from a repository, recursively.
+
+    :param source: A GitHub repository or folder URL, a local clone, or a local
+        .tar.gz/.tgz/.zip archive (e.g. a GitHub tarball saved as a fixture).
+    :param folder: For local sources, the folder inside the repository to read; GitHub URLs carry it themselves.
+    :param extensions: File extensions to keep.
+    """
+    if os.path.isdir(source):
+        yield from iter_local_files(source, folder, extensions)
+    elif source.endswith((".tar.gz", ".tgz")):
+        with open(source, "rb") as f:
+            yield from iter_tar_files(f, folder, extensions)
+    elif source.endswith(".zip"):
+        with open(source, "rb") as f:
+            yield from iter_zip_files(f, folder, extensions)
+    else:
+        yield from iter_github_files(source, extensions)
@@ -1,68 +1,44 @@
 from textwrap import dedent
 from docling.document_converter import DocumentConverter
 from semantic_text_splitter import TextSplitter
-from agno.embedder.openai import OpenAIEmbedder
 from agno.models.openai import OpenAIChat
-from agno.vectordb.qdrant import Qdrant
-from qdrant_client.http import models
 from agno.document import Document
 from dotenv import load_dotenv
 from agno.agent import Agent
 import os
+import sys
 
 # Import both prompts from your prompts file
 from prompts import SYSTEM_PROMPT_EXTRACTION, SYSTEM_PROMPT_FACT_CHECKING
 
-
-def create_qdrant_table(
-    table_name: str, embedder: OpenAIEmbedder, vector_db: Qdrant
-) -> None:
-    """
-    Creates a Qdrant collection named 'ExecutiveAssistant' if it doesn't already exist.
-
-    :param table_name: The name of the table to create.
-    :type table_name: str
-    :param embedder: The embedder instance used to get vector dimensions.
-    :type embedder: OpenAIEmbedder
-    :param vector_db: The Qdrant vector database instance.
-    :type vector_db: Qdrant
-    """
-    collections_response = vector_db.client.get_collections()
-    collection_names = [c.name for c in collections_response.collections]
-
-    if table_name not in collection_names:
-        vector_db.client.create_collection(
-            collection_name=table_name,
-            vectors_config=models.VectorParams(
-                size=embedder.dimensions, distance=models.Distance.COSINE
-            ),
-        )
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.ingestion import IngestionManager, read_source
+from shared.vector_store import get_vector_db
 
 
 if __name__ == "__main__":
     load_dotenv()
 
-    INSERT_CHUNKS = True
     WITH_CONTEXT = True
+    MINUTE_FILE = "minute.md"
 
     # We will test with a query that mixes internal data with a public fact.
     QUERY = "What was decided about Project Chimera and what was the competitive threat mentioned by Marcus Thorne?"
 
-    embedder = OpenAIEmbedder(api_key=os.getenv("OPENAI_API_KEY"))
-    vector_db = Qdrant(
-        collection="ExecutiveAssistant", url="http://localhost:6333", embedder=embedder
-    )
+    vector_db = get_vector_db("ExecutiveAssistant")
 
     converter = DocumentConverter()
     splitter = TextSplitter(1000, 200)
 
-    if INSERT_CHUNKS:
-        create_qdrant_table("ExecutiveAssistant", embedder, vector_db)
-
-        result = converter.convert("minute.md")
-        chunks = splitter.chunks(result.document.export_to_markdown())
-        docs = [Document(content=chunk) for chunk in chunks]
-        vector_db.insert(docs)
+    # Ingestion is idempotent: the minute is only converted and embedded again when it changed.
+    ingestion = IngestionManager(vector_db)
+    status = ingestion.ingest(
+        MINUTE_FILE,
+        read_source(MINUTE_FILE),
+        lambda: [Document(content=chunk) for chunk in splitter.chunks(converter.convert(MINUTE_FILE).document.export_to_markdown())],
+        salt="TextSplitter(1000, 200)",
+    )
+    print(f"{MINUTE_FILE}: {status}")
 
     # --- Step 1: Minute Extraction Agent ---
     if WITH_CONTEXT:
@@ -1,12 +1,10 @@
 import os
+import sys
 from dotenv import load_dotenv
 from agno.agent import Agent
 from agno.document import Document
-from agno.embedder.openai import OpenAIEmbedder
 from agno.models.openai import OpenAIChat
-from agno.vectordb.qdrant import Qdrant
 from docling.document_converter import DocumentConverter
-from qdrant_client.http import models
 from semantic_text_splitter import TextSplitter
 from agno.tools.bravesearch import BraveSearchTools
 
@@ -18,53 +16,34 @@ from prompts import (
     PROMPT_SYNTHESIZER,
 )
 
-
-def create_qdrant_table(
-    table_name: str, embedder: OpenAIEmbedder, vector_db: Qdrant
-) -> None:
-    """Creates a Qdrant collection if it doesn't already exist."""
-    collections_response = vector_db.client.get_collections()
-    collection_names = [c.name for c in collections_response.collections]
-
-    if table_name not in collection_names:
-        vector_db.client.create_collection(
-            collection_name=table_name,
-            vectors_config=models.VectorParams(
-                size=embedder.dimensions, distance=models.Distance.COSINE
-            ),
-        )
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from shared.ingestion import IngestionManager, read_source
+from shared.vector_store import get_vector_db
 
 
 if __name__ == "__main__":
     load_dotenv()
 
     # --- CONFIGURATION ---
-    # Set to True on the first run to ingest the document.
-    INSERT_CHUNKS = False
+    DOCUMENTS_FILE = "documents.md"
     QDRANT_COLLECTION = "FactCheckerDB"
     QUERY = "What does the memo say about Apple's Project Titan?"
 
     # --- INITIALIZATION ---
-    embedder = OpenAIEmbedder(api_key=os.getenv("OPENAI_API_KEY"))
-    vector_db = Qdrant(
-        collection=QDRANT_COLLECTION, url="http://localhost:6333", embedder=embedder
-    )
+    # Creates the collection on first use
+    vector_db = get_vector_db(QDRANT_COLLECTION)
     converter = DocumentConverter()
     splitter = TextSplitter(1000, 200)
 
-    # --- DATA INGESTION (Run once) ---
-    if INSERT_CHUNKS:
-        print(f"Creating Qdrant table '{QDRANT_COLLECTION}'...")
-        create_qdrant_table(QDRANT_COLLECTION, embedder, vector_db)
-
-        print("Converting and chunking documents.md...")
-        result = converter.convert("documents.md")
-        chunks = splitter.chunks(result.document.export_to_markdown())
-        docs = [Document(content=chunk) for chunk in chunks]
-
-        print(f"Inserting {len(docs)} chunks into database...")
-        vector_db.insert(docs)
-        print("Ingestion complete.")
+    # --- DATA INGESTION (skipped when documents.md is unchanged) ---
+    ingestion = IngestionManager(vector_db)
+    status = ingestion.ingest(
+        DOCUMENTS_FILE,
+        read_source(DOCUMENTS_FILE),
+        lambda: [Document(content=chunk) for chunk in splitter.chunks(converter.convert(DOCUMENTS_FILE).document.export_to_markdown())],
+        salt="TextSplitter(1000, 200)",
+    )
+    print(f"{DOCUMENTS_FILE}: {status}")
 
     # --- AGENT PIPELINE ---
 
@@ -0,0 +1,4 @@
+"""
+Helpers shared by the numbered projects. A project imports them after adding
+the repository root to sys.path.
+"""
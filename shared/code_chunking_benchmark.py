@@ -0,0 +1,116 @@
+"""
+Compares the prose TextSplitter(1000, 200) the projects used for source code
+with code_splitter.split_code on a folder of code: chunk count, embedded
+tokens and retrieval hit rate.
+
+The hit rate is measured without any API: each documented Python function
+becomes a query (the first line of its docstring) and a local TF-IDF retriever
+ranks the chunks. A query hits when one of the top-k chunks holds the function's
+definition line, and is complete when that chunk holds the whole function.
+Run from the repository root (needs semantic-text-splitter):
+
+    python -m shared.code_chunking_benchmark [folder] [k]
+"""
+import os
+import re
+import ast
+import sys
+import math
+from collections import Counter
+
+from semantic_text_splitter import TextSplitter
+
+from shared.code_splitter import split_code, is_code, source_lines
+from shared.prompt_cache_benchmark import tokenize
+
+WORD_PATTERN = re.compile(r"[A-Za-z]+|\d+")
+SKIPPED_DIRECTORIES = {".git", "node_modules", "__pycache__", ".venv"}
+
+
+def words_of(text: str) -> list[str]:
+    # Splits identifiers too: "parse_invoice" and "parseInvoice" -> "parse", "invoice"
+    return [w.lower() for w in WORD_PATTERN.findall(re.sub(r"([a-z])([A-Z])", r"\1 \2", text))]
+
+def read_sources(folder: str) -> dict[str, str]:
+    sources = {}
+    for directory, subdirectories, file_names in os.walk(folder):
+        subdirectories[:] = sorted(d for d in subdirectories if d not in SKIPPED_DIRECTORIES)
+        for file_name in sorted(file_names):
+            path = os.path.join(directory, file_name)
+            if is_code(path):
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    sources[os.path.relpath(path, folder)] = f.read()
+    return sources
+
+def documented_functions(sources: dict[str, str]) -> list[dict]:
+    """Returns {"path", "query", "def_line", "source"} for every Python function with a docstring."""
+    functions = []
+    for path, source in sources.items():
+        if not path.endswith(".py"):
+            continue
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            continue
+        lines = [line.rstrip("\r\n") for line in source_lines(source)]
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and ast.get_docstring(node):
+                functions.append({
+                    "path": path,
+                    "query": ast.get_docstring(node).strip().splitlines()[0],
+                    "def_line": lines[node.lineno - 1].strip(),
+                    "source": "\n".join(line.strip() for line in lines[node.lineno - 1:node.end_lineno] if line.strip()),
+                })
+    return functions
+
+
+class TfidfIndex:
+    def __init__(self, texts: list[str]):
+        self.vectors = []
+        counts = [Counter(words_of(text)) for text in texts]
+        document_frequency = Counter(word for count in counts for word in count)
+        self.idf = {word: math.log(len(texts) / df) + 1 for word, df in document_frequency.items()}
+        for count in counts:
+            vector = {word: n * self.idf[word] for word, n in count.items()}
+            norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+            self.vectors.append({word: v / norm for word, v in vector.items()})
+
+    def search(self, query: str, k: int) -> list[int]:
+        query_vector = {word: self.idf.get(word, 0.0) for word in words_of(query)}
+        scores = [sum(vector.get(word, 0.0) * weight for word, weight in query_vector.items()) for vector in self.vectors]
+        return sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:k]
+
+
+def evaluate(chunks: list[tuple[str, str]], functions: list[dict], k: int) -> dict:
+    """chunks are (path, text) pairs."""
+    index = TfidfIndex([text for _, text in chunks])
+    normalized = [(path, "\n".join(line.strip() for line in text.splitlines() if line.strip())) for path, text in chunks]
+    hits = complete = 0
+    for function in functions:
+        found = [normalized[i] for i in index.search(function["query"], k)]
+        same_file = [text for path, text in found if path == function["path"]]
+        hits += any(function["def_line"] in text for text in same_file)
+        complete += any(function["source"] in text for text in same_file)
+    return {
+        "chunks": len(chunks),
+        "tokens": sum(len(tokenize(text)) for _, text in chunks),
+        "hit_rate": hits / len(functions) if functions else 0.0,
+        "complete_rate": complete / len(functions) if functions else 0.0,
+    }
+
+def main(folder: str, k: int = 5):
+    sources = read_sources(folder)
+    functions = documented_functions(sources)
+    text_splitter = TextSplitter(1000, 200)
+    layouts = {
+        "TextSplitter(1000, 200)": [(path, chunk) for path, source in sources.items() for chunk in text_splitter.chunks(source)],
+        "split_code(max_chars=1000)": [(path, chunk.text) for path, source in sources.items() for chunk in split_code(source, path)],
+    }
+    print(f"{len(sources)} files, {sum(map(len, sources.values()))} characters, {len(functions)} documented functions as queries, k={k}")
+    print(f"{'splitter':<28}{'chunks':>8}{'tokens':>10}{f'hit@{k}':>9}{f'complete@{k}':>14}")
+    for name, chunks in layouts.items():
+        result = evaluate(chunks, functions, k)
+        print(f"{name:<28}{result['chunks']:>8}{result['tokens']:>10}{result['hit_rate']:>9.0%}{result['complete_rate']:>14.0%}")
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else ".", int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,119 @@
+import re
+import math
+import heapq
+from collections import Counter, defaultdict
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+# "parseHTTPResponse2" -> "parse", "HTTP", "Response", "2"
+WORD_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+# `quoted`, snake_case, camelCase or call-like words in a query
+SYMBOL_PATTERN = re.compile(r"`[^`]+`|\b\w+_\w+\b|\b[a-z]+[A-Z]\w*\b|\b\w+\(")
+# How much more the BM25 ranking counts than the vector one for such queries,
+# whose embedding says little about where the symbol is used
+SYMBOL_LEXICAL_WEIGHT = 3.0
+# Question words that say nothing about the code being looked for ("where is `x` called")
+QUERY_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "of", "to", "in", "on", "for", "with", "by", "from",
+    "what", "where", "which", "who", "how", "why", "does", "do", "did", "can", "i", "me", "my", "it",
+    "called", "used", "defined", "find", "show",
+}
+
+
+def identifier_tokens(text: str) -> list[str]:
+    """
+    Tokenizes code for lexical search: every identifier once whole and once per
+    snake_case/camelCase part, lowercased. "process_and_embed_document" gives
+    "process_and_embed_document", "process", "and", "embed", "document", so a
+    query naming the exact symbol outranks one sharing some of its words.
+    """
+    tokens = []
+    for identifier in IDENTIFIER_PATTERN.findall(text):
+        words = [w.lower() for part in identifier.split("_") for w in WORD_PATTERN.findall(part)]
+        if len(identifier) > 1:
+            tokens.append(identifier.lower())
+        if len(words) > 1:
+            tokens.extend(w for w in words if len(w) > 1)
+    return tokens
+
+
+class BM25Index:
+    """
+    An in-memory inverted index of code chunks scored with Okapi BM25 over
+    identifier_tokens. Chunks are added and removed one at a time, so it follows
+    the vector store as files are indexed; a search only visits the postings of
+    the query's tokens.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # token -> {doc_id: term frequency}
+        self.lengths = {}  # doc_id -> number of tokens
+        self.tokens = {}  # doc_id -> its distinct tokens, to remove it without scanning every posting
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, doc_id, text: str) -> None:
+        """Indexes a chunk, replacing any chunk with the same id."""
+        if doc_id in self.lengths:
+            self.remove(doc_id)
+        counts = Counter(identifier_tokens(text))
+        for token, count in counts.items():
+            self.postings[token][doc_id] = count
+        self.tokens[doc_id] = list(counts)
+        self.lengths[doc_id] = sum(counts.values())
+        self.total_length += self.lengths[doc_id]
+
+    def remove(self, doc_id) -> None:
+        length = self.lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for token in self.tokens.pop(doc_id):
+            del self.postings[token][doc_id]
+            if not self.postings[token]:
+                del self.postings[token]
+
+    def search(self, query: str, limit: int = 10) -> list[tuple]:
+        """Returns the (doc_id, score) of the limit best-scoring chunks that share a token with the query."""
+        if not self.lengths:
+            return []
+        count = len(self.lengths)
+        average_length = self.total_length / count or 1.0
+        scores = defaultdict(float)
+        for token in set(identifier_tokens(query)) - QUERY_STOPWORDS:
+            docs = self.postings.get(token)
+            if not docs:
+                continue
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, frequency in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def names_symbol(query: str) -> bool:
+    """Whether the query names a code symbol, e.g. "where is `parse` called" or "who calls load_config"."""
+    return SYMBOL_PATTERN.search(query) is not None
+
+def fusion_weights(query: str) -> list[float]:
+    """Weights of the (vector, BM25) rankings for reciprocal_rank_fusion."""
+    return [1.0, SYMBOL_LEXICAL_WEIGHT if names_symbol(query) else 1.0]
+
+def reciprocal_rank_fusion(rankings: list[list], k: int = 60, limit: int = None, weights: list[float] = None) -> list[tuple]:
+    """
+    Fuses rankings of ids (best first) into one, scoring each id by the sum of
+    weight / (k + rank) over the rankings it appears in. Only ranks matter, so
+    BM25 and cosine scores need no calibration against each other.
+
+    :param weights: One per ranking, 1 by default.
+    :return: (id, fused score) pairs, best first.
+    """
+    scores = defaultdict(float)
+    for ranking, weight in zip(rankings, weights or [1.0] * len(rankings)):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += weight / (k + rank)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return fused[:limit] if limit else fused
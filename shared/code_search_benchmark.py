@@ -0,0 +1,156 @@
+"""
+Compares vector, BM25 (code_search.BM25Index) and hybrid (reciprocal rank
+fusion of both) retrieval over the chunks split_code makes of a folder of code:
+recall@k and query latency.
+
+Two kinds of queries are generated from the Python files, with ground truth
+from the ast module:
+    definition  the first docstring line of a function; relevant: the chunk holding its def line
+    call site   "where is `name` called"; relevant: every chunk with a call to name
+Definition queries quote the docstring, which the chunk contains, so they
+flatter BM25; users paraphrase. Call-site queries are where lexical search is
+needed: the chunks that call a function rarely embed close to the question.
+
+Vectors come from OpenAI's text-embedding-3-small when OPENAI_API_KEY is set.
+Otherwise a hashed character-trigram embedding stands in for them, which is
+far weaker than a real model on definition queries; the printout says which
+was used. Run from the repository root (needs numpy and semantic-text-splitter):
+
+    python -m shared.code_search_benchmark [folder] [k]
+"""
+import os
+import re
+import ast
+import sys
+import time
+import hashlib
+import tempfile
+from typing import NamedTuple
+
+import numpy as np
+
+from shared.code_splitter import split_code
+from shared.code_search import BM25Index, reciprocal_rank_fusion, fusion_weights
+from shared.code_chunking_benchmark import read_sources
+from shared.local_vector_store import LocalVectorDb
+
+CANDIDATES = 20  # per ranking before fusion, as in CodeAssistant
+STAND_IN_DIMENSIONS = 512
+MAX_CALL_QUERIES = 200
+
+
+class Chunk(NamedTuple):
+    # The fields LocalVectorDb.add reads from an agno Document, plus where the chunk is
+    content: str
+    name: str
+    meta_data: dict
+    path: str
+    start_line: int
+    end_line: int
+
+
+def chunk_sources(sources: dict[str, str]) -> list[Chunk]:
+    return [
+        Chunk(chunk.text, chunk.name, {"source": path}, path, chunk.start_line, chunk.end_line)
+        for path, source in sources.items() for chunk in split_code(source, path)
+    ]
+
+def chunks_at(chunks: list[Chunk], path: str, line: int) -> set[int]:
+    return {i for i, chunk in enumerate(chunks) if chunk.path == path and chunk.start_line <= line <= chunk.end_line}
+
+def build_queries(sources: dict[str, str], chunks: list[Chunk]) -> dict[str, list[tuple[str, set[int]]]]:
+    """Returns {"definition": [(query, relevant chunk indices)], "call site": [...]}."""
+    definitions, calls, defined = [], {}, set()
+    for path, source in sources.items():
+        if not path.endswith(".py"):
+            continue
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                defined.add(node.name)
+                relevant = chunks_at(chunks, path, node.lineno)
+                if ast.get_docstring(node) and relevant:
+                    definitions.append((ast.get_docstring(node).strip().splitlines()[0], relevant))
+            elif isinstance(node, ast.Call):
+                name = node.func.id if isinstance(node.func, ast.Name) else getattr(node.func, "attr", None)
+                if name:
+                    calls.setdefault(name, set()).update(chunks_at(chunks, path, node.lineno))
+    # Functions of the corpus with a distinctive name, called from 1 to 10 chunks
+    call_sites = [
+        (f"where is `{name}` called", relevant) for name, relevant in sorted(calls.items())
+        if name in defined and len(name) >= 6 and not name.startswith("__") and 1 <= len(relevant) <= 10
+    ]
+    return {"definition": definitions, "call site": call_sites[:MAX_CALL_QUERIES]}
+
+
+def stand_in_embeddings(texts: list[str]) -> np.ndarray:
+    vectors = np.zeros((len(texts), STAND_IN_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        text = re.sub(r"\s+", " ", text.lower())
+        for i in range(len(text) - 2):
+            vectors[row, int(hashlib.md5(text[i:i + 3].encode()).hexdigest()[:8], 16) % STAND_IN_DIMENSIONS] += 1
+    return vectors
+
+def openai_embeddings(texts: list[str]) -> np.ndarray:
+    from openai import OpenAI
+
+    client = OpenAI()
+    vectors = []
+    for start in range(0, len(texts), 256):
+        response = client.embeddings.create(input=texts[start:start + 256], model="text-embedding-3-small")
+        vectors += [item.embedding for item in response.data]
+    return np.array(vectors, dtype=np.float32)
+
+
+def recall_at(ranking: list[int], relevant: set[int], k: int) -> float:
+    return len(set(ranking[:k]) & relevant) / min(len(relevant), k)
+
+def main(folder: str, k: int = 5):
+    sources = read_sources(folder)
+    chunks = chunk_sources(sources)
+    queries = build_queries(sources, chunks)
+    embed = openai_embeddings if os.getenv("OPENAI_API_KEY") else stand_in_embeddings
+
+    lexical = BM25Index()
+    start = time.perf_counter()
+    for i, chunk in enumerate(chunks):
+        lexical.add(i, f"{chunk.path} {chunk.name}\n{chunk.content}")
+    bm25_build = time.perf_counter() - start
+
+    chunk_vectors = embed([chunk.content for chunk in chunks])
+    with tempfile.TemporaryDirectory() as directory:
+        vector_db = LocalVectorDb(directory, dimensions=chunk_vectors.shape[1])
+        vector_db.add(chunks, chunk_vectors, [str(i) for i in range(len(chunks))])
+        print(f"{len(sources)} files, {len(chunks)} chunks, vectors: {'text-embedding-3-small' if embed is openai_embeddings else 'hashed trigram stand-in'}, "
+              f"BM25 index built in {bm25_build * 1000:.0f} ms, k={k}")
+        print(f"{'queries':<20}{'retrieval':<10}{f'recall@{k}':>10}{'p50 ms':>9}{'p95 ms':>9}")
+
+        for kind, pairs in queries.items():
+            query_vectors = embed([query for query, _ in pairs])
+            results = {"vector": ([], []), "bm25": ([], []), "hybrid": ([], [])}
+            for (query, relevant), query_vector in zip(pairs, query_vectors):
+                start = time.perf_counter()
+                vector_ranking = [row for row, _ in vector_db.top_k(query_vector, CANDIDATES)]
+                vector_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                bm25_ranking = [doc_id for doc_id, _ in lexical.search(query, CANDIDATES)]
+                bm25_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                hybrid_ranking = [doc_id for doc_id, _ in reciprocal_rank_fusion([vector_ranking, bm25_ranking], limit=k, weights=fusion_weights(query))]
+                # Hybrid runs both searches, then fuses
+                hybrid_seconds = vector_seconds + bm25_seconds + time.perf_counter() - start
+                for name, ranking, seconds in (
+                    ("vector", vector_ranking, vector_seconds), ("bm25", bm25_ranking, bm25_seconds), ("hybrid", hybrid_ranking, hybrid_seconds),
+                ):
+                    results[name][0].append(recall_at(ranking, relevant, k))
+                    results[name][1].append(seconds * 1000)
+            for name, (recalls, milliseconds) in results.items():
+                label = f"{kind} ({len(pairs)})" if name == "vector" else ""
+                print(f"{label:<20}{name:<10}{np.mean(recalls):>10.0%}{np.percentile(milliseconds, 50):>9.2f}{np.percentile(milliseconds, 95):>9.2f}")
+        del vector_db
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else ".", int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,242 @@
+import ast
+import os
+import re
+from typing import NamedTuple
+
+# Languages chunked with tree-sitter when tree_sitter_languages is installed
+TREE_SITTER_LANGUAGES = {
+    ".js": "javascript", ".ts": "typescript", ".java": "java", ".go": "go", ".rs": "rust",
+    ".rb": "ruby", ".php": "php", ".c": "c", ".h": "c", ".cpp": "cpp", ".cs": "c_sharp",
+}
+# Node types whose name goes into the qualified name, per tree-sitter grammar
+TREE_SITTER_DEFINITIONS = {
+    "function_declaration", "function_definition", "method_definition", "method_declaration",
+    "class_declaration", "class_definition", "class_specifier", "struct_item", "impl_item",
+    "function_item", "interface_declaration", "constructor_declaration", "method", "class", "module",
+}
+# A line with its ending. Only \r\n, \r and \n end a line, as for ast's line
+# numbers; str.splitlines also breaks on \f, \x1c, \u2028... and would shift them.
+LINE_PATTERN = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+$")
+
+
+class CodeChunk(NamedTuple):
+    text: str
+    name: str  # qualified names ("Parser.parse", "Parser.parse, Parser.close"), or "" for module-level code
+    kind: str  # "function", "class", "module", "text", or "mixed" for several kinds
+    start_line: int  # 1-based, inclusive
+    end_line: int
+
+    def metadata(self) -> dict:
+        return {"name": self.name, "kind": self.kind, "start_line": self.start_line, "end_line": self.end_line}
+
+
+def source_lines(source: str) -> list[str]:
+    """Splits source into lines numbered like the parsers number them, keeping the line endings."""
+    return LINE_PATTERN.findall(source)
+
+def pack_lines(lines: list[str], first_line: int, max_chars: int, name: str = "", kind: str = "text") -> list[CodeChunk]:
+    """
+    Packs lines into chunks of at most max_chars, without overlap, cutting at the
+    last blank line before the limit when there is one. A single longer line is
+    cut at max_chars.
+    """
+    chunks, buffer, size, last_blank = [], [], 0, -1
+    start = first_line
+
+    def flush(count: int):
+        nonlocal buffer, size, last_blank, start
+        text = "".join(buffer[:count])
+        if text.strip():
+            chunks.append(CodeChunk(text.rstrip("\n"), name, kind, start, start + count - 1))
+        start += count
+        buffer = buffer[count:]
+        size = sum(map(len, buffer))
+        last_blank = max((i for i, line in enumerate(buffer) if not line.strip()), default=-1)
+
+    for line in lines:
+        while len(line) > max_chars:
+            if buffer:
+                flush(len(buffer))
+            chunks.append(CodeChunk(line[:max_chars], name, kind, start, start))
+            line = line[max_chars:]
+        if size + len(line) > max_chars and buffer:
+            flush(last_blank + 1 if last_blank > 0 else len(buffer))
+        buffer.append(line)
+        size += len(line)
+        if not line.strip():
+            last_blank = len(buffer) - 1
+    if buffer:
+        flush(len(buffer))
+    return chunks
+
+
+def merge_small(chunks: list[CodeChunk], max_chars: int) -> list[CodeChunk]:
+    """
+    Packs consecutive chunks together while they fit in max_chars, so small
+    functions do not each become a chunk of their own. No chunk is ever cut.
+    """
+    merged = []
+    for chunk in chunks:
+        previous = merged[-1] if merged else None
+        if previous and len(previous.text) + 2 + len(chunk.text) <= max_chars:
+            names = [n for n in dict.fromkeys(previous.name.split(", ") + chunk.name.split(", ")) if n]
+            merged[-1] = CodeChunk(
+                f"{previous.text}\n\n{chunk.text}",
+                ", ".join(names),
+                previous.kind if previous.kind == chunk.kind else "mixed",
+                previous.start_line,
+                chunk.end_line,
+            )
+        else:
+            merged.append(chunk)
+    return merged
+
+
+class PythonChunker:
+    """Chunks Python source at function and class boundaries using the ast module."""
+
+    def __init__(self, source: str, max_chars: int):
+        self.lines = source_lines(source)
+        self.max_chars = max_chars
+        self.chunks = []
+
+    def span(self, node) -> tuple[int, int]:
+        decorators = getattr(node, "decorator_list", [])
+        start = min([node.lineno] + [d.lineno for d in decorators])
+        return start, node.end_lineno
+
+    def text(self, start: int, end: int) -> str:
+        return "".join(self.lines[start - 1:end])
+
+    def add(self, start: int, end: int, name: str, kind: str) -> None:
+        text = self.text(start, end)
+        if not text.strip():
+            return
+        if len(text) <= self.max_chars:
+            self.chunks.append(CodeChunk(text.rstrip("\n"), name, kind, start, end))
+        else:
+            self.chunks += pack_lines(self.lines[start - 1:end], start, self.max_chars, name, kind)
+
+    def visit_body(self, body: list, first_line: int, last_line: int, prefix: str, kind: str) -> None:
+        """
+        Emits one chunk per definition in body and packs the statements between
+        them (imports, constants, a class's attributes) into chunks named after the
+        enclosing scope.
+        """
+        cursor = first_line
+        for node in body:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            start, end = self.span(node)
+            self.add(cursor, start - 1, prefix, kind)
+            self.visit_definition(node, start, end, f"{prefix}.{node.name}" if prefix else node.name)
+            cursor = end + 1
+        self.add(cursor, last_line, prefix, kind)
+
+    def visit_definition(self, node, start: int, end: int, name: str) -> None:
+        kind = "class" if isinstance(node, ast.ClassDef) else "function"
+        if len(self.text(start, end)) <= self.max_chars:
+            self.add(start, end, name, kind)
+        elif isinstance(node, ast.ClassDef) and node.body:
+            # Too big for one chunk: the class line, docstring and attributes, then each method.
+            self.visit_body(node.body, start, end, name, kind)
+        else:
+            self.add(start, end, name, kind)
+
+    def split(self) -> list[CodeChunk]:
+        tree = ast.parse("".join(self.lines))
+        self.visit_body(tree.body, 1, len(self.lines), "", "module")
+        return self.chunks
+
+
+def split_with_tree_sitter(source: str, language: str, max_chars: int) -> list[CodeChunk]:
+    """
+    Chunks source at the top-level definitions found by a tree-sitter grammar,
+    descending into a definition (e.g. a class's methods) only when it is too big.
+    """
+    from tree_sitter_languages import get_parser
+
+    data = source.encode("utf-8")
+    lines = source_lines(source)
+    chunks = []
+
+    def definition_of(node):
+        """Returns the definition node (unwrapping "export ..."), or None if node is not a definition."""
+        if node.type == "export_statement" and node.child_by_field_name("declaration") is not None:
+            node = node.child_by_field_name("declaration")
+        if node.type in TREE_SITTER_DEFINITIONS and node.child_by_field_name("name") is not None:
+            return node
+        return None
+
+    def add(start: int, end: int, name: str, kind: str) -> None:
+        text = "".join(lines[start - 1:end])
+        if not text.strip():
+            return
+        if len(text) <= max_chars:
+            chunks.append(CodeChunk(text.rstrip("\n"), name, kind, start, end))
+        else:
+            chunks.extend(pack_lines(lines[start - 1:end], start, max_chars, name, kind))
+
+    def visit(node, first_line: int, last_line: int, prefix: str) -> None:
+        cursor = first_line
+        gap_kind = "class" if prefix else "module"
+        for child in node.named_children:
+            definition = definition_of(child)
+            # Anything else is packed with the code between definitions
+            if definition is None:
+                continue
+            name_node = definition.child_by_field_name("name")
+            name = data[name_node.start_byte:name_node.end_byte].decode("utf-8", errors="replace")
+            name = f"{prefix}.{name}" if prefix else name
+            start, end = child.start_point[0] + 1, child.end_point[0] + 1
+            add(cursor, start - 1, prefix, gap_kind)
+            kind = "class" if "class" in definition.type or "impl" in definition.type else "function"
+            body = definition.child_by_field_name("body")
+            if kind == "class" and body is not None and child.end_byte - child.start_byte > max_chars:
+                visit(body, start, end, name)
+            else:
+                add(start, end, name, kind)
+            cursor = end + 1
+        add(cursor, last_line, prefix, gap_kind)
+
+    tree = get_parser(language).parse(data)
+    visit(tree.root_node, 1, len(lines), "")
+    return chunks
+
+
+def split_code(source: str, path: str, max_chars: int = 1000) -> list[CodeChunk]:
+    """
+    Splits source code into chunks that follow function and class boundaries.
+
+    Python is parsed with ast; other languages with tree-sitter when the optional
+    tree_sitter_languages package is installed. Anything else, or a file that does
+    not parse, is packed line by line, preferring blank lines as cut points.
+    A definition is only cut when it alone is bigger than max_chars; small ones
+    are packed together. Chunks do not overlap and carry the qualified names of
+    the definitions they hold.
+
+    Args:
+        source: The file contents.
+        path: The file name or path, used to pick the language.
+        max_chars: Chunks are at most this long; bigger definitions are split
+            (a class into its methods, a function into line-packed parts).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".py":
+        try:
+            return merge_small(PythonChunker(source, max_chars).split(), max_chars)
+        except SyntaxError:
+            pass
+    elif extension in TREE_SITTER_LANGUAGES:
+        try:
+            return merge_small(split_with_tree_sitter(source, TREE_SITTER_LANGUAGES[extension], max_chars), max_chars)
+        except ImportError:
+            pass
+        except Exception as e:
+            print(f"tree-sitter could not chunk {path}: {e}")
+    return pack_lines(source_lines(source), 1, max_chars)
+
+def is_code(path: str) -> bool:
+    """Whether split_code knows the syntax of the file, as opposed to prose such as .md."""
+    extension = os.path.splitext(path)[1].lower()
+    return extension == ".py" or extension in TREE_SITTER_LANGUAGES
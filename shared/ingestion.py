@@ -0,0 +1,128 @@
+import hashlib
+import urllib.request
+from typing import Callable
+
+from qdrant_client.http import models
+
+# agno's Qdrant stores Document.meta_data under the "meta_data" payload key
+SOURCE_KEY = "meta_data.source"
+HASH_KEY = "meta_data.source_hash"
+
+
+def content_hash(content, salt: str = "") -> str:
+    """
+    Hashes the raw content of a source. salt should hold whatever else shapes the
+    stored chunks (e.g. the splitter settings), so that changing it re-ingests.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(salt.encode("utf-8") + b"\0" + content).hexdigest()
+
+def read_source(location: str, timeout: float = 30) -> bytes:
+    """Reads a local file or downloads an http(s) URL."""
+    if location.startswith(("http://", "https://")):
+        with urllib.request.urlopen(location, timeout=timeout) as response:
+            return response.read()
+    with open(location, "rb") as f:
+        return f.read()
+
+
+class IngestionManager:
+    """
+    Makes ingestion into an agno Qdrant collection idempotent.
+
+    Every chunk is stored with the id of its source (a file path or URL) and the
+    hash of the source's content, in its meta_data. On start, a source whose
+    stored hash matches is skipped without converting or embedding anything; a
+    changed one is re-ingested and its old chunks deleted. There is no flag to
+    flip and no sidecar file to keep in sync: deleting the collection resets it.
+
+    A LocalVectorDb (shared.local_vector_store) keeps the same payloads and
+    answers the source lookups itself.
+    """
+
+    def __init__(self, vector_db):
+        self.vector_db = vector_db
+        self.local = not hasattr(vector_db, "client")
+        if self.local:
+            return
+        self.client = vector_db.client
+        self.collection = vector_db.collection
+        self.client.create_payload_index(self.collection, SOURCE_KEY, field_schema=models.PayloadSchemaType.KEYWORD)
+
+    def source_filter(self, source: str, keep_hash: str = None, only_hash: str = None) -> models.Filter:
+        """Matches the chunks of a source, except those with keep_hash, or only those with only_hash."""
+        must = [models.FieldCondition(key=SOURCE_KEY, match=models.MatchValue(value=source))]
+        if only_hash:
+            must.append(models.FieldCondition(key=HASH_KEY, match=models.MatchValue(value=only_hash)))
+        return models.Filter(
+            must=must,
+            must_not=[models.FieldCondition(key=HASH_KEY, match=models.MatchValue(value=keep_hash))] if keep_hash else None,
+        )
+
+    def stored_hash(self, source: str):
+        """Returns the content hash the source was ingested with, or None."""
+        if self.local:
+            return self.vector_db.stored_hash(source)
+        points, _ = self.client.scroll(
+            self.collection, scroll_filter=self.source_filter(source), limit=1,
+            with_payload=[HASH_KEY], with_vectors=False,
+        )
+        return points[0].payload.get("meta_data", {}).get("source_hash") if points else None
+
+    def stored_hashes(self) -> dict[str, str]:
+        """Returns {source: hash} for the whole collection, in one pass (for sources with many files)."""
+        if self.local:
+            return self.vector_db.stored_hashes()
+        hashes, offset = {}, None
+        while True:
+            points, offset = self.client.scroll(
+                self.collection, limit=1000, offset=offset,
+                with_payload=[SOURCE_KEY, HASH_KEY], with_vectors=False,
+            )
+            for point in points:
+                meta_data = point.payload.get("meta_data", {})
+                if meta_data.get("source"):
+                    hashes[meta_data["source"]] = meta_data.get("source_hash")
+            if offset is None:
+                return hashes
+
+    def delete_source(self, source: str, keep_hash: str = None, only_hash: str = None) -> None:
+        """
+        Deletes the chunks of a source: only its stale ones when keep_hash is
+        given, only those of one version when only_hash is given.
+        """
+        if self.local:
+            return self.vector_db.delete_source(source, keep_hash, only_hash)
+        self.client.delete(self.collection, points_selector=models.FilterSelector(filter=self.source_filter(source, keep_hash, only_hash)))
+
+    def ingest(self, source: str, content, build_documents: Callable, salt: str = "") -> str:
+        """
+        Ingests one source unless it is already stored with the same content.
+
+        :param source: The source id, e.g. its path or URL.
+        :param content: The raw content (bytes or str) the hash is computed from.
+        :param build_documents: Called only when the source is new or changed; returns its agno Documents.
+        :param salt: See content_hash.
+        :return: "unchanged", "added" or "replaced".
+        """
+        digest = content_hash(content, salt)
+        stored = self.stored_hash(source)
+        if stored == digest:
+            # A run stopped between the insert and the delete below left old chunks next to the new ones
+            self.delete_source(source, keep_hash=digest)
+            return "unchanged"
+
+        docs = build_documents()
+        for doc in docs:
+            doc.meta_data = {**(doc.meta_data or {}), "source": source, "source_hash": digest}
+        try:
+            self.vector_db.insert(docs)
+        except Exception:
+            # Part of the new version may be stored; its hash would make the next run skip the rest
+            self.delete_source(source, only_hash=digest)
+            raise
+        # Old chunks go only once the new ones are in, so the source is never missing
+        if stored is not None:
+            self.delete_source(source, keep_hash=digest)
+        return "added" if stored is None else "replaced"
@@ -0,0 +1,266 @@
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+
+# Rows scored per matrix product, so a search over millions of vectors never
+# pages more than this block of the memory map at once.
+SEARCH_BLOCK_ROWS = 65536
+
+
+class LocalVectorDb:
+    """
+    An in-process vector store with the insert/search interface of agno's Qdrant,
+    for collections small enough not to need a server (and for runs without Docker).
+
+    Files in the index directory:
+        vectors.f32     float32 matrix of L2-normalised embeddings, memory-mapped
+        payloads.jsonl  append-only log: {"row", "id", "name", "meta_data", "content"}
+                        for every upsert and {"row", "deleted": true} for every delete
+        meta.json       dimensions, row count and capacity
+
+    Cosine similarity is a dot product of normalised vectors. Search is exact
+    (brute force, in blocks) unless build_ivf was called, in which case only the
+    nprobe clusters closest to the query are scored.
+    """
+
+    def __init__(self, path: str, embedder=None, dimensions: int = None):
+        self.path = path
+        self.embedder = embedder
+        os.makedirs(path, exist_ok=True)
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.payloads_path = os.path.join(path, "payloads.jsonl")
+        self.meta_path = os.path.join(path, "meta.json")
+
+        meta = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        self.dimensions = meta.get("dimensions") or dimensions or getattr(embedder, "dimensions", None)
+        if not self.dimensions:
+            raise ValueError("The number of dimensions is needed to create a new index.")
+        self.count = meta.get("count", 0)
+        self.capacity = meta.get("capacity", 0)
+        self.matrix = self.open_matrix(self.capacity) if self.capacity else np.zeros((0, self.dimensions), dtype=np.float32)
+
+        self.payloads = {}  # row -> payload
+        self.rows = {}  # id -> row
+        if os.path.exists(self.payloads_path):
+            with open(self.payloads_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a crash; the vector row it belongs to is simply unused.
+                        continue
+                    if record["row"] >= self.count:
+                        # Logged after the last saved count, so its vector may never have reached the disk
+                        continue
+                    self.apply(record)
+        self.payloads_file = open(self.payloads_path, "a", encoding="utf-8")
+        self.ivf = None
+        # Writers may be several embedding threads (see CodebaseBot's indexing pipeline)
+        self.lock = threading.Lock()
+
+    # --- storage ---
+
+    def open_matrix(self, capacity: int) -> np.memmap:
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimensions))
+
+    def grow(self, needed: int) -> None:
+        """Doubles the vector file until it holds needed rows."""
+        capacity = max(self.capacity, 1024)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        if isinstance(self.matrix, np.memmap):
+            self.matrix.flush()
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dimensions * 4)
+        self.capacity = capacity
+        self.matrix = self.open_matrix(capacity)
+
+    def apply(self, record: dict) -> None:
+        row = record["row"]
+        previous = self.payloads.pop(row, None)
+        if previous is not None:
+            self.rows.pop(previous["id"], None)
+        if not record.get("deleted"):
+            self.payloads[row] = record
+            self.rows[record["id"]] = row
+
+    def log(self, record: dict) -> None:
+        self.apply(record)
+        self.payloads_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def save(self) -> None:
+        """Flushes vectors, then payloads, then the row count, so a crash never points at unwritten rows."""
+        if isinstance(self.matrix, np.memmap):
+            self.matrix.flush()
+        self.payloads_file.flush()
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dimensions": self.dimensions, "count": self.count, "capacity": self.capacity}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    # --- writing ---
+
+    def add(self, documents: list, embeddings, ids: list[str] = None) -> None:
+        """
+        Stores documents with precomputed embeddings. A document whose id is
+        already stored is replaced in place, and so is one whose id comes again
+        later in the batch. Ids default to the md5 of the content, like agno's Qdrant.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(documents), self.dimensions)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        ids = ids or [hashlib.md5(doc.content.encode()).hexdigest() for doc in documents]
+        # The last occurrence of each id wins, as with successive upserts
+        last = {point_id: i for i, point_id in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            documents, vectors, ids = [documents[i] for i in keep], vectors[keep], [ids[i] for i in keep]
+
+        with self.lock:
+            rows = []
+            for point_id in ids:
+                if point_id in self.rows:
+                    rows.append(self.rows[point_id])
+                else:
+                    rows.append(self.count)
+                    self.count += 1
+            self.grow(self.count)
+            self.matrix[rows] = vectors
+            for doc, point_id, row in zip(documents, ids, rows):
+                self.log({"row": row, "id": point_id, "name": doc.name, "meta_data": doc.meta_data or {}, "content": doc.content})
+            self.ivf = None
+            self.save()
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        response = self.embedder.client.embeddings.create(input=texts, model=self.embedder.id)
+        return [item.embedding for item in response.data]
+
+    def insert(self, documents: list, filters: dict = None, batch_size: int = 256) -> None:
+        """Embeds (batch_size texts per request) and stores agno Documents. filters is accepted for agno compatibility."""
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            self.add(batch, self.embed([doc.content for doc in batch]))
+
+    upsert = insert
+
+    def delete_rows(self, rows: list[int]) -> None:
+        if not rows:
+            return
+        with self.lock:
+            for row in rows:
+                self.log({"row": row, "deleted": True})
+            self.ivf = None
+            self.save()
+
+    # --- searching ---
+
+    def build_ivf(self, n_lists: int = None, iterations: int = 10, seed: int = 0) -> None:
+        """
+        Clusters the stored vectors with spherical k-means (n_lists defaults to
+        sqrt(rows)) so searches only score the clusters nearest to the query.
+        Any later write drops the clusters and search goes back to brute force.
+        """
+        live = np.array(sorted(self.payloads), dtype=np.int64)
+        if len(live) == 0:
+            return
+        n_lists = min(n_lists or max(1, int(np.sqrt(len(live)))), len(live))
+        rng = np.random.default_rng(seed)
+        # k-means runs on a sample of 64 vectors per cluster, in memory
+        sample = np.array(self.matrix[np.sort(rng.choice(live, size=min(len(live), n_lists * 64), replace=False))])
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(n_lists):
+                members = sample[assignment == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[cluster] = centroid / max(np.linalg.norm(centroid), 1e-12)
+        assignments = np.concatenate([
+            np.argmax(self.matrix[live[start:start + SEARCH_BLOCK_ROWS]] @ centroids.T, axis=1)
+            for start in range(0, len(live), SEARCH_BLOCK_ROWS)
+        ])
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        self.ivf = (centroids, [live[order[bounds[i]:bounds[i + 1]]] for i in range(n_lists)])
+
+    def top_k(self, vector, limit: int = 5, nprobe: int = 8) -> list[tuple[int, float]]:
+        """Returns (row, cosine similarity) of the limit closest live rows."""
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(np.linalg.norm(query), 1e-12)
+        if self.ivf is not None:
+            centroids, lists = self.ivf
+            probes = np.argsort(-(centroids @ query))[:nprobe]
+            blocks = [lists[cluster] for cluster in probes]
+        else:
+            blocks = [np.arange(start, min(start + SEARCH_BLOCK_ROWS, self.count)) for start in range(0, self.count, SEARCH_BLOCK_ROWS)]
+
+        deleted = None
+        if len(self.payloads) < self.count:
+            deleted = np.ones(self.count, dtype=bool)
+            deleted[list(self.payloads)] = False
+
+        best_rows, best_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        for rows in blocks:
+            if len(rows) == 0:
+                continue
+            contiguous = rows[-1] - rows[0] + 1 == len(rows)
+            scores = self.matrix[rows[0]:rows[-1] + 1] @ query if contiguous else self.matrix[rows] @ query
+            if deleted is not None:
+                scores[deleted[rows]] = -np.inf
+            keep = min(limit, len(scores))
+            candidates = np.argpartition(-scores, keep - 1)[:keep]
+            best_rows = np.concatenate([best_rows, rows[candidates]])
+            best_scores = np.concatenate([best_scores, scores[candidates]])
+        order = np.argsort(-best_scores)[:limit]
+        return [(int(best_rows[i]), float(best_scores[i])) for i in order if np.isfinite(best_scores[i])]
+
+    def search(self, query: str, limit: int = 5, filters: dict = None) -> list:
+        """
+        Returns the agno Documents closest to the query, like agno's Qdrant.search.
+
+        :param filters: Optional meta_data values the results must have, e.g. {"path": "main.py"}.
+        """
+        from agno.document import Document
+
+        vector = self.embedder.get_embedding(query)
+        # Filtered searches look further down the ranking, then filter.
+        hits = self.top_k(vector, limit * 10 if filters else limit)
+        documents = []
+        for row, score in hits:
+            payload = self.payloads[row]
+            if filters and any(payload["meta_data"].get(key) != value for key, value in filters.items()):
+                continue
+            documents.append(Document(
+                id=payload["id"], name=payload["name"], meta_data=payload["meta_data"],
+                content=payload["content"], embedder=self.embedder,
+            ))
+        return documents[:limit]
+
+    # --- shared.ingestion support ---
+
+    def source_rows(self, source: str) -> list[int]:
+        return [row for row, payload in self.payloads.items() if payload["meta_data"].get("source") == source]
+
+    def stored_hash(self, source: str):
+        rows = self.source_rows(source)
+        return self.payloads[rows[0]]["meta_data"].get("source_hash") if rows else None
+
+    def stored_hashes(self) -> dict[str, str]:
+        return {
+            payload["meta_data"]["source"]: payload["meta_data"].get("source_hash")
+            for payload in self.payloads.values() if payload["meta_data"].get("source")
+        }
+
+    def delete_source(self, source: str, keep_hash: str = None, only_hash: str = None) -> None:
+        self.delete_rows([
+            row for row in self.source_rows(source)
+            if (keep_hash is None or self.payloads[row]["meta_data"].get("source_hash") != keep_hash)
+            and (only_hash is None or self.payloads[row]["meta_data"].get("source_hash") == only_hash)
+        ])
@@ -0,0 +1,160 @@
+"""
+Measures how much of each request a provider-side prompt cache could reuse,
+with the prompts sent the old way (the whole formatted template as one message)
+and split by prompt_layout (static system prefix + variable user suffix).
+
+No API is called: PrefixCacheStub plays the provider, remembering every request
+it has seen and counting, for each new one, the leading tokens it shares with
+an earlier request. Run from the repository root:
+
+    python -m shared.prompt_cache_benchmark
+"""
+import os
+import re
+import glob
+import json
+import importlib.util
+
+from shared.prompt_layout import build_messages, split_prompt
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# OpenAI only caches prompts of at least 1024 tokens, in steps of 128 tokens
+MIN_CACHED_TOKENS = 1024
+CACHE_STEP_TOKENS = 128
+
+try:
+    import tiktoken
+    ENCODING = tiktoken.get_encoding("o200k_base")
+    def tokenize(text: str) -> list:
+        return ENCODING.encode(text)
+except ImportError:
+    # Close enough to BPE for comparing layouts: words, numbers, punctuation and whitespace runs
+    TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s+")
+    def tokenize(text: str) -> list:
+        return TOKEN_PATTERN.findall(text)
+
+
+def load_module(relative_path: str, name: str):
+    """Loads a project's prompts file by path, since several projects have a prompts.py."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def legacy_messages(template: str, **values) -> list[dict]:
+    return [{"role": "user", "content": template.format(**values)}]
+
+def legacy_url_reader_messages(template: str, query: str, urls: str) -> list[dict]:
+    """
+    PROMPT_URL_READER as it was sent before: the query interpolated into the
+    middle of the system prompt's guidelines and the URLs as the user message.
+    """
+    system = split_prompt(template).system.replace(
+        "directly relevant to the original query.", f'directly relevant to the original query: "{query}".'
+    )
+    return [{"role": "system", "content": system}, {"role": "user", "content": urls}]
+
+
+class PrefixCacheStub:
+    """A stand-in for the provider's prefix cache, keyed on the serialized token stream."""
+
+    def __init__(self):
+        self.seen = []
+
+    @staticmethod
+    def serialize(messages: list[dict]) -> list:
+        tokens = []
+        for message in messages:
+            tokens += [f"<|{message['role']}|>"] + tokenize(message["content"]) + ["<|end|>"]
+        return tokens
+
+    def call(self, messages: list[dict]) -> tuple[int, int, int]:
+        """
+        Returns (prompt tokens, reusable prefix tokens, tokens a provider would bill as cached).
+        """
+        tokens = self.serialize(messages)
+        reusable = 0
+        for previous in self.seen:
+            shared = 0
+            for a, b in zip(tokens, previous):
+                if a != b:
+                    break
+                shared += 1
+            reusable = max(reusable, shared)
+        self.seen.append(tokens)
+        cached = 0
+        if reusable >= MIN_CACHED_TOKENS:
+            cached = MIN_CACHED_TOKENS + (reusable - MIN_CACHED_TOKENS) // CACHE_STEP_TOKENS * CACHE_STEP_TOKENS
+        return len(tokens), reusable, cached
+
+
+def workloads() -> dict:
+    """Returns, per prompt, the template, the values of a series of calls and the old message builder."""
+    invoice_prompts = load_module("5/InvoiceParser/prompt.py", "invoice_prompt")
+    verifier_prompts = load_module("5/HallucinationVerifier/prompts.py", "verifier_prompts")
+    checker_prompts = load_module("11/FactChecker/prompts.py", "checker_prompts")
+
+    invoices = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "5/InvoiceParser/invoices/*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            invoices.append(f.read())
+    with open(os.path.join(ROOT, "5/HallucinationVerifier/data/questions.jsonl"), "r", encoding="utf-8") as f:
+        questions = [json.loads(line)["question"] for line in f if line.strip()]
+    with open(os.path.join(ROOT, "11/FactChecker/documents.md"), "r", encoding="utf-8") as f:
+        paragraphs = [p for p in f.read().split("\n\n") if p.strip()]
+
+    answers = [f"The answer to question {i} is documented." for i in range(len(questions))]
+    sources = [f"1. https://example.org/reference/{i}" for i in range(len(questions))]
+    queries = [f"Is the following claim accurate? {p[:120]}" for p in paragraphs]
+    return {
+        "INVOICE_PARSING_PROMPT": (invoice_prompts.INVOICE_PARSING_PROMPT, [
+            {"unstructured_invoice_text": text} for text in invoices
+        ], legacy_messages),
+        "HINTED_INVOICE_PARSING_PROMPT": (invoice_prompts.HINTED_INVOICE_PARSING_PROMPT, [
+            {"unstructured_invoice_text": text, "hints": f"- Invoice {i}"} for i, text in enumerate(invoices)
+        ], legacy_messages),
+        "QUESTION": (verifier_prompts.QUESTION, [{"question_input": q} for q in questions], legacy_messages),
+        "SOURCE_REQUEST": (verifier_prompts.SOURCE_REQUEST, [
+            {"question_input": q, "llm_answer": a} for q, a in zip(questions, answers)
+        ], legacy_messages),
+        "SOURCE_VALIDATION": (verifier_prompts.SOURCE_VALIDATION, [
+            {"llm_answer": a, "sources": s} for a, s in zip(answers, sources)
+        ], legacy_messages),
+        "PROMPT_QDRANT_CONSULTANT": (checker_prompts.PROMPT_QDRANT_CONSULTANT, [
+            {"context": p, "query": q} for p, q in zip(paragraphs, queries)
+        ], legacy_messages),
+        "PROMPT_URL_READER": (checker_prompts.PROMPT_URL_READER, [
+            {"query": q, "urls": f"https://example.org/{i}"} for i, q in enumerate(queries)
+        ], legacy_url_reader_messages),
+        "PROMPT_SYNTHESIZER": (checker_prompts.PROMPT_SYNTHESIZER, [
+            {"document_context": p, "web_context": f"Summary {i}."} for i, p in enumerate(paragraphs)
+        ], legacy_messages),
+    }
+
+def main():
+    print(f"Tokenizer: {'tiktoken o200k_base' if 'ENCODING' in globals() else 'regex approximation'}")
+    print(f"{'prompt':<32}{'calls':>6}{'tokens/call':>13}{'reusable (old)':>16}{'reusable (split)':>18}{'billed cached (old/split)':>28}")
+    totals = {"tokens": 0, "legacy": 0, "split": 0}
+    for name, (template, calls, legacy) in workloads().items():
+        results = {}
+        for layout, build in (("legacy", legacy), ("split", build_messages)):
+            stub = PrefixCacheStub()
+            # The first call only warms the cache; the averages are over the ones after it
+            measured = [stub.call(build(template, **values)) for values in calls][1:]
+            results[layout] = [sum(column) / len(measured) for column in zip(*measured)]
+        tokens, legacy, legacy_cached = results["legacy"]
+        _, split, split_cached = results["split"]
+        totals["tokens"] += tokens
+        totals["legacy"] += legacy
+        totals["split"] += split
+        print(
+            f"{name:<32}{len(calls):>6}{tokens:>13.0f}{legacy:>9.0f} ({legacy / tokens:>3.0%})"
+            f"{split:>11.0f} ({split / tokens:>3.0%}){legacy_cached:>17.0f} / {split_cached:<8.0f}"
+        )
+    print(
+        f"Reusable prefix over all prompts: {totals['legacy'] / totals['tokens']:.0%} of prompt tokens before, "
+        f"{totals['split'] / totals['tokens']:.0%} with the split layout."
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import re
+from string import Formatter
+from functools import lru_cache
+from typing import NamedTuple
+
+# A top-level section of the prompts in this repo: "<Guidelines>\n...\n</Guidelines>"
+SECTION_PATTERN = re.compile(r"^<([A-Za-z][\w ]*)>\n.*?^</\1>[ \t]*\n?", re.MULTILINE | re.DOTALL)
+
+
+class PromptParts(NamedTuple):
+    system: str  # identical on every call, so the provider can cache it
+    user: str  # a .format template holding every placeholder
+
+
+def has_fields(text: str) -> bool:
+    return any(field is not None for _, field, _, _ in Formatter().parse(text))
+
+def unescape(text: str) -> str:
+    """Turns the {{ }} of a template without placeholders into the literal braces .format would produce."""
+    return "".join(literal for literal, _, _, _ in Formatter().parse(text))
+
+def chunks_of(template: str) -> list[str]:
+    """Splits a template into its top-level sections and the text between them, in order."""
+    chunks, cursor = [], 0
+    for match in SECTION_PATTERN.finditer(template):
+        chunks.append(template[cursor:match.start()])
+        chunks.append(match.group(0))
+        cursor = match.end()
+    chunks.append(template[cursor:])
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+@lru_cache(maxsize=None)
+def split_prompt(template: str) -> PromptParts:
+    """
+    Splits a prompt template into a static system prefix and a variable user suffix.
+
+    Every top-level section that holds a placeholder goes to the suffix, in order;
+    everything else (persona, guidelines, schemas, examples, separators) goes to the
+    prefix, even when it came after the input in the template. Provider-side prompt
+    caching matches on the exact leading tokens, so the prefix is then reused on
+    every call instead of stopping at the first interpolated value.
+
+    A placeholder inside a static section (e.g. in the middle of a guideline) moves
+    the whole section to the suffix; give such a value its own section instead.
+    Only meant for templates filled with .format: literal braces must be doubled.
+    """
+    static, variable = [], []
+    for chunk in chunks_of(template):
+        (variable if has_fields(chunk) else static).append(chunk)
+    return PromptParts(system=unescape("\n\n".join(static)), user="\n\n".join(variable))
+
+def user_message(template: str, **values) -> str:
+    """Returns only the variable suffix of a template, formatted, e.g. for an agent whose system prompt is split_prompt(template).system."""
+    return split_prompt(template).user.format(**values)
+
+def build_messages(template: str, **values) -> list[dict]:
+    """
+    Returns the chat messages for a prompt template in a cache-stable order: the
+    static system prefix first, then the formatted variable suffix as the user turn.
+    """
+    parts = split_prompt(template)
+    messages = []
+    if parts.system:
+        messages.append({"role": "system", "content": parts.system})
+    if parts.user:
+        messages.append({"role": "user", "content": parts.user.format(**values)})
+    return messages
@@ -0,0 +1,126 @@
+"""
+Measures query latency and recall@k of LocalVectorDb (brute force and IVF) and,
+when a server answers at $QDRANT_URL, of Qdrant, on the same random vectors at
+several collection sizes.
+
+The vectors are drawn around a few thousand random centres, so they cluster the
+way embeddings of related chunks do; the queries are perturbed copies of stored
+vectors. Recall is measured against the exact (brute force) top-k. No embedding
+API is called. Run from the repository root:
+
+    python -m shared.vector_index_benchmark [dimensions] [sizes...]
+
+e.g. "python -m shared.vector_index_benchmark 384 10000 100000 1000000". The
+local index of 1M vectors takes dimensions * 4 MB on disk, in a temporary folder.
+"""
+import sys
+import time
+import tempfile
+from typing import NamedTuple
+
+import numpy as np
+
+from shared.local_vector_store import LocalVectorDb
+
+QUERIES = 200
+K = 10
+INSERT_BATCH = 10000
+BENCHMARK_COLLECTION = "vector_index_benchmark"
+
+
+class Row(NamedTuple):
+    # The fields LocalVectorDb.add reads from an agno Document
+    content: str
+    name: str
+    meta_data: dict
+
+
+def random_vectors(count: int, dimensions: int, rng) -> np.ndarray:
+    centres = rng.standard_normal((min(4096, max(1, count // 100)), dimensions), dtype=np.float32)
+    vectors = centres[rng.integers(len(centres), size=count)]
+    vectors += rng.standard_normal(vectors.shape, dtype=np.float32)
+    return vectors
+
+def latency_summary(seconds: list[float]) -> str:
+    milliseconds = np.array(seconds) * 1000
+    return f"p50 {np.percentile(milliseconds, 50):8.2f} ms  p95 {np.percentile(milliseconds, 95):8.2f} ms"
+
+def recall(found: list[list[int]], exact: list[list[int]]) -> float:
+    return float(np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, exact)]))
+
+def timed_queries(search, queries: np.ndarray) -> tuple[list[list[int]], list[float]]:
+    results, seconds = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        seconds.append(time.perf_counter() - start)
+    return results, seconds
+
+def qdrant_client_or_none():
+    try:
+        from shared.vector_store import get_qdrant_client
+
+        client = get_qdrant_client()
+        client.get_collections()
+        return client
+    except Exception as e:
+        print(f"Qdrant skipped: {e}")
+        return None
+
+def run_qdrant(client, vectors: np.ndarray, queries: np.ndarray) -> tuple[list[list[int]], list[float]]:
+    from shared.vector_store import ensure_collection
+
+    if client.collection_exists(BENCHMARK_COLLECTION):
+        client.delete_collection(BENCHMARK_COLLECTION)
+    ensure_collection(client, BENCHMARK_COLLECTION, vectors.shape[1])
+    client.upload_collection(BENCHMARK_COLLECTION, vectors=vectors, ids=range(len(vectors)), batch_size=1024, wait=True)
+    # Wait for the HNSW index, otherwise the first queries are brute force
+    while client.get_collection(BENCHMARK_COLLECTION).status != "green":
+        time.sleep(1)
+    try:
+        return timed_queries(
+            lambda query: [point.id for point in client.query_points(BENCHMARK_COLLECTION, query=query.tolist(), limit=K).points],
+            queries,
+        )
+    finally:
+        client.delete_collection(BENCHMARK_COLLECTION)
+
+def run_size(count: int, dimensions: int, qdrant, rng) -> None:
+    vectors = random_vectors(count, dimensions, rng)
+    queries = vectors[rng.integers(count, size=QUERIES)] + 0.5 * rng.standard_normal((QUERIES, dimensions), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = LocalVectorDb(directory, dimensions=dimensions)
+        start = time.perf_counter()
+        for offset in range(0, count, INSERT_BATCH):
+            batch = vectors[offset:offset + INSERT_BATCH]
+            index.add([Row("", str(offset + i), {}) for i in range(len(batch))], batch, [str(offset + i) for i in range(len(batch))])
+        print(f"\n{count} vectors of {dimensions} dimensions, inserted in {time.perf_counter() - start:.1f} s, {QUERIES} queries, k={K}")
+
+        search = lambda query: [row for row, _ in index.top_k(query, K)]
+        exact, seconds = timed_queries(search, queries)
+        print(f"{'local brute force':<24}{latency_summary(seconds)}  recall@{K} {1.0:6.1%}")
+
+        start = time.perf_counter()
+        index.build_ivf()
+        build_seconds = time.perf_counter() - start
+        for nprobe in (4, 16):
+            found, seconds = timed_queries(lambda query: [row for row, _ in index.top_k(query, K, nprobe=nprobe)], queries)
+            print(f"{f'local IVF nprobe={nprobe}':<24}{latency_summary(seconds)}  recall@{K} {recall(found, exact):6.1%}  (index built in {build_seconds:.1f} s)")
+        del index
+
+    if qdrant is not None:
+        found, seconds = run_qdrant(qdrant, vectors, queries)
+        print(f"{'qdrant (HNSW)':<24}{latency_summary(seconds)}  recall@{K} {recall(found, exact):6.1%}")
+
+def main(dimensions: int, sizes: list[int]):
+    rng = np.random.default_rng(0)
+    qdrant = qdrant_client_or_none()
+    for count in sizes:
+        run_size(count, dimensions, qdrant, rng)
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 384,
+        [int(size) for size in sys.argv[2:]] or [10000, 100000, 1000000],
+    )
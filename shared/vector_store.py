@@ -0,0 +1,92 @@
+import os
+from functools import lru_cache
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+DEFAULT_QDRANT_URL = "http://localhost:6333"
+DEFAULT_LOCAL_INDEX_DIR = ".vector_index"
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1536
+
+
+@lru_cache(maxsize=None)
+def get_qdrant_client(url: str = None, prefer_grpc: bool = False, grpc_port: int = 6334) -> QdrantClient:
+    """
+    Returns one QdrantClient per (url, protocol), shared by every caller, so its
+    connection pool is reused instead of opening a new client per collection.
+
+    :param url: Defaults to $QDRANT_URL, then http://localhost:6333.
+    :param prefer_grpc: Talk gRPC on grpc_port instead of REST, cheaper for large upserts and searches.
+    """
+    return QdrantClient(url=url or os.getenv("QDRANT_URL", DEFAULT_QDRANT_URL), prefer_grpc=prefer_grpc, grpc_port=grpc_port, api_key=os.getenv("QDRANT_API_KEY"))
+
+@lru_cache(maxsize=None)
+def get_embedder(model: str = EMBEDDING_MODEL, dimensions: int = EMBEDDING_DIMENSIONS):
+    """
+    Returns one agno OpenAIEmbedder per model, shared by every collection and call.
+    """
+    from agno.embedder.openai import OpenAIEmbedder
+
+    return OpenAIEmbedder(id=model, dimensions=dimensions, api_key=os.getenv("OPENAI_API_KEY"))
+
+def ensure_collection(
+    client: QdrantClient,
+    name: str,
+    dimensions: int = EMBEDDING_DIMENSIONS,
+    hnsw_m: int = 16,
+    hnsw_ef_construct: int = 128,
+    indexing_threshold: int = 10000,
+    quantization: bool = False,
+) -> bool:
+    """
+    Creates a collection with cosine vectors unless it already exists.
+
+    :param hnsw_m: Edges per node of the HNSW graph; more is more accurate and uses more memory.
+    :param hnsw_ef_construct: Candidates considered while building the graph.
+    :param indexing_threshold: Segments smaller than this (in KB of vectors) are searched
+        without an index, so a bulk ingest is not slowed down by rebuilding it.
+    :param quantization: Also keep int8 scalar-quantized vectors in RAM, about 4x smaller;
+        search uses them and rescores the best hits with the original vectors.
+    :return: True if the collection was created.
+    """
+    if client.collection_exists(name):
+        return False
+    client.create_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(size=dimensions, distance=models.Distance.COSINE),
+        hnsw_config=models.HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=indexing_threshold),
+        quantization_config=models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True),
+        ) if quantization else None,
+    )
+    return True
+
+@lru_cache(maxsize=None)
+def get_vector_db(collection: str, url: str = None, prefer_grpc: bool = False, quantization: bool = False, backend: str = None):
+    """
+    Returns the agno Qdrant vector db of a collection, creating the collection on
+    first use. Every collection shares the cached client and embedder.
+
+    :param backend: "qdrant" or "local", defaulting to $VECTOR_BACKEND, then "qdrant".
+        "local" returns a LocalVectorDb in $LOCAL_VECTOR_DIR/<collection>
+        (default .vector_index), with the same insert/search interface and no server.
+    """
+    embedder = get_embedder()
+    if (backend or os.getenv("VECTOR_BACKEND", "qdrant")) == "local":
+        from shared.local_vector_store import LocalVectorDb
+
+        return LocalVectorDb(os.path.join(os.getenv("LOCAL_VECTOR_DIR", DEFAULT_LOCAL_INDEX_DIR), collection), embedder)
+
+    from agno.vectordb.qdrant import Qdrant
+
+    client = get_qdrant_client(url, prefer_grpc)
+    if ensure_collection(client, collection, embedder.dimensions, quantization=quantization):
+        print(f"Created Qdrant collection '{collection}'.")
+    vector_db = Qdrant(
+        collection=collection, url=url or os.getenv("QDRANT_URL", DEFAULT_QDRANT_URL), embedder=embedder, prefer_grpc=prefer_grpc,
+    )
+    # agno would otherwise open a client of its own for every Qdrant instance
+    vector_db._client = client
+    return vector_db